@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark: src.duration.parse_duration vs isodate.parse_duration.
+
+Usage:
+    python benchmarks/duration_benchmark.py [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+import isodate
+
+# Add the project root folder to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.duration import parse_duration
+
+# Typical contentDetails.duration values
+SAMPLES = ['PT12M34S', 'PT59S', 'PT1H2M3S', 'PT4M', 'PT1H', 'PT10M5S', 'P0D', 'P1DT2H']
+
+
+def isodate_seconds(value: str) -> int:
+    return int(isodate.parse_duration(value).total_seconds())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000,
+                        help='passes over the sample set (default: 20000)')
+    args = parser.parse_args()
+
+    for value in SAMPLES:
+        assert parse_duration(value) == isodate_seconds(value), value
+
+    calls = args.iterations * len(SAMPLES)
+    results = {}
+    for name, func in (('isodate', isodate_seconds), ('fast', parse_duration)):
+        seconds = min(timeit.repeat(lambda: [func(value) for value in SAMPLES],
+                                    number=args.iterations, repeat=3))
+        results[name] = seconds
+        print(f"{name:>8}: {seconds:.3f}s for {calls} calls "
+              f"({seconds / calls * 1e6:.2f} us/call)")
+
+    print(f" speedup: {results['isodate'] / results['fast']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,471 @@
+"""
+Local stand-in for the YouTube Data API v3 and the channel feeds.
+
+Serves the endpoints YouTubeAPI uses (channels, subscriptions, playlistItems,
+videos) and /feeds/videos.xml from synthetic data, so sync throughput can be
+measured without a Google account or quota. Accounts are identified by their
+OAuth bearer token; latency and error rates are configurable.
+
+    data = FakeYouTubeData.generate(accounts=2, subscriptions=100)
+    with FakeYouTubeServer(data, latency=0.05) as server:
+        api = YouTubeAPI(api_endpoint=server.url)
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import random
+import string
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+from google.oauth2.credentials import Credentials
+
+
+ID_ALPHABET = string.ascii_letters + string.digits + '-_'
+DEFAULT_PAGE_SIZE = 5
+MAX_PAGE_SIZE = 50
+FEED_SIZE = 15
+
+QUOTA_COSTS = {
+    'channels.list': 1,
+    'subscriptions.list': 1,
+    'playlistItems.list': 1,
+    'videos.list': 1,
+}
+
+
+def _etag(payload) -> str:
+    return '"' + hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest() + '"'
+
+
+def parse_fields(mask: str) -> Dict:
+    """
+    Parses a partial response mask ('items(id,snippet/title),nextPageToken').
+
+    Returns:
+        {name: subtree}; a None subtree selects the whole value.
+    """
+    tree, _ = _parse_selection(mask, 0)
+    return tree
+
+
+def _parse_selection(mask: str, pos: int):
+    tree = {}
+    while True:
+        pos = _parse_field(mask, pos, tree)
+        if pos < len(mask) and mask[pos] == ',':
+            pos += 1
+        else:
+            return tree, pos
+
+
+def _parse_field(mask: str, pos: int, tree: Dict) -> int:
+    end = pos
+    while end < len(mask) and mask[end] not in ',/()':
+        end += 1
+    name = mask[pos:end].strip()
+
+    if end < len(mask) and mask[end] == '/':
+        sub = {}
+        end = _parse_field(mask, end + 1, sub)
+    elif end < len(mask) and mask[end] == '(':
+        sub, end = _parse_selection(mask, end + 1)
+        end += 1    # closing parenthesis
+    else:
+        sub = None
+
+    tree[name] = _merge_fields(tree[name], sub) if name in tree else sub
+    return end
+
+
+def _merge_fields(first: Optional[Dict], second: Optional[Dict]) -> Optional[Dict]:
+    if first is None or second is None:
+        return None
+    merged = dict(first)
+    for name, sub in second.items():
+        merged[name] = _merge_fields(merged[name], sub) if name in merged else sub
+    return merged
+
+
+def apply_fields(data, tree: Optional[Dict]):
+    """Trims a response to a parsed mask, like the fields= parameter of the API."""
+    if tree is None:
+        return data
+    if isinstance(data, list):
+        return [apply_fields(item, tree) for item in data]
+    if not isinstance(data, dict):
+        return data
+
+    result = {}
+    for name, sub in tree.items():
+        if name in data:
+            value = apply_fields(data[name], sub)
+            if value != {}:
+                result[name] = value
+    return result
+
+
+def _thumbnails(base_url: str) -> Dict:
+    sizes = {'default': (120, 90), 'medium': (320, 180), 'high': (480, 360),
+             'standard': (640, 480), 'maxres': (1280, 720)}
+    return {name: {'url': f'{base_url}/{name}.jpg', 'width': width, 'height': height}
+            for name, (width, height) in sizes.items()}
+
+
+class FakeYouTubeData:
+    """
+    Synthetic accounts, creator channels and videos.
+
+    Attributes:
+        accounts: {token: {'channel_id', 'title', 'subscriptions': [channel_id, ...]}}
+        channels: {channel_id: {'title', 'videos': [video, ...] newest first}}
+        videos: {video_id: video}
+    """
+
+    def __init__(self, accounts: Dict[str, Dict], channels: Dict[str, Dict]):
+        self.accounts = accounts
+        self.channels = channels
+        self.videos = {video['id']: video
+                       for channel in channels.values() for video in channel['videos']}
+
+    @classmethod
+    def generate(cls, accounts: int = 2, subscriptions: int = 100,
+                 channels: Optional[int] = None, videos_per_channel: int = 20,
+                 seed: int = 0) -> 'FakeYouTubeData':
+        """
+        Generates reproducible data.
+
+        Args:
+            accounts: Number of personal accounts.
+            subscriptions: Subscriptions per account.
+            channels: Size of the creator pool the subscriptions are drawn from
+                (default: 2 * subscriptions, so accounts partly overlap).
+            videos_per_channel: Uploads per creator channel.
+            seed: Random seed.
+        """
+        rng = random.Random(seed)
+        channels = max(channels or subscriptions * 2, subscriptions)
+        now = datetime(2025, 1, 15, 12, 0, tzinfo=timezone.utc)
+
+        def random_id(prefix: str, length: int) -> str:
+            return prefix + ''.join(rng.choices(ID_ALPHABET, k=length))
+
+        creator_channels = {}
+        for i in range(channels):
+            channel_id = random_id('UC', 22)
+            published = now
+            videos = []
+            for j in range(videos_per_channel):
+                published -= timedelta(hours=rng.randint(1, 96))
+                videos.append({
+                    'id': random_id('', 11),
+                    'channel_id': channel_id,
+                    'title': f'Video {j + 1} of channel {i + 1}',
+                    'description': f'Synthetic video {j + 1}',
+                    'published_at': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+                    'duration': f'PT{rng.randint(0, 1)}H{rng.randint(0, 59)}M{rng.randint(1, 59)}S',
+                    'view_count': rng.randint(0, 1000000),
+                })
+            creator_channels[channel_id] = {'title': f'Channel {i + 1}', 'videos': videos}
+
+        pool = list(creator_channels)
+        account_data = {}
+        for i in range(accounts):
+            account_data[f'token-{i + 1}'] = {
+                'channel_id': random_id('UC', 22),
+                'title': f'Account {i + 1}',
+                'subscriptions': rng.sample(pool, subscriptions),
+            }
+
+        return cls(account_data, creator_channels)
+
+
+class FakeYouTubeServer:
+    """
+    HTTP server for FakeYouTubeData.
+
+    Args:
+        data: The data to serve.
+        latency: Delay in seconds added to every response.
+        error_rate: Share of API requests answered with 503 backendError.
+        host, port: Address to listen on (port 0 picks a free port).
+        seed: Random seed for injected errors.
+    """
+
+    def __init__(self, data: FakeYouTubeData, latency: float = 0.0, error_rate: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0, seed: int = 0):
+        self.data = data
+        self.latency = latency
+        self.error_rate = error_rate
+        self.stats = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread = None
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """Base URL for YouTubeAPI(api_endpoint=...)."""
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    @property
+    def feed_url(self) -> str:
+        """Channel feed URL (rss_feed_url)."""
+        return self.url + 'feeds/videos.xml'
+
+    def start(self) -> 'FakeYouTubeServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever,
+                                        name='fake-youtube', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> 'FakeYouTubeServer':
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def quota_units(self) -> int:
+        """Quota units the real API would have charged for the served requests."""
+        return sum(self.stats[endpoint] * cost for endpoint, cost in QUOTA_COSTS.items())
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+
+    # === Request handling ===
+
+    ROUTES = {
+        '/youtube/v3/channels': 'channels.list',
+        '/youtube/v3/subscriptions': 'subscriptions.list',
+        '/youtube/v3/playlistItems': 'playlistItems.list',
+        '/youtube/v3/videos': 'videos.list',
+        '/feeds/videos.xml': 'feed',
+    }
+
+    def _handle(self, handler: BaseHTTPRequestHandler):
+        url = urlparse(handler.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        endpoint = self.ROUTES.get(url.path)
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        with self._lock:
+            self.stats[endpoint or 'unknown'] += 1
+            fail = self.error_rate and self._rng.random() < self.error_rate
+
+        if endpoint is None:
+            return self._send_error(handler, 404, 'notFound')
+        if fail:
+            with self._lock:
+                self.stats['errors'] += 1
+            return self._send_error(handler, 503, 'backendError')
+
+        if endpoint == 'feed':
+            return self._send_feed(handler, query.get('channel_id'))
+
+        account = None
+        authorization = handler.headers.get('Authorization', '')
+        if authorization.startswith('Bearer '):
+            account = self.data.accounts.get(authorization[len('Bearer '):])
+
+        method = {
+            'channels.list': self._channels,
+            'subscriptions.list': self._subscriptions,
+            'playlistItems.list': self._playlist_items,
+            'videos.list': self._videos,
+        }[endpoint]
+        status, body = method(query, account)
+
+        if status != 200:
+            return self._send_error(handler, status, body)
+
+        etag = body['etag'] = _etag([query.get('fields'), body])
+        if handler.headers.get('If-None-Match') == etag:
+            with self._lock:
+                self.stats['not_modified'] += 1
+            return self._send(handler, 304, b'', {'ETag': etag})
+
+        if query.get('fields'):
+            body = apply_fields(body, parse_fields(query['fields']))
+
+        self._send(handler, 200, json.dumps(body).encode('utf-8'),
+                   {'Content-Type': 'application/json; charset=UTF-8'})
+
+    def _channels(self, query: Dict, account: Optional[Dict]):
+        if query.get('mine') == 'true':
+            if account is None:
+                return 401, 'authError'
+            ids = [account['channel_id']]
+            titles = {account['channel_id']: account['title']}
+        else:
+            ids = [cid for cid in query.get('id', '').split(',') if cid in self.data.channels]
+            titles = {cid: self.data.channels[cid]['title'] for cid in ids}
+
+        return 200, {'kind': 'youtube#channelListResponse', 'items': [
+            {'id': cid,
+             'snippet': {'title': titles[cid], 'description': '',
+                         'localized': {'title': titles[cid], 'description': ''},
+                         'thumbnails': _thumbnails(f'https://example.com/{cid}')},
+             'contentDetails': {'relatedPlaylists': {'uploads': 'UU' + cid[2:]}}}
+            for cid in ids
+        ]}
+
+    def _subscriptions(self, query: Dict, account: Optional[Dict]):
+        if account is None:
+            return 401, 'authError'
+
+        offset, size = self._page(query)
+        channel_ids = account['subscriptions']
+        body = {'kind': 'youtube#subscriptionListResponse',
+                'pageInfo': {'totalResults': len(channel_ids), 'resultsPerPage': size},
+                'items': [
+                    {'snippet': {
+                        'title': self.data.channels[cid]['title'],
+                        'description': '',
+                        'resourceId': {'kind': 'youtube#channel', 'channelId': cid},
+                        'channelId': account['channel_id'],
+                        'publishedAt': '2024-01-01T00:00:00Z',
+                        'thumbnails': _thumbnails(f'https://example.com/{cid}'),
+                    }}
+                    for cid in channel_ids[offset:offset + size]
+                ]}
+        if offset + size < len(channel_ids):
+            body['nextPageToken'] = f'page-{offset + size}'
+        return 200, body
+
+    def _playlist_items(self, query: Dict, account: Optional[Dict]):
+        playlist_id = query.get('playlistId', '')
+        channel = self.data.channels.get('UC' + playlist_id[2:])
+        if not playlist_id.startswith('UU') or channel is None:
+            return 404, 'playlistNotFound'
+
+        offset, size = self._page(query)
+        body = {'kind': 'youtube#playlistItemListResponse', 'items': [
+            {'snippet': {'title': video['title'], 'description': video['description'],
+                         'publishedAt': video['published_at'],
+                         'thumbnails': _thumbnails(f"https://i.ytimg.com/vi/{video['id']}")},
+             'contentDetails': {'videoId': video['id'],
+                                'videoPublishedAt': video['published_at']}}
+            for video in channel['videos'][offset:offset + size]
+        ]}
+        if offset + size < len(channel['videos']):
+            body['nextPageToken'] = f'page-{offset + size}'
+        return 200, body
+
+    def _videos(self, query: Dict, account: Optional[Dict]):
+        ids = [vid for vid in query.get('id', '').split(',') if vid][:MAX_PAGE_SIZE]
+        return 200, {'kind': 'youtube#videoListResponse', 'items': [
+            {'id': video['id'],
+             'snippet': {'channelId': video['channel_id'],
+                         'title': video['title'],
+                         'description': video['description'],
+                         'publishedAt': video['published_at'],
+                         'thumbnails': _thumbnails(f"https://i.ytimg.com/vi/{video['id']}"),
+                         'tags': ['synthetic', 'benchmark'],
+                         'categoryId': '22',
+                         'localized': {'title': video['title'],
+                                       'description': video['description']}},
+             'contentDetails': {'duration': video['duration'], 'dimension': '2d',
+                                'definition': 'hd', 'caption': 'false'},
+             'statistics': {'viewCount': str(video['view_count']), 'likeCount': '0',
+                            'favoriteCount': '0', 'commentCount': '0'}}
+            for video in (self.data.videos.get(vid) for vid in ids) if video
+        ]}
+
+    @staticmethod
+    def _page(query: Dict):
+        size = min(int(query.get('maxResults', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        token = query.get('pageToken', '')
+        offset = int(token[len('page-'):]) if token.startswith('page-') else 0
+        return offset, size
+
+    def _send_feed(self, handler: BaseHTTPRequestHandler, channel_id: Optional[str]):
+        channel = self.data.channels.get(channel_id)
+        if channel is None:
+            return self._send(handler, 404, b'')
+
+        entries = ''.join(
+            f"<entry><id>yt:video:{video['id']}</id>"
+            f"<yt:videoId>{video['id']}</yt:videoId>"
+            f"<yt:channelId>{channel_id}</yt:channelId>"
+            f"<title>{escape(video['title'])}</title>"
+            f"<published>{video['published_at']}</published></entry>"
+            for video in channel['videos'][:FEED_SIZE]
+        )
+        content = ('<?xml version="1.0" encoding="UTF-8"?>'
+                   '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" '
+                   'xmlns="http://www.w3.org/2005/Atom">'
+                   f'<title>{escape(channel["title"])}</title>{entries}</feed>').encode('utf-8')
+        etag = _etag(content.decode('utf-8'))
+
+        if handler.headers.get('If-None-Match') == etag:
+            with self._lock:
+                self.stats['not_modified'] += 1
+            return self._send(handler, 304, b'', {'ETag': etag})
+
+        self._send(handler, 200, content, {'Content-Type': 'application/atom+xml', 'ETag': etag})
+
+    def _send_error(self, handler: BaseHTTPRequestHandler, status: int, reason: str):
+        body = {'error': {'code': status, 'message': reason,
+                          'errors': [{'reason': reason, 'message': reason}]}}
+        self._send(handler, status, json.dumps(body).encode('utf-8'),
+                   {'Content-Type': 'application/json; charset=UTF-8'})
+
+    def _send(self, handler: BaseHTTPRequestHandler, status: int, content: bytes,
+              headers: Optional[Dict[str, str]] = None):
+        handler.send_response(status)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        handler.send_header('Content-Length', str(len(content)))
+        with self._lock:
+            self.stats['bytes'] += len(content)
+        handler.end_headers()
+        handler.wfile.write(content)
+
+
+def write_tokens(data: FakeYouTubeData, directory: str) -> Dict[str, str]:
+    """
+    Writes a pickled credentials file for every account, in the format
+    YouTubeAPI.authenticate() reads.
+
+    Returns:
+        {token: token_file}
+    """
+    os.makedirs(directory, exist_ok=True)
+    token_files = {}
+    for token in data.accounts:
+        token_file = os.path.join(directory, f'{token}.pickle')
+        with open(token_file, 'wb') as f:
+            pickle.dump(Credentials(token=token), f)
+        token_files[token] = token_file
+    return token_files
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark: subscription and video sync against the local fake YouTube API.
+
+Runs sync_subscriptions() and sync_videos() end to end (OAuth tokens,
+googleapiclient, retries, SQLite) for synthetic accounts, with configurable
+latency and error rate, and reports wall time, requests and quota units.
+A second pass shows the cost of an incremental sync.
+
+Usage:
+    python benchmarks/sync_benchmark.py [--accounts 2] [--subscriptions 100]
+        [--latency-ms 50] [--error-rate 0.0] [--workers 8] [--strategy api|rss]
+        [--parallel-accounts N]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root folder to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_youtube import FakeYouTubeData, FakeYouTubeServer, write_tokens
+from src.db_manager import Database
+from src.quota import QuotaLedger
+from src.request_executor import RequestExecutor
+from src.sync_subscriptions import (print_stage_timings, run_parallel_accounts, sync_subscriptions,
+                                    sync_videos)
+from src.timing import timer
+from src.youtube_api import ClientRegistry
+
+
+def setup_database(data: FakeYouTubeData, directory: str) -> Database:
+    """Creates a database with one personal channel per fake account."""
+    db = Database(os.path.join(directory, 'benchmark.db'))
+    token_files = write_tokens(data, os.path.join(directory, 'tokens'))
+    for token, account in data.accounts.items():
+        db.add_personal_channel(name=account['title'],
+                                youtube_channel_id=account['channel_id'],
+                                oauth_token_path=token_files[token])
+    return db
+
+
+def count_videos(db: Database) -> int:
+    with db.get_connection() as conn:
+        return conn.execute('SELECT COUNT(*) FROM videos').fetchone()[0]
+
+
+def run_pass(name: str, db: Database, server: FakeYouTubeServer, args) -> None:
+    """Runs one full sync and prints its numbers."""
+    server.reset_stats()
+    registry = ClientRegistry(api_endpoint=server.url,
+                              executor=RequestExecutor(base_delay=0.05, max_delay=0.5))
+    ledger = QuotaLedger(db, 'benchmark', daily_budget=10 ** 9)
+    output = io.StringIO()
+
+    video_options = dict(max_videos_per_channel=args.max_videos, workers=args.workers,
+                         fetch_strategy=args.strategy, feed_url=server.feed_url,
+                         adaptive_polling=args.adaptive_polling)
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+        if args.parallel_accounts:
+            results = run_parallel_accounts(db, args.parallel_accounts, ledger=ledger,
+                                            api_endpoint=server.url, rate_limit=0,
+                                            **video_options)
+        else:
+            sync_subscriptions(db, ledger=ledger, registry=registry)
+            subscriptions_done = time.perf_counter()
+            sync_videos(db, ledger=ledger, registry=registry, **video_options)
+    finished = time.perf_counter()
+
+    endpoints = ', '.join(f'{endpoint}={count}' for endpoint, count in sorted(server.stats.items())
+                          if endpoint != 'bytes')
+    print(f"{name}:")
+    if args.parallel_accounts:
+        # Retries happen in the worker processes and are not counted here
+        units = sum(result['quota_units'] for result in results)
+        calls = sum(result['quota_calls'] for result in results)
+        slowest = max((result['seconds'] for result in results), default=0.0)
+        print(f"  accounts:      {len(results)} in {args.parallel_accounts} processes, "
+              f"slowest {slowest:.2f}s")
+        print(f"  total:         {finished - started:.2f}s")
+        print(f"  server:        {endpoints}")
+        print(f"  transferred:   {server.stats['bytes'] / 1024:.1f} KiB")
+        print(f"  quota:         {units} units in {calls} calls")
+    else:
+        metrics = registry.executor.metrics.snapshot()
+        print(f"  subscriptions: {subscriptions_done - started:.2f}s")
+        print(f"  videos:        {finished - subscriptions_done:.2f}s")
+        print(f"  total:         {finished - started:.2f}s")
+        print(f"  server:        {endpoints}")
+        print(f"  transferred:   {server.stats['bytes'] / 1024:.1f} KiB")
+        print(f"  quota:         {ledger.session_units()} units in {ledger.session_calls()} calls, "
+              f"{metrics['retries']} retries")
+    print(f"  videos stored: {count_videos(db)}")
+    if timer.enabled:
+        print_stage_timings()
+        timer.reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--accounts', type=int, default=2, help='personal accounts (default: 2)')
+    parser.add_argument('--subscriptions', type=int, default=100,
+                        help='subscriptions per account (default: 100)')
+    parser.add_argument('--channels', type=int, default=None,
+                        help='creator channel pool (default: 2 * subscriptions)')
+    parser.add_argument('--videos-per-channel', type=int, default=20,
+                        help='uploads per creator channel (default: 20)')
+    parser.add_argument('--latency-ms', type=float, default=50,
+                        help='delay added to every response (default: 50)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='share of API requests failing with 503 (default: 0)')
+    parser.add_argument('--workers', type=int, default=8, help='sync_workers (default: 8)')
+    parser.add_argument('--max-videos', type=int, default=5,
+                        help='videos per channel to fetch (default: 5)')
+    parser.add_argument('--strategy', choices=['api', 'rss'], default='api',
+                        help='video_fetch_strategy (default: api)')
+    parser.add_argument('--adaptive-polling', action='store_true',
+                        help='skip channels that are not due (default: poll all)')
+    parser.add_argument('--parallel-accounts', type=int, default=None, metavar='N',
+                        help='sync the accounts in N worker processes (default: one process)')
+    parser.add_argument('--timings', action='store_true',
+                        help='print per-stage timing histograms of every pass')
+    parser.add_argument('--passes', type=int, default=2,
+                        help='sync passes; later passes are incremental (default: 2)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('--verbose', action='store_true', help='show the sync output')
+    args = parser.parse_args()
+    timer.enabled = args.timings
+
+    data = FakeYouTubeData.generate(accounts=args.accounts, subscriptions=args.subscriptions,
+                                    channels=args.channels,
+                                    videos_per_channel=args.videos_per_channel, seed=args.seed)
+    print(f"{args.accounts} accounts x {args.subscriptions} subscriptions, "
+          f"{len(data.channels)} channels, latency {args.latency_ms:g} ms, "
+          f"error rate {args.error_rate:g}, {args.workers} workers, strategy {args.strategy}"
+          f"{', adaptive polling' if args.adaptive_polling else ''}"
+          f"{f', {args.parallel_accounts} processes' if args.parallel_accounts else ''}\n")
+
+    with tempfile.TemporaryDirectory() as directory, \
+            FakeYouTubeServer(data, latency=args.latency_ms / 1000,
+                              error_rate=args.error_rate, seed=args.seed) as server:
+        db = setup_database(data, directory)
+        for i in range(args.passes):
+            run_pass('first sync' if i == 0 else f'incremental sync {i}', db, server, args)
+
+
+if __name__ == '__main__':
+    main()
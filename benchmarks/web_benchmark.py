@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the web API on the Flask development server and production WSGI servers.
+
+Builds a large synthetic database, starts the dashboard on each server in
+its own process and sends the requests of the frontend (channel list,
+stats, video lists) from concurrent keep-alive clients. Reports requests
+per second and p50/p99 latency for every server.
+
+gunicorn (Linux, macOS) and waitress (Windows) are optional; servers that
+are not installed are skipped. The clients are threads of this process,
+so on a fast machine the numbers are a lower bound.
+
+Usage:
+    python benchmarks/web_benchmark.py [--channels 4] [--subscriptions 250]
+        [--videos 20] [--clients 16] [--duration 10] [--workers 4] [--threads 8]
+        [--servers dev,gunicorn,waitress]
+"""
+
+import argparse
+import itertools
+import logging
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+
+# Add the project root folder to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db_manager import Database
+from src.timing import percentile
+
+
+SERVERS = ('dev', 'gunicorn', 'waitress')
+
+
+def setup_database(path: str, channels: int, subscriptions: int, videos: int,
+                   seed: int = 0) -> Database:
+    """Creates a database with `channels` accounts, each following `subscriptions` creators."""
+    rng = random.Random(seed)
+    db = Database(path)
+    start = datetime(2024, 1, 1)
+
+    with db.get_connection() as conn:
+        for channel in range(channels):
+            cursor = conn.execute(
+                'INSERT INTO personal_channels (name, youtube_channel_id, oauth_token_path) '
+                'VALUES (?, ?, ?)',
+                (f'Account {channel}', f'UC_account_{channel}', f'token_{channel}.json'))
+            personal_channel_id = cursor.lastrowid
+
+            for sub in range(subscriptions):
+                cursor = conn.execute(
+                    'INSERT INTO subscriptions (personal_channel_id, youtube_channel_id, '
+                    'channel_name) VALUES (?, ?, ?)',
+                    (personal_channel_id, f'UC_creator_{channel}_{sub}', f'Creator {sub}'))
+                subscription_id = cursor.lastrowid
+
+                conn.executemany(
+                    'INSERT INTO videos (subscription_id, youtube_video_id, title, description, '
+                    'thumbnail, published_at, duration, duration_seconds, view_count, is_watched) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    [(subscription_id, f'v_{subscription_id}_{video}', f'Video {video}',
+                      'Description ' * 20, f'https://i.ytimg.com/vi/{video}/mqdefault.jpg',
+                      (start + timedelta(hours=rng.randrange(24 * 365))).isoformat() + 'Z',
+                      'PT10M', 600, rng.randrange(10 ** 6), rng.random() < 0.5)
+                     for video in range(videos)])
+    return db
+
+
+def serve(name: str, db_path: str, port: int, workers: int, threads: int) -> None:
+    """Runs the dashboard on one server until the process is terminated."""
+    from src.web_server import create_app
+
+    app = create_app({'database_path': db_path})
+
+    if name == 'dev':
+        # The development server logs every request; the others do not by default
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        app.run(host='127.0.0.1', port=port, debug=False, threaded=True)
+
+    elif name == 'gunicorn':
+        from gunicorn.app.base import BaseApplication
+
+        class Server(BaseApplication):
+            def load_config(self):
+                self.cfg.set('bind', f'127.0.0.1:{port}')
+                self.cfg.set('workers', workers)
+                self.cfg.set('threads', threads)
+                self.cfg.set('loglevel', 'warning')
+
+            def load(self):
+                return app
+
+        Server().run()
+
+    elif name == 'waitress':
+        import waitress
+        waitress.serve(app, host='127.0.0.1', port=port, threads=threads)
+
+
+def is_available(name: str) -> bool:
+    if name == 'dev':
+        return True
+    if name == 'gunicorn' and sys.platform == 'win32':
+        return False
+    try:
+        __import__(name)
+    except ImportError:
+        return False
+    return True
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with code {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('server did not start')
+
+
+def request_paths(channels: int):
+    """The requests of a dashboard page load, repeated."""
+    paths = ['/api/channels', '/api/stats']
+    for channel in range(1, channels + 1):
+        paths.append(f'/api/channels/{channel}/videos?include_watched=false')
+        paths.append(f'/api/channels/{channel}/videos?include_watched=true&max_duration=900')
+    return paths
+
+
+def load(url: str, paths, clients: int, duration: float):
+    """
+    Sends requests from `clients` threads for `duration` seconds.
+
+    Returns:
+        (latencies in seconds, failed requests, elapsed seconds)
+    """
+    latencies = []
+    failures = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(offset):
+        session = requests.Session()
+        local, failed = [], 0
+        for path in itertools.islice(itertools.cycle(paths), offset, None):
+            if time.perf_counter() >= deadline:
+                break
+            started = time.perf_counter()
+            try:
+                ok = session.get(url + path, timeout=60).status_code == 200
+            except requests.RequestException:
+                ok = False
+            local.append(time.perf_counter() - started)
+            failed += not ok
+        with lock:
+            latencies.extend(local)
+            failures[0] += failed
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, failures[0], time.perf_counter() - started
+
+
+def run_server(name: str, db_path: str, args) -> None:
+    """Benchmarks one server and prints its numbers."""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', name, '--db', db_path,
+         '--port', str(port), '--workers', str(args.workers), '--threads', str(args.threads)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    try:
+        wait_for_port(port, process)
+        url = f'http://127.0.0.1:{port}'
+        paths = request_paths(args.channels)
+
+        # Warm-up: imports, page cache, gunicorn workers
+        load(url, paths, args.clients, min(args.duration, 2.0))
+        latencies, failures, elapsed = load(url, paths, args.clients, args.duration)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    latencies.sort()
+    print(f"{name:<10} {len(latencies):>9} {failures:>7} {len(latencies) / elapsed:>9.1f} "
+          f"{percentile(latencies, 0.5) * 1000:>9.1f} {percentile(latencies, 0.99) * 1000:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--channels', type=int, default=4, help='personal accounts (default: 4)')
+    parser.add_argument('--subscriptions', type=int, default=250,
+                        help='subscriptions per account (default: 250)')
+    parser.add_argument('--videos', type=int, default=20,
+                        help='videos per subscription (default: 20)')
+    parser.add_argument('--clients', type=int, default=16,
+                        help='concurrent clients (default: 16)')
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='seconds of load per server (default: 10)')
+    parser.add_argument('--workers', type=int, default=4,
+                        help='gunicorn worker processes (default: 4)')
+    parser.add_argument('--threads', type=int, default=8,
+                        help='threads per gunicorn worker / waitress (default: 8)')
+    parser.add_argument('--servers', default=','.join(SERVERS),
+                        help=f"comma-separated servers (default: {','.join(SERVERS)})")
+    parser.add_argument('--seed', type=int, default=0, help='random seed (default: 0)')
+    parser.add_argument('--serve', choices=SERVERS, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.db, args.port, args.workers, args.threads)
+        return
+
+    servers = [name.strip() for name in args.servers.split(',') if name.strip()]
+    unknown = set(servers) - set(SERVERS)
+    if unknown:
+        parser.error(f"unknown servers: {', '.join(sorted(unknown))}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'benchmark.db')
+        setup_database(db_path, args.channels, args.subscriptions, args.videos, seed=args.seed)
+        print(f"{args.channels} accounts x {args.subscriptions} subscriptions x "
+              f"{args.videos} videos ({args.channels * args.subscriptions * args.videos} videos), "
+              f"{args.clients} clients, {args.duration:g}s per server\n")
+        print(f"{'server':<10} {'requests':>9} {'errors':>7} {'RPS':>9} {'p50 ms':>9} {'p99 ms':>9}")
+
+        for name in servers:
+            if not is_available(name):
+                print(f"{name:<10} not installed, skipped")
+                continue
+            run_server(name, db_path, args)
+
+
+if __name__ == '__main__':
+    main()
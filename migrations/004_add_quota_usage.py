@@ -0,0 +1,36 @@
+"""
+Migration 004: Add Quota Usage
+
+Adds a ledger of YouTube API quota usage and the time of the last video
+sync for every subscription (used by the quota planner).
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Create table for quota usage
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS quota_usage (
+            project_id TEXT NOT NULL,
+            usage_date TEXT NOT NULL,
+            endpoint TEXT NOT NULL,
+            calls INTEGER DEFAULT 0,
+            units INTEGER DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (project_id, usage_date, endpoint)
+        )
+    ''')
+    print("  [OK] Created table: quota_usage")
+    
+    # Check if the field already exists (for idempotency)
+    cursor.execute("PRAGMA table_info(subscriptions)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    # Add last_video_sync_at
+    if 'last_video_sync_at' not in columns:
+        cursor.execute('''
+            ALTER TABLE subscriptions 
+            ADD COLUMN last_video_sync_at TIMESTAMP
+        ''')
+        print("  [OK] Added field: last_video_sync_at")
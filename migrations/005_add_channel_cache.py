@@ -0,0 +1,21 @@
+"""
+Migration 005: Add Channel Cache
+
+Adds a per-channel cache for the RSS feed state (ETag / Last-Modified),
+used by the zero-quota feed fetch strategy.
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Create table for the channel cache
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS channel_cache (
+            youtube_channel_id TEXT PRIMARY KEY,
+            feed_etag TEXT,
+            feed_last_modified TEXT,
+            feed_checked_at TIMESTAMP
+        )
+    ''')
+    print("  [OK] Created table: channel_cache")
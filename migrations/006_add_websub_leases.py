@@ -0,0 +1,30 @@
+"""
+Migration 006: Add WebSub Leases
+
+Adds the WebSub (PubSubHubbub) subscription state of every YouTube channel
+to the channel cache.
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Check which fields already exist (for idempotency)
+    cursor.execute("PRAGMA table_info(channel_cache)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    # Add websub_requested_at
+    if 'websub_requested_at' not in columns:
+        cursor.execute('''
+            ALTER TABLE channel_cache 
+            ADD COLUMN websub_requested_at TIMESTAMP
+        ''')
+        print("  [OK] Added field: websub_requested_at")
+    
+    # Add websub_lease_expires_at
+    if 'websub_lease_expires_at' not in columns:
+        cursor.execute('''
+            ALTER TABLE channel_cache 
+            ADD COLUMN websub_lease_expires_at TIMESTAMP
+        ''')
+        print("  [OK] Added field: websub_lease_expires_at")
@@ -0,0 +1,48 @@
+"""
+Migration 007: Add Duration Seconds
+
+Stores the video duration as an integer number of seconds (NULL for live
+streams) so videos can be filtered by length with an index range, and fills
+it in for existing videos from the display duration.
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Check if the field already exists (for idempotency)
+    cursor.execute("PRAGMA table_info(videos)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    # Add duration_seconds
+    if 'duration_seconds' not in columns:
+        cursor.execute('''
+            ALTER TABLE videos 
+            ADD COLUMN duration_seconds INTEGER
+        ''')
+        print("  [OK] Added field: duration_seconds")
+    
+    # Backfill from "M:SS" / "H:MM:SS" ("LIVE" stays NULL)
+    cursor.execute('''
+        SELECT id, duration FROM videos 
+        WHERE duration_seconds IS NULL AND duration IS NOT NULL AND duration != 'LIVE'
+    ''')
+    
+    updates = []
+    for video_id, duration in cursor.fetchall():
+        parts = duration.split(':')
+        if all(part.isdigit() for part in parts):
+            seconds = 0
+            for part in parts:
+                seconds = seconds * 60 + int(part)
+            updates.append((seconds, video_id))
+    
+    cursor.executemany('UPDATE videos SET duration_seconds = ? WHERE id = ?', updates)
+    print(f"  [OK] Filled duration_seconds for {len(updates)} videos")
+    
+    # Create index for duration range queries
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_videos_duration 
+        ON videos(subscription_id, duration_seconds)
+    ''')
+    print("  [OK] Created index: idx_videos_duration")
@@ -0,0 +1,23 @@
+"""
+Migration 008: Add Subscription Sync State
+
+Stores a hash of the subscription set and the page ETags of the last
+subscription sync of every personal channel, so unchanged accounts can be
+skipped.
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Create table for the subscription sync state
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS subscription_sync_state (
+            personal_channel_id INTEGER PRIMARY KEY,
+            subscriptions_hash TEXT NOT NULL,
+            pages TEXT,
+            synced_at TIMESTAMP,
+            FOREIGN KEY (personal_channel_id) REFERENCES personal_channels(id)
+        )
+    ''')
+    print("  [OK] Created table: subscription_sync_state")
@@ -0,0 +1,30 @@
+"""
+Migration 009: Add Poll Schedule
+
+Adds the learned upload interval and the time of the next video poll to
+subscriptions, for adaptive polling.
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Check which fields already exist (for idempotency)
+    cursor.execute("PRAGMA table_info(subscriptions)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    # Add upload_interval_seconds
+    if 'upload_interval_seconds' not in columns:
+        cursor.execute('''
+            ALTER TABLE subscriptions 
+            ADD COLUMN upload_interval_seconds INTEGER
+        ''')
+        print("  [OK] Added field: upload_interval_seconds")
+    
+    # Add next_video_sync_at (NULL = due now)
+    if 'next_video_sync_at' not in columns:
+        cursor.execute('''
+            ALTER TABLE subscriptions 
+            ADD COLUMN next_video_sync_at TIMESTAMP
+        ''')
+        print("  [OK] Added field: next_video_sync_at")
@@ -0,0 +1,31 @@
+"""
+Migration 010: Add Sync Runs
+
+Records every video sync run with its progress, so an interrupted run can
+be resumed without fetching the same subscriptions again.
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Create table for sync runs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            started_at TIMESTAMP NOT NULL,
+            finished_at TIMESTAMP,
+            planned INTEGER DEFAULT 0,
+            processed INTEGER DEFAULT 0,
+            resumed_count INTEGER DEFAULT 0
+        )
+    ''')
+    print("  [OK] Created table: sync_runs")
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sync_runs_kind 
+        ON sync_runs(kind, id DESC)
+    ''')
+    print("  [OK] Created index: idx_sync_runs_kind")
@@ -0,0 +1,31 @@
+"""
+Migration 011: Add Sync Run Stats
+
+Extends sync_runs into a ledger of every sync: API calls by endpoint,
+quota units, new videos, subscription changes, errors and the time spent
+on each account.
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Check which fields already exist (for idempotency)
+    cursor.execute("PRAGMA table_info(sync_runs)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    new_columns = [
+        ('api_calls', 'TEXT'),                              # {endpoint: calls}
+        ('quota_units', 'INTEGER DEFAULT 0'),
+        ('new_videos', 'INTEGER DEFAULT 0'),
+        ('subscriptions_added', 'INTEGER DEFAULT 0'),
+        ('subscriptions_activated', 'INTEGER DEFAULT 0'),
+        ('subscriptions_deactivated', 'INTEGER DEFAULT 0'),
+        ('errors', 'INTEGER DEFAULT 0'),
+        ('accounts', 'TEXT'),                               # {channel_id: {name, seconds, ...}}
+    ]
+    
+    for name, definition in new_columns:
+        if name not in columns:
+            cursor.execute(f'ALTER TABLE sync_runs ADD COLUMN {name} {definition}')
+            print(f"  [OK] Added field: {name}")
@@ -0,0 +1,27 @@
+"""
+Migration 012: Add Circuit Breaker
+
+Adds failure tracking to subscriptions: the number of failed video fetches
+in a row, the time until which the subscription is skipped, and the type
+and time of the last failure.
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Check which fields already exist (for idempotency)
+    cursor.execute("PRAGMA table_info(subscriptions)")
+    columns = [col[1] for col in cursor.fetchall()]
+    
+    new_columns = [
+        ('failure_count', 'INTEGER DEFAULT 0'),
+        ('circuit_open_until', 'TIMESTAMP'),                # NULL = circuit closed
+        ('last_failure_type', 'TEXT'),
+        ('last_failure_at', 'TIMESTAMP'),
+    ]
+    
+    for name, definition in new_columns:
+        if name not in columns:
+            cursor.execute(f'ALTER TABLE subscriptions ADD COLUMN {name} {definition}')
+            print(f"  [OK] Added field: {name}")
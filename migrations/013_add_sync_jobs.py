@@ -0,0 +1,45 @@
+"""
+Migration 013: Add Sync Jobs
+
+Stores the syncs requested through POST /api/sync and their progress logs,
+so every worker process of the web server sees the same jobs.
+"""
+
+
+def upgrade(cursor):
+    """Applies the migration."""
+    
+    # Create table for sync jobs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_jobs (
+            id TEXT PRIMARY KEY,
+            options TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            created_at TIMESTAMP NOT NULL,
+            started_at TIMESTAMP,
+            finished_at TIMESTAMP,
+            heartbeat_at TIMESTAMP,
+            error TEXT,
+            requests INTEGER DEFAULT 1
+        )
+    ''')
+    print("  [OK] Created table: sync_jobs")
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_sync_jobs_status
+        ON sync_jobs(status, created_at)
+    ''')
+    print("  [OK] Created index: idx_sync_jobs_status")
+    
+    # Create table for the progress logs of sync jobs
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS sync_job_events (
+            job_id TEXT NOT NULL,
+            id INTEGER NOT NULL,
+            time TIMESTAMP NOT NULL,
+            message TEXT NOT NULL,
+            PRIMARY KEY (job_id, id),
+            FOREIGN KEY (job_id) REFERENCES sync_jobs(id)
+        )
+    ''')
+    print("  [OK] Created table: sync_job_events")
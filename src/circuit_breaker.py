@@ -0,0 +1,117 @@
+"""
+Circuit breaker for subscriptions that fail on every sync.
+
+A subscription whose uploads playlist is gone or private fails the same way
+on every run, spending quota and a sync_errors row each time. Every such
+failure is counted; after `threshold` failures in a row the
+circuit opens and the subscription is skipped until its backoff expires,
+doubling with every further failure up to a maximum. Once the backoff has
+expired the circuit is half-open: the next run fetches the channel once
+more as a probe, and a success closes the circuit again.
+
+Only a missing uploads playlist or channel counts as a failure. Quota,
+rate-limit, server, network and authorization errors are not the channel's
+fault, and neither is an unclassified error.
+"""
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+DEFAULT_FAILURE_THRESHOLD = 3           # failures in a row that open the circuit
+DEFAULT_BASE_BACKOFF_HOURS = 6
+DEFAULT_MAX_BACKOFF_DAYS = 30
+
+CHANNEL_ERRORS = frozenset({'PLAYLIST_NOT_FOUND'})   # errors that count as failures
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def backoff_seconds(failures: int, threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                    base: int = DEFAULT_BASE_BACKOFF_HOURS * 3600,
+                    maximum: int = DEFAULT_MAX_BACKOFF_DAYS * 86400) -> int:
+    """
+    Gets how long a subscription is skipped after `failures` failures in a row.
+
+    Returns:
+        0 below the threshold, then base, 2 * base, 4 * base, ... up to maximum.
+    """
+    if failures < threshold:
+        return 0
+    # The exponent is capped so a long-dead channel cannot overflow the float
+    return int(min(base * 2 ** min(failures - threshold, 32), maximum))
+
+
+def circuit_state(subscription: Dict, now: Optional[datetime] = None) -> str:
+    """
+    Gets the circuit state of a subscription row.
+
+    Returns:
+        CLOSED (fetched normally), OPEN (skipped) or HALF_OPEN (fetched once as a probe).
+    """
+    open_until = subscription.get('circuit_open_until')
+    if not open_until:
+        return CLOSED
+    if open_until > (now or datetime.now()).isoformat():
+        return OPEN
+    return HALF_OPEN
+
+
+def record_failure(subscription: Dict, error_type: str, now: Optional[datetime] = None,
+                   **backoff) -> Optional[Tuple[int, int, Optional[str], str]]:
+    """
+    Counts a failed fetch of a subscription.
+
+    Args:
+        subscription: The subscription row.
+        error_type: The classified error (see request_executor.classify_error).
+        backoff: threshold, base and maximum for backoff_seconds().
+
+    Returns:
+        (subscription_id, failure_count, circuit_open_until, error_type) for
+        Database.update_circuit_state, or None for errors that are not the channel's fault.
+    """
+    if error_type not in CHANNEL_ERRORS:
+        return None
+
+    now = now or datetime.now()
+    failures = (subscription.get('failure_count') or 0) + 1
+    delay = backoff_seconds(failures, **backoff)
+    open_until = (now + timedelta(seconds=delay)).isoformat() if delay else None
+
+    return subscription['id'], failures, open_until, error_type
+
+
+def record_success(subscription: Dict) -> Optional[Tuple[int, int, None, None]]:
+    """
+    Closes the circuit of a subscription that was fetched successfully.
+
+    Returns:
+        The reset for Database.update_circuit_state, or None if nothing failed before.
+    """
+    if not subscription.get('failure_count'):
+        return None
+    return subscription['id'], 0, None, None
+
+
+def split_tripped(targets: List[Dict], now: Optional[datetime] = None
+                  ) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Splits fetch targets into those to fetch and those whose circuit is open.
+
+    A target (one creator) is skipped only while the circuits of all its
+    subscriptions are open, so a new follower of a dead channel probes it.
+
+    Returns:
+        (fetched, tripped) lists of targets.
+    """
+    now = now or datetime.now()
+    fetched, tripped = [], []
+
+    for target in targets:
+        is_open = all(circuit_state(sub, now) == OPEN for sub in target['subscriptions'])
+        (tripped if is_open else fetched).append(target)
+
+    return fetched, tripped
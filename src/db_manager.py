@@ -1,8 +1,44 @@
 import sqlite3
 from datetime import datetime
-from typing import List, Optional, Dict
+from typing import Callable, Iterable, List, Optional, Dict, Set, Tuple
 import json
 import os
+import threading
+
+
+# Не больше 999 параметров в одном запросе (лимит старых версий SQLite)
+SQL_CHUNK_SIZE = 500
+
+# Ожидание записи другого процесса (синхронизация с --parallel-accounts)
+BUSY_TIMEOUT_SECONDS = 30
+
+# Счётчики sync_runs, которые суммируются при продолжении запуска
+SYNC_RUN_TOTALS = ('quota_units', 'new_videos', 'subscriptions_added', 'subscriptions_activated',
+                   'subscriptions_deactivated', 'errors')
+
+
+# Число записей (коммитов с изменениями) в каждую БД из этого процесса
+_write_counts: Dict[str, int] = {}
+_write_counts_lock = threading.Lock()
+
+
+class _CountingConnection(sqlite3.Connection):
+    """Соединение, которое считает свои коммиты с изменениями в _write_counts"""
+    
+    db_path = None
+    
+    def commit(self):
+        wrote = self.in_transaction
+        super().commit()
+        if wrote:
+            with _write_counts_lock:
+                _write_counts[self.db_path] = _write_counts.get(self.db_path, 0) + 1
+
+
+def _chunks(items: List, size: int = SQL_CHUNK_SIZE):
+    """Разбиение списка на части для запросов с IN (...)"""
+    for start in range(0, len(items), size):
+        yield list(items[start:start + size])
 
 
 class Database:
@@ -13,10 +49,46 @@ class Database:
         self.init_database()
     
     def get_connection(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, timeout=BUSY_TIMEOUT_SECONDS,
+                               factory=_CountingConnection)
+        conn.db_path = self.db_path
         conn.row_factory = sqlite3.Row
         return conn
     
+    def data_version(self) -> Tuple:
+        """
+        Версия данных БД, которая меняется при каждой записи
+        
+        Записи этого процесса считает счётчик коммитов; записи других
+        процессов (синхронизация из командной строки, демон) видны по
+        времени изменения и размеру файлов БД и журнала WAL. Чтение
+        не обращается к SQLite и занимает единицы микросекунд.
+        
+        Returns:
+            Кортеж, равный предыдущему, пока данные не менялись
+        """
+        version = [_write_counts.get(self.db_path, 0)]
+        for path in (self.db_path, self.db_path + '-wal'):
+            try:
+                stat = os.stat(path)
+                version += [stat.st_mtime_ns, stat.st_size]
+            except OSError:
+                version += [None, None]
+        return tuple(version)
+    
+    def enable_wal(self) -> str:
+        """
+        Включение журнала WAL (сохраняется в файле БД): читатели не ждут
+        записи, а процессы синхронизации пишут по очереди
+        
+        Returns:
+            Установленный режим журнала
+        """
+        conn = self.get_connection()
+        mode = conn.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+        conn.close()
+        return mode
+    
     def init_database(self):
         """Создание таблиц базы данных"""
         conn = self.get_connection()
@@ -47,6 +119,13 @@ class Database:
                 is_active BOOLEAN DEFAULT 1,
                 deleted_by_user BOOLEAN DEFAULT 0,
                 deactivated_at TIMESTAMP,
+                last_video_sync_at TIMESTAMP,
+                upload_interval_seconds INTEGER,
+                next_video_sync_at TIMESTAMP,
+                failure_count INTEGER DEFAULT 0,
+                circuit_open_until TIMESTAMP,
+                last_failure_type TEXT,
+                last_failure_at TIMESTAMP,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (personal_channel_id) REFERENCES personal_channels(id),
                 UNIQUE(personal_channel_id, youtube_channel_id)
@@ -70,6 +149,7 @@ class Database:
                 thumbnail TEXT,
                 published_at TIMESTAMP NOT NULL,
                 duration TEXT,
+                duration_seconds INTEGER,
                 view_count INTEGER,
                 discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 is_watched BOOLEAN DEFAULT 0,
@@ -90,6 +170,15 @@ class Database:
             ON videos(subscription_id, published_at DESC)
         ''')
         
+        # Фильтр по длительности (Shorts / длинные видео) диапазоном по индексу.
+        # В старых БД колонка появляется только после миграции 007
+        cursor.execute('PRAGMA table_info(videos)')
+        if 'duration_seconds' in [col[1] for col in cursor.fetchall()]:
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_videos_duration 
+                ON videos(subscription_id, duration_seconds)
+            ''')
+        
         # Таблица для логирования ошибок синхронизации
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS sync_errors (
@@ -111,6 +200,102 @@ class Database:
             ON sync_errors(resolved, occurred_at DESC)
         ''')
         
+        # Расход квоты YouTube API по проектам и дням
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS quota_usage (
+                project_id TEXT NOT NULL,
+                usage_date TEXT NOT NULL,
+                endpoint TEXT NOT NULL,
+                calls INTEGER DEFAULT 0,
+                units INTEGER DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (project_id, usage_date, endpoint)
+            )
+        ''')
+        
+        # Снимок последней синхронизации подписок (хэш набора, ETag страниц)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS subscription_sync_state (
+                personal_channel_id INTEGER PRIMARY KEY,
+                subscriptions_hash TEXT NOT NULL,
+                pages TEXT,
+                synced_at TIMESTAMP,
+                FOREIGN KEY (personal_channel_id) REFERENCES personal_channels(id)
+            )
+        ''')
+        
+        # Запуски синхронизации: прогресс (для --resume), длительность,
+        # вызовы API, квота и результаты
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'running',
+                started_at TIMESTAMP NOT NULL,
+                finished_at TIMESTAMP,
+                planned INTEGER DEFAULT 0,
+                processed INTEGER DEFAULT 0,
+                resumed_count INTEGER DEFAULT 0,
+                api_calls TEXT,
+                quota_units INTEGER DEFAULT 0,
+                new_videos INTEGER DEFAULT 0,
+                subscriptions_added INTEGER DEFAULT 0,
+                subscriptions_activated INTEGER DEFAULT 0,
+                subscriptions_deactivated INTEGER DEFAULT 0,
+                errors INTEGER DEFAULT 0,
+                accounts TEXT
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sync_runs_kind 
+            ON sync_runs(kind, id DESC)
+        ''')
+        
+        # Синхронизации, запрошенные через POST /api/sync, общие для всех
+        # процессов веб-сервера, и их журналы
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_jobs (
+                id TEXT PRIMARY KEY,
+                options TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                created_at TIMESTAMP NOT NULL,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                heartbeat_at TIMESTAMP,
+                error TEXT,
+                requests INTEGER DEFAULT 1
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_sync_jobs_status 
+            ON sync_jobs(status, created_at)
+        ''')
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_job_events (
+                job_id TEXT NOT NULL,
+                id INTEGER NOT NULL,
+                time TIMESTAMP NOT NULL,
+                message TEXT NOT NULL,
+                PRIMARY KEY (job_id, id),
+                FOREIGN KEY (job_id) REFERENCES sync_jobs(id)
+            )
+        ''')
+        
+        # Кэш данных каналов YouTube (состояние RSS-ленты, подписка WebSub)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS channel_cache (
+                youtube_channel_id TEXT PRIMARY KEY,
+                feed_etag TEXT,
+                feed_last_modified TEXT,
+                feed_checked_at TIMESTAMP,
+                websub_requested_at TIMESTAMP,
+                websub_lease_expires_at TIMESTAMP
+            )
+        ''')
+        
         conn.commit()
         conn.close()
     
@@ -215,6 +400,138 @@ class Database:
         conn.close()
         return subscriptions
     
+    def get_active_youtube_channel_ids(self) -> List[str]:
+        """Получение ID всех каналов YouTube с активными подписками"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT DISTINCT youtube_channel_id FROM subscriptions 
+            WHERE is_active = 1 AND deleted_by_user = 0
+            ORDER BY youtube_channel_id
+        ''')
+        
+        channel_ids = [row['youtube_channel_id'] for row in cursor.fetchall()]
+        conn.close()
+        return channel_ids
+    
+    def get_active_subscriptions_by_youtube_channel(
+            self, youtube_channel_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Получение активных подписок (всех личных каналов) на каналы YouTube"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        subscriptions = {channel_id: [] for channel_id in youtube_channel_ids}
+        
+        for chunk in _chunks(youtube_channel_ids):
+            cursor.execute(f'''
+                SELECT * FROM subscriptions 
+                WHERE is_active = 1 AND deleted_by_user = 0
+                  AND youtube_channel_id IN ({','.join('?' * len(chunk))})
+            ''', chunk)
+            
+            for row in cursor.fetchall():
+                subscriptions[row['youtube_channel_id']].append(dict(row))
+        
+        conn.close()
+        return subscriptions
+    
+    def update_poll_schedule(self, schedule: List[Tuple[int, Optional[int], str]]):
+        """
+        Сохранение интервала загрузок и времени следующего опроса подписок
+        
+        Args:
+            schedule: Кортежи (subscription_id, upload_interval_seconds, next_video_sync_at)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            UPDATE subscriptions 
+            SET upload_interval_seconds = ?, next_video_sync_at = ? 
+            WHERE id = ?
+        ''', [(interval, next_sync_at, subscription_id)
+              for subscription_id, interval, next_sync_at in schedule])
+        
+        conn.commit()
+        conn.close()
+    
+    def update_circuit_state(self, updates: List[Tuple[int, int, Optional[str], Optional[str]]]):
+        """
+        Сохранение счётчика неудачных загрузок и блокировки подписок
+        
+        Args:
+            updates: Кортежи (subscription_id, failure_count, circuit_open_until,
+                last_failure_type) из circuit_breaker.record_failure/record_success
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        # При успешной загрузке время и тип последней ошибки сохраняются для истории
+        cursor.executemany('''
+            UPDATE subscriptions 
+            SET failure_count = ?, circuit_open_until = ?, 
+                last_failure_type = COALESCE(?, last_failure_type), 
+                last_failure_at = CASE WHEN ? > 0 THEN ? ELSE last_failure_at END 
+            WHERE id = ?
+        ''', [(failures, open_until, error_type, failures, now, subscription_id)
+              for subscription_id, failures, open_until, error_type in updates])
+        
+        conn.commit()
+        conn.close()
+    
+    def get_tripped_subscriptions(self) -> List[Dict]:
+        """
+        Получение активных подписок с открытой блокировкой (circuit breaker)
+        
+        Returns:
+            Подписки с полями personal_channel_name, failure_count, circuit_open_until,
+            last_failure_type и last_failure_at; раньше всех разблокируемые первыми
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT s.*, pc.name AS personal_channel_name 
+            FROM subscriptions s 
+            JOIN personal_channels pc ON pc.id = s.personal_channel_id 
+            WHERE s.circuit_open_until IS NOT NULL 
+              AND s.is_active = 1 AND s.deleted_by_user = 0
+            ORDER BY s.circuit_open_until
+        ''')
+        
+        subscriptions = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return subscriptions
+    
+    def reset_circuit(self, subscription_id: Optional[int] = None) -> int:
+        """
+        Снятие блокировки подписки (или всех подписок)
+        
+        Returns:
+            Количество разблокированных подписок
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        query = '''
+            UPDATE subscriptions 
+            SET failure_count = 0, circuit_open_until = NULL 
+            WHERE circuit_open_until IS NOT NULL
+        '''
+        params = ()
+        if subscription_id is not None:
+            query += ' AND id = ?'
+            params = (subscription_id,)
+        
+        cursor.execute(query, params)
+        count = cursor.rowcount
+        
+        conn.commit()
+        conn.close()
+        return count
+    
     def deactivate_subscription(self, subscription_id: int):
         """Деактивировать подписку и удалить её видео"""
         conn = self.get_connection()
@@ -276,46 +593,166 @@ class Database:
         Returns:
             Статистика: {'activated': int, 'deactivated': int, 'unchanged': int}
         """
+        current = set(current_youtube_ids)
+        # Новые подписки не добавляются: обновляется только статус известных
+        known = [{'channel_id': sub['youtube_channel_id'], 'channel_name': sub['channel_name'],
+                  'thumbnail': sub['channel_thumbnail']}
+                 for sub in self.get_subscriptions_by_channel(personal_channel_id,
+                                                              include_inactive=True)
+                 if sub['youtube_channel_id'] in current]
+        
+        stats = self.upsert_subscriptions(personal_channel_id, known)
+        return {
+            'activated': stats['activated'],
+            'deactivated': self.deactivate_missing_subscriptions(personal_channel_id, current),
+            'unchanged': stats['unchanged']
+        }
+    
+    def upsert_subscriptions(self, personal_channel_id: int,
+                             subscriptions: List[Dict]) -> Dict:
+        """
+        Сохранение страницы подписок из API одной транзакцией
+        
+        Новые подписки добавляются, неактивные реактивируются, удалённые
+        пользователем не трогаются.
+        
+        Args:
+            personal_channel_id: ID личного канала
+            subscriptions: Подписки из YouTubeAPI.iter_subscriptions()
+            
+        Returns:
+            Статистика: {'added': int, 'activated': int, 'unchanged': int}
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        stats = {'activated': 0, 'deactivated': 0, 'unchanged': 0}
+        stats = {'added': 0, 'activated': 0, 'unchanged': 0}
+        existing = {}
         
-        # Получаем текущие подписки из БД
-        cursor.execute('''
-            SELECT id, youtube_channel_id, is_active 
-            FROM subscriptions 
-            WHERE personal_channel_id = ? AND deleted_by_user = 0
-        ''', (personal_channel_id,))
+        for chunk in _chunks([sub['channel_id'] for sub in subscriptions]):
+            cursor.execute(f'''
+                SELECT id, youtube_channel_id, is_active, deleted_by_user 
+                FROM subscriptions 
+                WHERE personal_channel_id = ? 
+                  AND youtube_channel_id IN ({','.join('?' * len(chunk))})
+            ''', [personal_channel_id] + chunk)
+            existing.update({row['youtube_channel_id']: row for row in cursor.fetchall()})
         
-        db_subscriptions = {row['youtube_channel_id']: row for row in cursor.fetchall()}
-        
-        # Проверяем каждую подписку из БД
-        for yt_id, sub in db_subscriptions.items():
-            if yt_id in current_youtube_ids:
-                # Подписка активна на YouTube
-                if not sub['is_active']:
-                    # Реактивируем
-                    self.reactivate_subscription(sub['id'])
-                    stats['activated'] += 1
-                else:
-                    stats['unchanged'] += 1
+        for sub in subscriptions:
+            row = existing.get(sub['channel_id'])
+            
+            if row is None:
+                cursor.execute('''
+                    INSERT OR IGNORE INTO subscriptions 
+                    (personal_channel_id, youtube_channel_id, channel_name, channel_thumbnail)
+                    VALUES (?, ?, ?, ?)
+                ''', (personal_channel_id, sub['channel_id'], sub['channel_name'],
+                      sub.get('thumbnail')))
+                stats['added'] += cursor.rowcount
+            elif row['deleted_by_user']:
+                continue
+            elif not row['is_active']:
+                cursor.execute('''
+                    UPDATE subscriptions 
+                    SET is_active = 1, deactivated_at = NULL 
+                    WHERE id = ?
+                ''', (row['id'],))
+                stats['activated'] += 1
             else:
-                # Подписка пропала из YouTube
-                if sub['is_active']:
-                    # Деактивируем
-                    self.deactivate_subscription(sub['id'])
-                    stats['deactivated'] += 1
+                stats['unchanged'] += 1
         
+        conn.commit()
         conn.close()
         return stats
     
+    def deactivate_missing_subscriptions(self, personal_channel_id: int,
+                                         current_youtube_ids: Set[str]) -> int:
+        """
+        Деактивация подписок, которых нет в полном списке из API, и удаление их видео
+        
+        Returns:
+            Количество деактивированных подписок
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id, youtube_channel_id FROM subscriptions 
+            WHERE personal_channel_id = ? AND is_active = 1 AND deleted_by_user = 0
+        ''', (personal_channel_id,))
+        
+        missing = [row['id'] for row in cursor.fetchall()
+                   if row['youtube_channel_id'] not in current_youtube_ids]
+        now = datetime.now().isoformat()
+        
+        for chunk in _chunks(missing):
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'''
+                UPDATE subscriptions 
+                SET is_active = 0, deactivated_at = ? 
+                WHERE id IN ({placeholders})
+            ''', [now] + chunk)
+            cursor.execute(f'''
+                DELETE FROM videos 
+                WHERE subscription_id IN ({placeholders})
+            ''', chunk)
+        
+        conn.commit()
+        conn.close()
+        return len(missing)
+    
+    def get_subscription_sync_state(self, personal_channel_id: int) -> Optional[Dict]:
+        """
+        Получение снимка последней синхронизации подписок
+        
+        Returns:
+            {'subscriptions_hash': str, 'pages': [...], 'synced_at': str} или None
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT subscriptions_hash, pages, synced_at 
+            FROM subscription_sync_state 
+            WHERE personal_channel_id = ?
+        ''', (personal_channel_id,))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row is None:
+            return None
+        
+        state = dict(row)
+        state['pages'] = json.loads(state['pages']) if state['pages'] else []
+        return state
+    
+    def save_subscription_sync_state(self, personal_channel_id: int,
+                                     subscriptions_hash: str, pages: List[Dict]):
+        """Сохранение снимка синхронизации подписок"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO subscription_sync_state 
+            (personal_channel_id, subscriptions_hash, pages, synced_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(personal_channel_id) DO UPDATE SET
+                subscriptions_hash = excluded.subscriptions_hash,
+                pages = excluded.pages,
+                synced_at = excluded.synced_at
+        ''', (personal_channel_id, subscriptions_hash, json.dumps(pages),
+              datetime.now().isoformat()))
+        
+        conn.commit()
+        conn.close()
+    
     # === Videos ===
     
     def add_video(self, subscription_id: int, youtube_video_id: str,
                   title: str, thumbnail: str, published_at: str,
                   duration: str = None, description: str = None,
-                  view_count: int = None) -> Optional[int]:
+                  view_count: int = None, duration_seconds: int = None) -> Optional[int]:
         """Добавление нового видео"""
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -324,10 +761,10 @@ class Database:
             cursor.execute('''
                 INSERT INTO videos 
                 (subscription_id, youtube_video_id, title, description, thumbnail, 
-                 published_at, duration, view_count)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                 published_at, duration, duration_seconds, view_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (subscription_id, youtube_video_id, title, description, 
-                  thumbnail, published_at, duration, view_count))
+                  thumbnail, published_at, duration, duration_seconds, view_count))
             
             video_id = cursor.lastrowid
             conn.commit()
@@ -338,9 +775,67 @@ class Database:
             conn.close()
             return None
     
+    def save_videos_batch(self, videos: List[Dict], synced_ids: Iterable[int] = (),
+                          feed_states: Iterable[Tuple[str, Optional[str], Optional[str]]] = ()
+                          ) -> Dict[int, int]:
+        """
+        Сохранение пакета видео и отметок синхронизации одной транзакцией
+        
+        Args:
+            videos: Словари с полями add_video (subscription_id, youtube_video_id, ...)
+            synced_ids: ID подписок, для которых обновляется last_video_sync_at
+            feed_states: Кортежи (youtube_channel_id, etag, last_modified) RSS-лент
+        
+        Returns:
+            {subscription_id: количество новых видео}
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        new_counts: Dict[int, int] = {}
+        
+        for video in videos:
+            cursor.execute('''
+                INSERT OR IGNORE INTO videos 
+                (subscription_id, youtube_video_id, title, description, thumbnail, 
+                 published_at, duration, duration_seconds, view_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (video['subscription_id'], video['youtube_video_id'], video['title'],
+                  video.get('description'), video['thumbnail'], video['published_at'],
+                  video.get('duration'), video.get('duration_seconds'), video.get('view_count')))
+            
+            if cursor.rowcount:
+                new_counts[video['subscription_id']] = new_counts.get(video['subscription_id'], 0) + 1
+        
+        synced_at = datetime.now().isoformat()
+        cursor.executemany('''
+            UPDATE subscriptions SET last_video_sync_at = ? WHERE id = ?
+        ''', [(synced_at, subscription_id) for subscription_id in synced_ids])
+        
+        cursor.executemany('''
+            INSERT INTO channel_cache 
+            (youtube_channel_id, feed_etag, feed_last_modified, feed_checked_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(youtube_channel_id) DO UPDATE SET
+                feed_etag = excluded.feed_etag,
+                feed_last_modified = excluded.feed_last_modified,
+                feed_checked_at = excluded.feed_checked_at
+        ''', [(channel_id, etag, last_modified, synced_at)
+              for channel_id, etag, last_modified in feed_states])
+        
+        conn.commit()
+        conn.close()
+        return new_counts
+    
     def get_videos_by_personal_channel(self, personal_channel_id: int, 
-                                       include_watched: bool = True) -> List[Dict]:
-        """Получение всех видео для личного канала (только с активных подписок)"""
+                                       include_watched: bool = True,
+                                       min_duration: Optional[int] = None,
+                                       max_duration: Optional[int] = None) -> List[Dict]:
+        """
+        Получение всех видео для личного канала (только с активных подписок)
+        
+        min_duration/max_duration (в секундах, включительно) отбирают видео по
+        длительности; трансляции (duration_seconds = NULL) при этом исключаются.
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -354,17 +849,106 @@ class Database:
               AND s.deleted_by_user = 0
         '''
         
+        params = [personal_channel_id]
+        
         if not include_watched:
             query += ' AND v.is_watched = 0'
         
+        if min_duration is not None:
+            query += ' AND v.duration_seconds >= ?'
+            params.append(min_duration)
+        
+        if max_duration is not None:
+            query += ' AND v.duration_seconds <= ?'
+            params.append(max_duration)
+        
         query += ' ORDER BY v.published_at DESC'
         
-        cursor.execute(query, (personal_channel_id,))
+        cursor.execute(query, params)
         
         videos = [dict(row) for row in cursor.fetchall()]
         conn.close()
         return videos
     
+    def get_video_ids_by_subscription(self, subscription_ids: List[int]) -> Dict[int, Set[str]]:
+        """Получение YouTube ID уже сохранённых видео для подписок"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        video_ids = {subscription_id: set() for subscription_id in subscription_ids}
+        
+        for chunk in _chunks(subscription_ids):
+            cursor.execute(f'''
+                SELECT subscription_id, youtube_video_id FROM videos 
+                WHERE subscription_id IN ({','.join('?' * len(chunk))})
+            ''', chunk)
+            
+            for row in cursor.fetchall():
+                video_ids[row['subscription_id']].add(row['youtube_video_id'])
+        
+        conn.close()
+        return video_ids
+    
+    def get_publish_history(self, subscription_ids: List[int],
+                            limit: int = 10) -> Dict[int, List[str]]:
+        """Получение дат публикации последних видео подписок (новые первыми)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        history = {subscription_id: [] for subscription_id in subscription_ids}
+        
+        for chunk in _chunks(subscription_ids):
+            cursor.execute(f'''
+                SELECT subscription_id, published_at FROM (
+                    SELECT subscription_id, published_at,
+                           ROW_NUMBER() OVER (
+                               PARTITION BY subscription_id ORDER BY published_at DESC
+                           ) AS position
+                    FROM videos 
+                    WHERE subscription_id IN ({','.join('?' * len(chunk))})
+                )
+                WHERE position <= ?
+                ORDER BY subscription_id, published_at DESC
+            ''', [*chunk, limit])
+            
+            for row in cursor.fetchall():
+                history[row['subscription_id']].append(row['published_at'])
+        
+        conn.close()
+        return history
+    
+    def get_engagement_stats(self, subscription_ids: List[int]) -> Dict[int, Dict]:
+        """
+        Получение статистики просмотров подписок
+        
+        Returns:
+            {subscription_id: {'videos': n, 'watched': n, 'last_watched_at': str|None}}
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        stats = {subscription_id: {'videos': 0, 'watched': 0, 'last_watched_at': None}
+                 for subscription_id in subscription_ids}
+        
+        for chunk in _chunks(subscription_ids):
+            cursor.execute(f'''
+                SELECT subscription_id,
+                       COUNT(*) AS videos,
+                       SUM(is_watched) AS watched,
+                       MAX(watched_at) AS last_watched_at
+                FROM videos 
+                WHERE subscription_id IN ({','.join('?' * len(chunk))})
+                GROUP BY subscription_id
+            ''', chunk)
+            
+            for row in cursor.fetchall():
+                stats[row['subscription_id']] = {'videos': row['videos'],
+                                                 'watched': row['watched'] or 0,
+                                                 'last_watched_at': row['last_watched_at']}
+        
+        conn.close()
+        return stats
+    
     def mark_video_watched(self, video_id: int):
         """Отметить видео как просмотренное"""
         conn = self.get_connection()
@@ -479,4 +1063,487 @@ class Database:
         ''', (days,))
         
         conn.commit()
-        conn.close()
\ No newline at end of file
+        conn.close()
+    
+    # === Channel Cache ===
+    
+    def get_channel_cache(self, youtube_channel_ids: List[str]) -> Dict[str, Dict]:
+        """Получение кэша для каналов YouTube"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cache = {}
+        
+        for chunk in _chunks(youtube_channel_ids):
+            cursor.execute(f'''
+                SELECT * FROM channel_cache 
+                WHERE youtube_channel_id IN ({','.join('?' * len(chunk))})
+            ''', chunk)
+            
+            for row in cursor.fetchall():
+                cache[row['youtube_channel_id']] = dict(row)
+        
+        conn.close()
+        return cache
+    
+    def get_websub_leases(self) -> Dict[str, Dict]:
+        """Получение состояния подписок WebSub по каналам YouTube"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT youtube_channel_id, websub_requested_at, websub_lease_expires_at 
+            FROM channel_cache 
+            WHERE websub_requested_at IS NOT NULL OR websub_lease_expires_at IS NOT NULL
+        ''')
+        
+        leases = {row['youtube_channel_id']: dict(row) for row in cursor.fetchall()}
+        conn.close()
+        return leases
+    
+    def mark_websub_requested(self, youtube_channel_id: str):
+        """Отметить отправку запроса подписки WebSub"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO channel_cache (youtube_channel_id, websub_requested_at)
+            VALUES (?, ?)
+            ON CONFLICT(youtube_channel_id) DO UPDATE SET
+                websub_requested_at = excluded.websub_requested_at
+        ''', (youtube_channel_id, datetime.now().isoformat()))
+        
+        conn.commit()
+        conn.close()
+    
+    def update_websub_lease(self, youtube_channel_id: str, lease_expires_at: Optional[str]):
+        """Сохранение срока подписки WebSub (None - подписка снята)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO channel_cache (youtube_channel_id, websub_lease_expires_at)
+            VALUES (?, ?)
+            ON CONFLICT(youtube_channel_id) DO UPDATE SET
+                websub_requested_at = NULL,
+                websub_lease_expires_at = excluded.websub_lease_expires_at
+        ''', (youtube_channel_id, lease_expires_at))
+        
+        conn.commit()
+        conn.close()
+    
+    # === API Quota ===
+    
+    def record_quota_usage(self, project_id: str, usage_date: str,
+                           usage: Dict[str, Tuple[int, int]]):
+        """
+        Добавление расхода квоты
+        
+        Args:
+            project_id: ID проекта Google Cloud
+            usage_date: День квоты (YYYY-MM-DD, по тихоокеанскому времени)
+            usage: {endpoint: (calls, units)}
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.executemany('''
+            INSERT INTO quota_usage (project_id, usage_date, endpoint, calls, units)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(project_id, usage_date, endpoint) DO UPDATE SET
+                calls = calls + excluded.calls,
+                units = units + excluded.units,
+                updated_at = CURRENT_TIMESTAMP
+        ''', [(project_id, usage_date, endpoint, calls, units)
+              for endpoint, (calls, units) in usage.items()])
+        
+        conn.commit()
+        conn.close()
+    
+    def get_quota_usage(self, project_id: str, usage_date: str) -> List[Dict]:
+        """Получение расхода квоты по endpoint'ам за день"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT endpoint, calls, units FROM quota_usage 
+            WHERE project_id = ? AND usage_date = ?
+            ORDER BY units DESC
+        ''', (project_id, usage_date))
+        
+        usage = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return usage
+    
+    def get_quota_used(self, project_id: str, usage_date: str) -> int:
+        """Сколько единиц квоты потрачено за день"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COALESCE(SUM(units), 0) FROM quota_usage 
+            WHERE project_id = ? AND usage_date = ?
+        ''', (project_id, usage_date))
+        
+        used = cursor.fetchone()[0]
+        conn.close()
+        return used
+    
+    # === Sync Runs ===
+    
+    def start_sync_run(self, kind: str = 'videos', planned: int = 0) -> int:
+        """Запись о начале синхронизации, возвращает ID запуска"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO sync_runs (kind, status, started_at, planned)
+            VALUES (?, 'running', ?, ?)
+        ''', (kind, datetime.now().isoformat(), planned))
+        
+        run_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        return run_id
+    
+    def get_resumable_sync_run(self, kind: str = 'videos') -> Optional[Dict]:
+        """
+        Получение последнего незавершённого запуска (прерван, упал или
+        остался в статусе running после аварийного завершения)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT * FROM sync_runs 
+            WHERE kind = ? 
+            ORDER BY id DESC LIMIT 1
+        ''', (kind,))
+        
+        row = cursor.fetchone()
+        conn.close()
+        
+        if row is None or row['status'] == 'completed':
+            return None
+        return dict(row)
+    
+    def resume_sync_run(self, run_id: int, planned: int):
+        """Продолжение прерванного запуска"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE sync_runs 
+            SET status = 'running', finished_at = NULL, planned = processed + ?,
+                resumed_count = resumed_count + 1
+            WHERE id = ?
+        ''', (planned, run_id))
+        
+        conn.commit()
+        conn.close()
+    
+    def update_sync_run_progress(self, run_id: int, processed: int):
+        """
+        Сохранение прогресса запуска
+        
+        Args:
+            processed: Сколько каналов обработано за запуск
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE sync_runs SET processed = ? WHERE id = ?
+        ''', (processed, run_id))
+        
+        conn.commit()
+        conn.close()
+    
+    def finish_sync_run(self, run_id: int, status: str, stats: Optional[Dict] = None):
+        """
+        Завершение запуска: completed, interrupted или failed
+        
+        Args:
+            stats: Итоги запуска (прибавляются к итогам продолжаемого запуска):
+                api_calls ({endpoint: вызовы}), quota_units, new_videos,
+                subscriptions_added, subscriptions_activated,
+                subscriptions_deactivated, errors и accounts
+                ({personal_channel_id: {'name', 'seconds', ...}})
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM sync_runs WHERE id = ?', (run_id,))
+        run = dict(cursor.fetchone())
+        stats = stats or {}
+        
+        api_calls = json.loads(run['api_calls']) if run['api_calls'] else {}
+        for endpoint, calls in stats.get('api_calls', {}).items():
+            api_calls[endpoint] = api_calls.get(endpoint, 0) + calls
+        
+        accounts = json.loads(run['accounts']) if run['accounts'] else {}
+        for channel_id, account in stats.get('accounts', {}).items():
+            previous = accounts.get(str(channel_id), {})
+            accounts[str(channel_id)] = {
+                key: previous.get(key, 0) + value if isinstance(value, (int, float)) else value
+                for key, value in account.items()
+            }
+        
+        totals = {key: (run[key] or 0) + stats.get(key, 0) for key in SYNC_RUN_TOTALS}
+        
+        cursor.execute(f'''
+            UPDATE sync_runs 
+            SET status = ?, finished_at = ?, api_calls = ?, accounts = ?,
+                {', '.join(f'{key} = ?' for key in SYNC_RUN_TOTALS)}
+            WHERE id = ?
+        ''', (status, datetime.now().isoformat(), json.dumps(api_calls), json.dumps(accounts),
+              *totals.values(), run_id))
+        
+        conn.commit()
+        conn.close()
+    
+    def get_sync_runs(self, limit: int = 50, kind: Optional[str] = None) -> List[Dict]:
+        """
+        Получение последних запусков синхронизации (новые первыми)
+        
+        Args:
+            kind: 'videos' или 'subscriptions'; включает запуски отдельных
+                аккаунтов ('videos:1,2' при --parallel-accounts)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        query = 'SELECT * FROM sync_runs'
+        params = []
+        
+        if kind:
+            query += " WHERE kind = ? OR kind LIKE ? || ':%'"
+            params.extend([kind, kind])
+        
+        query += ' ORDER BY id DESC LIMIT ?'
+        params.append(limit)
+        
+        cursor.execute(query, params)
+        rows = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        for run in rows:
+            for key in ('api_calls', 'accounts'):
+                run[key] = json.loads(run[key]) if run[key] else {}
+            run['duration_seconds'] = None
+            if run['finished_at']:
+                run['duration_seconds'] = round((
+                    datetime.fromisoformat(run['finished_at'])
+                    - datetime.fromisoformat(run['started_at'])).total_seconds(), 3)
+        
+        return rows
+    
+    # === Sync Jobs ===
+    
+    @staticmethod
+    def _sync_job_row(row) -> Dict:
+        job = dict(row)
+        job['options'] = json.loads(job['options'])
+        return job
+    
+    def add_sync_job(self, job_id: str, options: Dict, joins: Callable[[Dict], bool],
+                     history: int) -> Tuple[Dict, bool]:
+        """
+        Постановка синхронизации в очередь или присоединение к ожидающей или
+        идущей задаче, одной транзакцией для всех процессов
+        
+        Args:
+            joins: Проверка, выполняет ли задача с такими параметрами этот запрос
+            history: Сколько завершённых задач хранить
+            
+        Returns:
+            (задача, создана ли новая)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # Блокировка записи до чтения: другой процесс не добавит такую же задачу
+        cursor.execute('BEGIN IMMEDIATE')
+        
+        cursor.execute('''
+            SELECT * FROM sync_jobs 
+            WHERE status IN ('queued', 'running') 
+            ORDER BY created_at, rowid
+        ''')
+        for row in cursor.fetchall():
+            job = self._sync_job_row(row)
+            if joins(job['options']):
+                cursor.execute('''
+                    UPDATE sync_jobs SET requests = requests + 1 WHERE id = ?
+                ''', (job['id'],))
+                job['requests'] += 1
+                conn.commit()
+                conn.close()
+                return job, False
+        
+        cursor.execute('''
+            INSERT INTO sync_jobs (id, options, status, created_at)
+            VALUES (?, ?, 'queued', ?)
+        ''', (job_id, json.dumps(options), datetime.now().isoformat()))
+        
+        # Старые завершённые задачи удаляются вместе с журналами
+        cursor.execute('''
+            SELECT id FROM sync_jobs 
+            WHERE status NOT IN ('queued', 'running') 
+            ORDER BY created_at DESC, rowid DESC LIMIT -1 OFFSET ?
+        ''', (history,))
+        forgotten = [row['id'] for row in cursor.fetchall()]
+        for chunk in _chunks(forgotten):
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'DELETE FROM sync_job_events WHERE job_id IN ({placeholders})', chunk)
+            cursor.execute(f'DELETE FROM sync_jobs WHERE id IN ({placeholders})', chunk)
+        
+        cursor.execute('SELECT * FROM sync_jobs WHERE id = ?', (job_id,))
+        job = self._sync_job_row(cursor.fetchone())
+        conn.commit()
+        conn.close()
+        return job, True
+    
+    def claim_sync_job(self, stale_before: str, stale_error: str) -> Optional[Dict]:
+        """
+        Запуск самой старой задачи из очереди, если никакая не выполняется
+        
+        Задача, процесс которой не отмечался с stale_before (упал или был
+        остановлен), завершается с ошибкой stale_error.
+        
+        Returns:
+            Запущенная задача или None
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('BEGIN IMMEDIATE')
+        now = datetime.now().isoformat()
+        
+        cursor.execute('''
+            UPDATE sync_jobs 
+            SET status = 'failed', finished_at = ?, error = ? 
+            WHERE status = 'running' AND heartbeat_at < ?
+        ''', (now, stale_error, stale_before))
+        
+        cursor.execute('''
+            SELECT * FROM sync_jobs 
+            WHERE status = 'queued' 
+              AND NOT EXISTS (SELECT 1 FROM sync_jobs WHERE status = 'running')
+            ORDER BY created_at, rowid LIMIT 1
+        ''')
+        row = cursor.fetchone()
+        
+        job = None
+        if row is not None:
+            cursor.execute('''
+                UPDATE sync_jobs 
+                SET status = 'running', started_at = ?, heartbeat_at = ? 
+                WHERE id = ?
+            ''', (now, now, row['id']))
+            job = self._sync_job_row(row)
+            job.update(status='running', started_at=now, heartbeat_at=now)
+        
+        conn.commit()
+        conn.close()
+        return job
+    
+    def touch_sync_job(self, job_id: str):
+        """Отметка о том, что процесс задачи ещё работает"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE sync_jobs SET heartbeat_at = ? WHERE id = ?
+        ''', (datetime.now().isoformat(), job_id))
+        
+        conn.commit()
+        conn.close()
+    
+    def finish_sync_job(self, job_id: str, status: str, error: Optional[str] = None):
+        """Завершение задачи: completed или failed"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            UPDATE sync_jobs 
+            SET status = ?, finished_at = ?, error = ? 
+            WHERE id = ?
+        ''', (status, datetime.now().isoformat(), error, job_id))
+        
+        conn.commit()
+        conn.close()
+    
+    def add_sync_job_event(self, job_id: str, event_id: int, message: str):
+        """Добавление строки в журнал задачи"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            INSERT INTO sync_job_events (job_id, id, time, message)
+            VALUES (?, ?, ?, ?)
+        ''', (job_id, event_id, datetime.now().isoformat(), message))
+        
+        conn.commit()
+        conn.close()
+    
+    def get_sync_job(self, job_id: str) -> Optional[Dict]:
+        """Получение задачи по ID"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM sync_jobs WHERE id = ?', (job_id,))
+        row = cursor.fetchone()
+        conn.close()
+        
+        return self._sync_job_row(row) if row else None
+    
+    def get_sync_job_events(self, job_id: str, after: int = 0) -> List[Dict]:
+        """Получение строк журнала задачи после строки с номером after"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT id, time, message FROM sync_job_events 
+            WHERE job_id = ? AND id > ? 
+            ORDER BY id
+        ''', (job_id, after))
+        
+        events = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return events
+    
+    def get_active_sync_jobs(self) -> List[Dict]:
+        """Получение ожидающих и идущих задач (старые первыми)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT * FROM sync_jobs 
+            WHERE status IN ('queued', 'running') 
+            ORDER BY created_at, rowid
+        ''')
+        
+        jobs = [self._sync_job_row(row) for row in cursor.fetchall()]
+        conn.close()
+        return jobs
+    
+    def get_sync_job_stats(self) -> Dict:
+        """
+        Итоги по хранимым задачам
+        
+        Returns:
+            {'submitted': int, 'coalesced': int, 'completed': int, 'failed': int}
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT COALESCE(SUM(requests), 0) AS submitted, 
+                   COALESCE(SUM(requests - 1), 0) AS coalesced, 
+                   COUNT(CASE WHEN status = 'completed' THEN 1 END) AS completed, 
+                   COUNT(CASE WHEN status = 'failed' THEN 1 END) AS failed 
+            FROM sync_jobs
+        ''')
+        
+        stats = dict(cursor.fetchone())
+        conn.close()
+        return stats
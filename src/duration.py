@@ -0,0 +1,32 @@
+"""
+Parsing of the ISO 8601 video durations returned by the YouTube Data API.
+
+YouTube only uses the P#DT#H#M#S subset ("PT12M34S", "PT1H2S", "P0D" for
+live streams), which a single precompiled regex parses several times faster
+than isodate. Anything outside the subset is handed to isodate.
+"""
+
+import re
+
+import isodate
+
+
+_DURATION_RE = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+
+def parse_duration(value: str) -> int:
+    """
+    Converts an ISO 8601 duration to whole seconds.
+
+    Raises:
+        isodate.ISO8601Error: If the value is not a valid duration.
+    """
+    match = _DURATION_RE.fullmatch(value)
+    if match is None or value[-1] in 'PT':
+        return int(isodate.parse_duration(value).total_seconds())
+
+    days, hours, minutes, seconds = match.groups()
+    return ((int(days) * 86400 if days else 0)
+            + (int(hours) * 3600 if hours else 0)
+            + (int(minutes) * 60 if minutes else 0)
+            + (int(seconds) if seconds else 0))
@@ -0,0 +1,157 @@
+"""
+Adaptive polling intervals and priorities for video syncs.
+
+Every subscription learns its upload cadence from the publish dates of its
+stored videos. A channel that uploads hourly is polled again after minutes,
+one that uploads once a month after days, always within the configured
+minimum and maximum interval.
+
+Channels that are due are fetched in order of engagement (how much of a
+channel is watched, and how recently), so a run cut short by the quota
+budget still covers the channels that matter.
+"""
+
+import math
+from datetime import datetime, timedelta, timezone
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+
+HISTORY_SIZE = 10                       # latest uploads used to learn the cadence
+POLL_FRACTION = 0.25                    # polls per expected gap between uploads: 4
+DEFAULT_MIN_INTERVAL_MINUTES = 30
+DEFAULT_MAX_INTERVAL_HOURS = 7 * 24
+
+WATCH_RECENCY_DAYS = 14                 # decay time of the last watch
+AGING_PER_DAY = 0.1                     # priority gained per day without a sync
+
+
+def _parse_timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def estimate_upload_interval(published_dates: List[str],
+                             now: Optional[datetime] = None) -> Optional[int]:
+    """
+    Estimates the time between uploads of a channel.
+
+    The estimate is the median gap between the given uploads, but never less
+    than the time since the latest one, so a channel that went quiet is
+    polled less and less often.
+
+    Args:
+        published_dates: ISO 8601 publish dates of the latest uploads.
+        now: The current time (UTC).
+
+    Returns:
+        The interval in seconds, or None with fewer than two uploads.
+    """
+    if len(published_dates) < 2:
+        return None
+
+    now = now or datetime.now(timezone.utc)
+    dates = sorted((_parse_timestamp(value) for value in published_dates), reverse=True)
+    gaps = [(newer - older).total_seconds() for newer, older in zip(dates, dates[1:])]
+    since_latest = (now - dates[0]).total_seconds()
+
+    return int(max(median(gaps), since_latest, 0))
+
+
+def poll_interval(upload_interval: Optional[int], min_interval: int, max_interval: int) -> int:
+    """
+    Gets the polling interval for a learned upload interval (all in seconds).
+
+    Subscriptions without a learned interval are polled as often as allowed.
+    """
+    if upload_interval is None:
+        return min_interval
+    return int(min(max(upload_interval * POLL_FRACTION, min_interval), max_interval))
+
+
+def schedule_subscriptions(history: Dict[int, List[str]], min_interval: int, max_interval: int,
+                           now: Optional[datetime] = None) -> List[Tuple[int, Optional[int], str]]:
+    """
+    Computes the next poll of every subscription.
+
+    Args:
+        history: {subscription_id: [published_at, ...]}, latest uploads first.
+        min_interval: The minimum polling interval in seconds.
+        max_interval: The maximum polling interval in seconds.
+        now: The current local time (the format of last_video_sync_at).
+
+    Returns:
+        (subscription_id, upload_interval_seconds, next_video_sync_at) tuples.
+    """
+    now = now or datetime.now()
+    now_utc = now.astimezone(timezone.utc)
+    schedule = []
+
+    for subscription_id, published_dates in history.items():
+        upload_interval = estimate_upload_interval(published_dates, now_utc)
+        interval = poll_interval(upload_interval, min_interval, max_interval)
+        next_sync_at = now + timedelta(seconds=interval)
+        schedule.append((subscription_id, upload_interval, next_sync_at.isoformat()))
+
+    return schedule
+
+
+def split_due(targets: List[Dict], now: Optional[datetime] = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Splits fetch targets into those due for a poll and those that are not.
+
+    Targets without next_video_sync_at (new subscriptions) are always due.
+
+    Returns:
+        (due, not_due) lists of targets.
+    """
+    now_iso = (now or datetime.now()).isoformat()
+    due, not_due = [], []
+
+    for target in targets:
+        next_sync_at = target.get('next_video_sync_at')
+        (due if not next_sync_at or next_sync_at <= now_iso else not_due).append(target)
+
+    return due, not_due
+
+
+def engagement_score(stats: Dict, now: Optional[datetime] = None) -> float:
+    """
+    Scores how much a subscription is watched, from 0 to 1.
+
+    Half of the score is the share of stored videos that were watched
+    (smoothed, so a new subscription starts at 0.5), half decays with the
+    time since the last watched video.
+
+    Args:
+        stats: {'videos': n, 'watched': n, 'last_watched_at': str|None}
+            (see Database.get_engagement_stats).
+        now: The current local time (the format of watched_at).
+    """
+    watch_ratio = (stats['watched'] + 1) / (stats['videos'] + 2)
+
+    recency = 0.0
+    if stats['last_watched_at']:
+        days = ((now or datetime.now()) - datetime.fromisoformat(stats['last_watched_at'])
+                ).total_seconds() / 86400
+        recency = math.exp(-max(days, 0) / WATCH_RECENCY_DAYS)
+
+    return 0.5 * watch_ratio + 0.5 * recency
+
+
+def sync_priority(engagement: float, last_sync_at: Optional[str],
+                  now: Optional[datetime] = None) -> float:
+    """
+    Gets the sync priority of a fetch target (higher goes first).
+
+    Every day without a sync adds AGING_PER_DAY, so channels nobody watches
+    are still refreshed when the budget is always short. Targets that were
+    never synced go first.
+    """
+    if not last_sync_at:
+        return math.inf
+
+    days = ((now or datetime.now()) - datetime.fromisoformat(last_sync_at)).total_seconds() / 86400
+    return engagement + max(days, 0) * AGING_PER_DAY
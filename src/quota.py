@@ -0,0 +1,189 @@
+"""
+YouTube Data API quota accounting.
+
+Keeps a ledger of the units spent per Google Cloud project and quota day,
+and plans video syncs so that they fit into the configured daily budget.
+"""
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from zoneinfo import ZoneInfo
+    QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+except Exception:
+    # No tz database available (e.g. Windows without tzdata)
+    QUOTA_TIMEZONE = timezone(timedelta(hours=-8))
+
+
+# Unit cost of every endpoint used by YouTubeAPI
+QUOTA_COSTS = {
+    'channels.list': 1,
+    'subscriptions.list': 1,
+    'playlistItems.list': 1,
+    'videos.list': 1,
+}
+
+DEFAULT_DAILY_QUOTA = 10000
+
+# channels.list + playlistItems.list + videos.list
+VIDEO_SYNC_COST = 3
+
+# videos.list for a changed feed; an unchanged feed costs nothing
+FEED_SYNC_COST = 1
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    """
+    Returns the quota day (YYYY-MM-DD) for a moment in time.
+
+    The YouTube Data API quota resets at midnight Pacific Time.
+    """
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    return now.astimezone(QUOTA_TIMEZONE).strftime('%Y-%m-%d')
+
+
+def get_project_id(credentials_file: str) -> str:
+    """Gets the Google Cloud project ID from client_secrets.json."""
+    try:
+        with open(credentials_file, 'r', encoding='utf-8') as f:
+            secrets = json.load(f)
+    except (OSError, ValueError):
+        return 'default'
+
+    for section in ('installed', 'web'):
+        if section in secrets and secrets[section].get('project_id'):
+            return secrets[section]['project_id']
+    return 'default'
+
+
+class QuotaLedger:
+    """
+    Ledger of the API units spent by one project on the current quota day.
+
+    Calls are counted in memory and written to the database by flush(),
+    so recording a call never touches SQLite on the request path.
+    """
+
+    def __init__(self, db=None, project_id: str = 'default',
+                 daily_budget: int = DEFAULT_DAILY_QUOTA):
+        self.db = db
+        self.project_id = project_id
+        self.daily_budget = daily_budget
+        self._lock = threading.Lock()
+        self._day = quota_day()
+        self._stored_units = self._load_stored_units()
+        self._pending: Dict[str, List[int]] = {}
+        self._session: Dict[str, List[int]] = {}
+
+    def _load_stored_units(self) -> int:
+        if self.db is None:
+            return 0
+        return self.db.get_quota_used(self.project_id, self._day)
+
+    def _roll_day(self):
+        """Starts a new ledger day after the Pacific midnight reset."""
+        today = quota_day()
+        if today != self._day:
+            self._flush_locked()
+            self._day = today
+            self._stored_units = self._load_stored_units()
+
+    def record(self, endpoint: str, calls: int = 1):
+        """Records the cost of API calls to an endpoint."""
+        units = QUOTA_COSTS.get(endpoint, 1) * calls
+        with self._lock:
+            self._roll_day()
+            for totals in (self._pending, self._session):
+                entry = totals.setdefault(endpoint, [0, 0])
+                entry[0] += calls
+                entry[1] += units
+
+    def used_today(self) -> int:
+        """Units spent today, including calls not flushed yet."""
+        with self._lock:
+            self._roll_day()
+            return self._stored_units + sum(units for _, units in self._pending.values())
+
+    def remaining(self) -> int:
+        """Units left in today's budget."""
+        return max(self.daily_budget - self.used_today(), 0)
+
+    def can_afford(self, units: int) -> bool:
+        """Checks whether the budget still covers the given number of units."""
+        return self.remaining() >= units
+
+    def session_usage(self) -> Dict[str, Dict[str, int]]:
+        """Calls and units recorded by this ledger instance, per endpoint."""
+        with self._lock:
+            return {
+                endpoint: {'calls': calls, 'units': units}
+                for endpoint, (calls, units) in self._session.items()
+            }
+
+    def session_units(self) -> int:
+        """Total units recorded by this ledger instance."""
+        with self._lock:
+            return sum(units for _, units in self._session.values())
+
+    def session_calls(self) -> int:
+        """Total calls recorded by this ledger instance."""
+        with self._lock:
+            return sum(calls for calls, _ in self._session.values())
+
+    def reload(self):
+        """Re-reads today's usage from the database, e.g. after other processes spent units."""
+        with self._lock:
+            self._flush_locked()
+            self._day = quota_day()
+            self._stored_units = self._load_stored_units()
+
+    def flush(self):
+        """Writes pending usage to the database."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        if self.db is not None:
+            self.db.record_quota_usage(self.project_id, self._day, {
+                endpoint: (calls, units)
+                for endpoint, (calls, units) in self._pending.items()
+            })
+        self._stored_units += sum(units for _, units in self._pending.values())
+        self._pending = {}
+
+
+def video_sync_cost(fetch_strategy: str = 'api') -> int:
+    """Maximum units spent to refresh one channel with a video fetch strategy ('api' or 'rss')."""
+    return FEED_SYNC_COST if fetch_strategy == 'rss' else VIDEO_SYNC_COST
+
+
+def plan_video_sync(subscriptions: List[Dict], budget_units: int,
+                    cost_per_subscription: int = VIDEO_SYNC_COST) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Chooses the subscriptions to refresh within a quota budget.
+
+    Subscriptions with the highest 'priority' go first (see
+    polling.sync_priority); among equal priorities, the ones that have not
+    been refreshed for the longest time, so runs that are cut short by the
+    budget rotate through all of them.
+
+    Args:
+        subscriptions: Subscription rows from the database.
+        budget_units: Units available for this run.
+        cost_per_subscription: Maximum units spent per subscription
+            (see video_sync_cost()).
+
+    Returns:
+        (planned, deferred) lists of subscriptions.
+    """
+    ordered = sorted(subscriptions, key=lambda s: (-s.get('priority', 0),
+                                                   s.get('last_video_sync_at') or ''))
+    capacity = max(budget_units, 0) // cost_per_subscription
+    return ordered[:capacity], ordered[capacity:]
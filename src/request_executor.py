@@ -0,0 +1,269 @@
+"""
+Execution of YouTube Data API requests.
+
+Paces requests with a token bucket, retries transient failures with
+exponential backoff and jitter, and classifies errors by the structured
+reason returned by the API.
+"""
+
+import json
+import random
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+import isodate
+from googleapiclient.errors import HttpError
+
+
+DEFAULT_RATE_LIMIT = 10.0    # requests per second
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BASE_DELAY = 1.0     # seconds
+DEFAULT_MAX_DELAY = 32.0     # seconds
+
+NOT_MODIFIED = 304             # conditional request (If-None-Match) matched
+RETRYABLE_STATUSES = {500, 502, 503, 504}
+RETRYABLE_REASONS = {
+    'rateLimitExceeded',
+    'userRateLimitExceeded',
+    'backendError',
+    'internalError',
+}
+QUOTA_REASONS = {'quotaExceeded', 'dailyLimitExceeded'}
+NOT_FOUND_REASONS = {
+    'playlistNotFound',
+    'channelNotFound',
+    'notFound',
+    'playlistForbidden',
+}
+
+
+def get_error_reason(error: Exception) -> Optional[str]:
+    """
+    Gets the structured reason of an API error (e.g. 'quotaExceeded').
+
+    Returns:
+        The reason of the first error in the response, or None.
+    """
+    if not isinstance(error, HttpError):
+        return None
+
+    details = error.error_details
+    if not isinstance(details, list):
+        try:
+            data = json.loads(error.content.decode('utf-8'))
+            details = data['error'].get('errors') or []
+        except (ValueError, KeyError, TypeError, AttributeError):
+            details = []
+
+    for detail in details:
+        if isinstance(detail, dict) and detail.get('reason'):
+            return detail['reason']
+    return None
+
+
+def get_error_status(error: Exception) -> Optional[int]:
+    """Gets the HTTP status of an API error."""
+    if isinstance(error, HttpError):
+        return error.resp.status
+    return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Checks whether a failed request may succeed when repeated."""
+    if isinstance(error, HttpError):
+        return (get_error_status(error) in RETRYABLE_STATUSES
+                or get_error_reason(error) in RETRYABLE_REASONS)
+    return isinstance(error, (ConnectionError, TimeoutError, socket.timeout))
+
+
+def classify_error(error: Exception) -> str:
+    """
+    Maps an exception to the error type stored in sync_errors.
+
+    Returns:
+        One of QUOTA_EXCEEDED, PLAYLIST_NOT_FOUND, RATE_LIMITED, SERVER_ERROR,
+        DURATION_PARSE_ERROR or UNKNOWN.
+    """
+    if isinstance(error, HttpError):
+        reason = get_error_reason(error)
+        status = get_error_status(error)
+        if reason in QUOTA_REASONS:
+            return 'QUOTA_EXCEEDED'
+        if reason in NOT_FOUND_REASONS or status == 404:
+            return 'PLAYLIST_NOT_FOUND'
+        if reason in ('rateLimitExceeded', 'userRateLimitExceeded') or status == 429:
+            return 'RATE_LIMITED'
+        if status in RETRYABLE_STATUSES or reason in RETRYABLE_REASONS:
+            return 'SERVER_ERROR'
+        return 'UNKNOWN'
+
+    if isinstance(error, isodate.ISO8601Error):
+        return 'DURATION_PARSE_ERROR'
+    return 'UNKNOWN'
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Allows bursts of up to `capacity` requests and `rate` requests per second
+    on average.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Takes a token and returns how long the caller must wait for it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> float:
+        """
+        Waits until a request may be sent.
+
+        Returns:
+            The number of seconds spent waiting.
+        """
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class ApiMetrics:
+    """Thread-safe counters of requests, retries and throttle waits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.failures = 0
+            self.retries = 0
+            self.retry_wait_seconds = 0.0
+            self.throttle_waits = 0
+            self.throttle_wait_seconds = 0.0
+            self.errors_by_reason: Dict[str, int] = {}
+
+    def record_request(self, error: Optional[Exception] = None):
+        with self._lock:
+            self.requests += 1
+            if error is not None:
+                self.failures += 1
+                reason = get_error_reason(error) or type(error).__name__
+                self.errors_by_reason[reason] = self.errors_by_reason.get(reason, 0) + 1
+
+    def record_retry(self, delay: float):
+        with self._lock:
+            self.retries += 1
+            self.retry_wait_seconds += delay
+
+    def record_throttle(self, delay: float):
+        with self._lock:
+            self.throttle_waits += 1
+            self.throttle_wait_seconds += delay
+
+    def snapshot(self) -> Dict:
+        """Returns the current counters as a dictionary."""
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'failures': self.failures,
+                'retries': self.retries,
+                'retry_wait_seconds': round(self.retry_wait_seconds, 3),
+                'throttle_waits': self.throttle_waits,
+                'throttle_wait_seconds': round(self.throttle_wait_seconds, 3),
+                'errors_by_reason': dict(self.errors_by_reason),
+            }
+
+
+class RequestExecutor:
+    """
+    Executes API requests with rate limiting and retries.
+
+    One executor is shared by all clients of a process, so the rate limit
+    and the metrics cover every thread.
+    """
+
+    def __init__(self, rate_limiter: Optional[TokenBucket] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_delay: float = DEFAULT_BASE_DELAY,
+                 max_delay: float = DEFAULT_MAX_DELAY,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.metrics = ApiMetrics()
+        self._sleep = sleep
+
+    @classmethod
+    def from_config(cls, config: Dict) -> 'RequestExecutor':
+        """Creates an executor from settings.json values."""
+        rate = config.get('api_rate_limit_per_second', DEFAULT_RATE_LIMIT)
+        return cls(
+            rate_limiter=TokenBucket(rate) if rate else None,
+            max_retries=config.get('api_max_retries', DEFAULT_MAX_RETRIES),
+        )
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given retry attempt."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def execute(self, request, on_attempt: Optional[Callable[[], None]] = None) -> Dict:
+        """
+        Executes a request, retrying transient failures.
+
+        Args:
+            request: A googleapiclient HttpRequest.
+            on_attempt: Called after every attempt (e.g. to record quota cost).
+
+        Returns:
+            The API response.
+        """
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                waited = self.rate_limiter.acquire()
+                if waited > 0:
+                    self.metrics.record_throttle(waited)
+
+            try:
+                response = request.execute()
+            except Exception as e:
+                if get_error_status(e) == NOT_MODIFIED:
+                    # Not an error: the caller's cached copy is still valid
+                    self.metrics.record_request()
+                    raise
+                self.metrics.record_request(e)
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff_delay(attempt)
+                self.metrics.record_retry(delay)
+                self._sleep(delay)
+                attempt += 1
+            else:
+                self.metrics.record_request()
+                return response
+            finally:
+                if on_attempt is not None:
+                    on_attempt()
@@ -0,0 +1,106 @@
+"""
+Client for the public YouTube channel Atom feeds.
+
+Reading a feed costs no API quota, so it is used to detect new uploads
+before any Data API call is made.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+DEFAULT_FEED_URL = 'https://www.youtube.com/feeds/videos.xml'
+
+FEED_NAMESPACES = {
+    'atom': 'http://www.w3.org/2005/Atom',
+    'yt': 'http://www.youtube.com/xml/schemas/2015',
+}
+
+
+def parse_feed(content: bytes) -> List[Dict]:
+    """
+    Parses a channel Atom feed (or a WebSub notification).
+
+    Args:
+        content: The raw XML document.
+
+    Returns:
+        Entries, newest first, with video_id, channel_id, title and published_at.
+    """
+    root = ET.fromstring(content)
+    entries = []
+
+    for entry in root.findall('atom:entry', FEED_NAMESPACES):
+        video_id = entry.findtext('yt:videoId', namespaces=FEED_NAMESPACES)
+        if not video_id:
+            continue
+        entries.append({
+            'video_id': video_id,
+            'channel_id': entry.findtext('yt:channelId', namespaces=FEED_NAMESPACES),
+            'title': entry.findtext('atom:title', default='', namespaces=FEED_NAMESPACES),
+            'published_at': entry.findtext('atom:published', namespaces=FEED_NAMESPACES),
+        })
+
+    return entries
+
+
+class FeedClient:
+    """
+    Polls channel feeds with conditional GETs over a shared keep-alive
+    connection pool. Safe to use from several worker threads.
+    """
+
+    def __init__(self, base_url: str = DEFAULT_FEED_URL, timeout: float = 10.0,
+                 pool_size: int = 10, session: Optional[requests.Session] = None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def fetch(self, channel_id: str, etag: Optional[str] = None,
+              last_modified: Optional[str] = None) -> Dict:
+        """
+        Fetches the feed of a channel.
+
+        Args:
+            channel_id: The YouTube channel ID.
+            etag: The ETag of the previous response.
+            last_modified: The Last-Modified header of the previous response.
+
+        Returns:
+            {'modified': bool, 'entries': [...], 'etag': str, 'last_modified': str}
+
+        Raises:
+            requests.RequestException: If the feed cannot be read.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+
+        response = self.session.get(self.base_url, params={'channel_id': channel_id},
+                                    headers=headers, timeout=self.timeout)
+
+        if response.status_code == 304:
+            return {'modified': False, 'entries': [], 'etag': etag,
+                    'last_modified': last_modified}
+
+        response.raise_for_status()
+
+        return {
+            'modified': True,
+            'entries': parse_feed(response.content),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+
+    def close(self):
+        """Closes the pooled connections."""
+        self.session.close()
@@ -0,0 +1,189 @@
+"""
+Scheduler for running synchronization in the background.
+
+SyncDaemon runs a job every `interval` seconds on a fixed grid measured
+from its start, so run times do not drift however long each run takes;
+ticks missed by an overrunning run are skipped rather than run back to
+back. A random jitter is added to every tick (not accumulated), and a
+file lock keeps separate processes (e.g. the daemon and a manual run)
+from syncing at the same time.
+"""
+
+import logging
+import math
+import os
+import random
+import signal
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:     # Windows
+    fcntl = None
+    import msvcrt
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCK_FILE = 'database/sync.lock'
+DEFAULT_JITTER_SECONDS = 60
+
+
+class RunLock:
+    """
+    Exclusive, non-blocking lock on a file, released when the process exits.
+    """
+
+    def __init__(self, path: str = DEFAULT_LOCK_FILE):
+        self.path = path
+        self._file = None
+
+    def acquire(self) -> bool:
+        """
+        Takes the lock.
+
+        Returns:
+            False if another process (or RunLock) holds it.
+        """
+        if self._file is not None:
+            return True
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        lock_file = open(self.path, 'a+')
+
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self._file = lock_file
+        return True
+
+    def release(self):
+        """Releases the lock."""
+        if self._file is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class SyncDaemon:
+    """
+    Runs a job on a drift-free schedule until stopped.
+
+    Args:
+        job: The function to run; exceptions are logged and do not stop the daemon.
+        interval: Seconds between the starts of two runs.
+        jitter: Up to this many seconds are added to every start time.
+        lock: Runs are skipped while another process holds this lock.
+        clock: Monotonic time source.
+        wait: wait(timeout) -> True if stopped; defaults to the stop event.
+    """
+
+    def __init__(self, job: Callable[[], None], interval: float, jitter: float = 0.0,
+                 lock: Optional[RunLock] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 wait: Optional[Callable[[float], bool]] = None,
+                 rng: Optional[random.Random] = None):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        self.job = job
+        self.interval = interval
+        self.jitter = max(jitter, 0.0)
+        self.lock = lock
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.stats = {'runs': 0, 'failed': 0, 'skipped': 0}
+
+        self._stop = threading.Event()
+        self._wait = wait or self._stop.wait
+
+    def stop(self):
+        """Stops the daemon after the current run."""
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def install_signal_handlers(self):
+        """Stops gracefully on SIGTERM and SIGINT (must be called from the main thread)."""
+        def handle(signum, frame):
+            logger.info(f"Received signal {signum}, stopping after the current run")
+            self.stop()
+
+        signal.signal(signal.SIGINT, handle)
+        if hasattr(signal, 'SIGTERM'):
+            signal.signal(signal.SIGTERM, handle)
+
+    def run_once(self) -> bool:
+        """
+        Runs the job unless another process holds the lock.
+
+        Returns:
+            True if the job ran (successfully or not).
+        """
+        if self.lock is not None and not self.lock.acquire():
+            self.stats['skipped'] += 1
+            logger.warning("Another synchronization is running, skipping this run")
+            return False
+
+        try:
+            self.job()
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"Synchronization failed: {e}", exc_info=True)
+        finally:
+            self.stats['runs'] += 1
+            if self.lock is not None:
+                self.lock.release()
+        return True
+
+    def next_run_delay(self, started: float, tick: int) -> Tuple[int, float]:
+        """
+        Gets the next tick after `tick` that is still in the future.
+
+        Returns:
+            (tick, seconds to wait)
+        """
+        elapsed = self.clock() - started
+        tick = max(tick + 1, math.floor(elapsed / self.interval) + 1)
+        due = started + tick * self.interval + self.rng.uniform(0, self.jitter)
+        return tick, max(due - self.clock(), 0.0)
+
+    def run(self):
+        """Runs the job now and then on every tick until stop() is called."""
+        started = self.clock()
+        tick = 0
+
+        while not self.stopped:
+            self.run_once()
+            if self.stopped:
+                break
+
+            tick, delay = self.next_run_delay(started, tick)
+            logger.info(f"Next synchronization in {delay / 60:.1f} min")
+            if self._wait(delay):
+                break
@@ -0,0 +1,293 @@
+"""
+Background synchronization jobs for the web server.
+
+Jobs and their progress logs are kept in the database (sync_jobs,
+sync_job_events), so every worker process of a production server sees
+the same jobs. SyncJobRunner queues a job and returns at once; a request
+for a sync that a queued or running job already covers returns that job
+instead of starting another one. The runner thread of every process
+takes the oldest queued job while no job is running anywhere, so syncs
+run one at a time. Everything a job prints to its output becomes its
+progress log, which clients read by polling or as a Server-Sent Events
+stream.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from src.db_manager import Database
+from locales.i18n import t
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY = 50                    # finished jobs kept for GET /api/sync/<job>
+DEFAULT_KEEPALIVE_SECONDS = 15.0        # SSE comment sent while a job is silent
+DEFAULT_POLL_SECONDS = 1.0              # how often the database is checked for new jobs and events
+DEFAULT_HEARTBEAT_SECONDS = 10.0        # how often a running job shows its process is alive
+STALE_HEARTBEATS = 6                    # missed heartbeats after which a running job has failed
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class SyncJob:
+    """
+    One requested synchronization, as last read from the database.
+    """
+
+    def __init__(self, db: Database, row: Dict, poll_interval: float = DEFAULT_POLL_SECONDS):
+        self.db = db
+        self.id = row['id']
+        self.poll_interval = poll_interval
+        self._update(row)
+
+    def _update(self, row: Dict):
+        self.options = row['options']
+        self.status = row['status']
+        self.created_at = row['created_at']
+        self.started_at = row['started_at']
+        self.finished_at = row['finished_at']
+        self.error = row['error']
+        self.requests = row['requests']
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (COMPLETED, FAILED)
+
+    @property
+    def events(self) -> List[Dict]:
+        """The progress log."""
+        return self.db.get_sync_job_events(self.id)
+
+    def refresh(self):
+        """Reads the status of the job again."""
+        row = self.db.get_sync_job(self.id)
+        if row is not None:
+            self._update(row)
+
+    def wait(self, after: int, timeout: Optional[float] = None) -> Tuple[List[Dict], bool]:
+        """
+        Waits for progress after event number `after` or for the job to finish.
+
+        Returns:
+            (new events, whether the job has finished)
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # The status is read first: a finished job has written all its events
+            self.refresh()
+            events = self.db.get_sync_job_events(self.id, after)
+            if events or self.finished:
+                return events, self.finished
+            if deadline is not None and time.monotonic() >= deadline:
+                return [], False
+            time.sleep(self.poll_interval if deadline is None
+                       else min(self.poll_interval, max(deadline - time.monotonic(), 0)))
+
+    def to_dict(self, include_events: bool = True) -> Dict:
+        data = {
+            'id': self.id,
+            'status': self.status,
+            'options': self.options,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+            'requests': self.requests,
+        }
+        if include_events:
+            data['events'] = self.events
+        return data
+
+
+class _JobOutput:
+    """
+    Text stream that turns the lines written to it into the progress log of a job.
+    """
+
+    def __init__(self, db: Database, job_id: str):
+        self.db = db
+        self.job_id = job_id
+        self._events = 0
+        self._line = ''
+        self._lock = threading.Lock()
+
+    def write(self, text: str) -> int:
+        with self._lock:
+            self._line += text
+            *lines, self._line = self._line.split('\n')
+            for line in lines:
+                self._log(line)
+        return len(text)
+
+    def flush(self):
+        with self._lock:
+            line, self._line = self._line, ''
+            self._log(line)
+
+    def _log(self, line: str):
+        if line.strip():
+            self._events += 1
+            self.db.add_sync_job_event(self.job_id, self._events, line)
+
+
+def covers(job_options: Dict, options: Dict) -> bool:
+    """
+    Checks whether a job with job_options does everything a sync with options would.
+
+    A full sync covers a subscriptions or videos sync with the same other options.
+    """
+    for stage in ('subscriptions', 'videos'):
+        if options[stage] and not job_options[stage]:
+            return False
+    return all(job_options[key] == value for key, value in options.items()
+               if key not in ('subscriptions', 'videos'))
+
+
+class SyncJobRunner:
+    """
+    Queues sync jobs in the database and runs them on one background thread.
+
+    Args:
+        db: Database that keeps the jobs.
+        run: Performs a sync with the options of a job, printing its progress
+            to the given output (see web_server.run_sync_job); its
+            exceptions fail the job.
+        history: How many finished jobs are remembered.
+        poll_interval: Seconds between checks for jobs queued by other processes.
+        heartbeat: Seconds between the signs of life of a running job; a job
+            whose process stops sending them is failed by the next runner.
+    """
+
+    def __init__(self, db: Database, run: Callable[[Dict, _JobOutput], None],
+                 history: int = DEFAULT_HISTORY, poll_interval: float = DEFAULT_POLL_SECONDS,
+                 heartbeat: float = DEFAULT_HEARTBEAT_SECONDS):
+        self.db = db
+        self.run = run
+        self.history = history
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """Starts the worker thread."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._work, name='sync-jobs', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stops the worker thread after the job in progress."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            thread.join(timeout)
+
+    def submit(self, options: Dict) -> Tuple[SyncJob, bool]:
+        """
+        Queues a sync, or joins a queued or running job that covers it.
+
+        Returns:
+            (job, whether a new job was created)
+        """
+        self.start()
+        row, created = self.db.add_sync_job(uuid.uuid4().hex, options,
+                                            lambda job_options: covers(job_options, options),
+                                            self.history)
+        self._wake.set()
+        return self._job(row), created
+
+    def get(self, job_id: str) -> Optional[SyncJob]:
+        row = self.db.get_sync_job(job_id)
+        return self._job(row) if row else None
+
+    def active(self) -> List[SyncJob]:
+        """Queued and running jobs, oldest first."""
+        return [self._job(row) for row in self.db.get_active_sync_jobs()]
+
+    def metrics(self) -> Dict:
+        """Counts of submitted, coalesced, completed and failed jobs still remembered."""
+        return self.db.get_sync_job_stats()
+
+    def _job(self, row: Dict) -> SyncJob:
+        return SyncJob(self.db, row, self.poll_interval)
+
+    def _claim(self) -> Optional[Dict]:
+        stale = timedelta(seconds=self.heartbeat * STALE_HEARTBEATS)
+        return self.db.claim_sync_job((datetime.now() - stale).isoformat(),
+                                      t('sync.job_abandoned'))
+
+    def _work(self):
+        while not self._stopping.is_set():
+            self._wake.clear()
+            try:
+                row = self._claim()
+            except Exception as e:
+                logger.error(f"Could not take a sync job: {e}", exc_info=True)
+                row = None
+
+            if row is not None:
+                self._run_job(row)
+            else:
+                self._wake.wait(self.poll_interval)
+
+    def _run_job(self, row: Dict):
+        job_id = row['id']
+        output = _JobOutput(self.db, job_id)
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(self.heartbeat):
+                self.db.touch_sync_job(job_id)
+
+        heartbeat = threading.Thread(target=beat, name='sync-job-heartbeat', daemon=True)
+        heartbeat.start()
+        try:
+            self.run(row['options'], output)
+        except Exception as e:
+            logger.error(f"Sync job {job_id} failed: {e}", exc_info=True)
+            output.flush()
+            self.db.finish_sync_job(job_id, FAILED, str(e))
+        else:
+            output.flush()
+            self.db.finish_sync_job(job_id, COMPLETED)
+        finally:
+            done.set()
+            heartbeat.join()
+
+
+def event_stream(job: SyncJob, after: int = 0,
+                 keepalive: float = DEFAULT_KEEPALIVE_SECONDS) -> Iterator[str]:
+    """
+    Server-Sent Events of a job: a `progress` event per log line, then a final `status` event.
+
+    Args:
+        after: Last event ID the client already has (the Last-Event-ID header).
+        keepalive: Seconds of silence after which a comment line is sent.
+    """
+    while True:
+        events, finished = job.wait(after, timeout=keepalive)
+        for event in events:
+            yield f"id: {event['id']}\nevent: progress\ndata: {json.dumps(event)}\n\n"
+            after = event['id']
+        if finished:
+            yield f"event: status\ndata: {json.dumps(job.to_dict(include_events=False))}\n\n"
+            return
+        if not events:
+            yield ": keepalive\n\n"
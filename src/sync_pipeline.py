@@ -0,0 +1,189 @@
+"""
+Batching database writer for video syncs.
+
+Fetch workers hand each fetched channel to the writer through a bounded
+queue, and a single writer thread stores the videos in large transactions
+(every `batch_size` rows or `flush_interval` seconds, whichever comes
+first), so HTTP waits and SQLite commits overlap instead of alternating.
+When the writer falls behind, the queue fills up and the fetch side waits.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.db_manager import Database
+from src.timing import timer
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200                # video rows per transaction
+DEFAULT_FLUSH_INTERVAL = 0.25           # seconds
+DEFAULT_QUEUE_SIZE = 64                 # fetched channels waiting for the writer
+
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Stores fetched videos on a background thread.
+
+    Each put() fans the videos of one channel out to its subscriptions and
+    marks them synced. new_videos and stats are complete after close().
+    """
+
+    def __init__(self, db: Database, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 queue_size: int = DEFAULT_QUEUE_SIZE,
+                 clock: Callable[[], float] = time.monotonic):
+        self.db = db
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.queue_size = queue_size
+        self.clock = clock
+
+        self.new_videos: Dict[int, int] = {}    # subscription_id -> new rows
+        self.stats = {'items': 0, 'rows': 0, 'commits': 0, 'write_seconds': 0.0,
+                      'max_depth': 0, 'depth_total': 0, 'put_wait_seconds': 0.0,
+                      'fetch_seconds': 0.0}
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+
+    def start(self):
+        """Starts the writer thread."""
+        if self._thread is not None:
+            return
+        self._started = self.clock()
+        self._thread = threading.Thread(target=self._run, name='sync-writer', daemon=True)
+        self._thread.start()
+
+    def put(self, subscription_ids: Iterable[int], videos: List[Dict],
+            feed_state: Optional[Tuple[str, Optional[str], Optional[str]]] = None):
+        """
+        Queues the videos of one channel for the given subscriptions.
+
+        Blocks while the queue is full.
+
+        Args:
+            subscription_ids: The subscriptions of the channel; all are marked synced.
+            videos: The fetched videos (possibly none).
+            feed_state: (youtube_channel_id, etag, last_modified) of a refreshed RSS feed.
+
+        Raises:
+            The exception that stopped the writer, if any.
+        """
+        if self._error is not None:
+            raise self._error
+
+        depth = self._queue.qsize()
+        self.stats['max_depth'] = max(self.stats['max_depth'], depth)
+        self.stats['depth_total'] += depth
+
+        waited = self.clock()
+        self._queue.put((list(subscription_ids), videos, feed_state))
+        now = self.clock()
+        self.stats['put_wait_seconds'] += now - waited
+        self.stats['fetch_seconds'] = now - self._started
+        self.stats['items'] += 1
+
+    def close(self):
+        """
+        Stores everything still queued and stops the writer thread.
+
+        Raises:
+            The exception that stopped the writer, if any.
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> 'BatchWriter':
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.close()
+        except Exception:
+            # Do not hide the exception that is already propagating
+            if exc_type is None:
+                raise
+
+    def summary(self) -> Dict:
+        """Throughput of the fetch and write stages and the queue depth."""
+        stats = self.stats
+        return {
+            'channels': stats['items'],
+            'fetch_seconds': stats['fetch_seconds'],
+            'fetch_rate': stats['items'] / stats['fetch_seconds'] if stats['fetch_seconds'] else 0.0,
+            'rows': stats['rows'],
+            'commits': stats['commits'],
+            'write_seconds': stats['write_seconds'],
+            'write_rate': stats['rows'] / stats['write_seconds'] if stats['write_seconds'] else 0.0,
+            'max_depth': stats['max_depth'],
+            'mean_depth': stats['depth_total'] / stats['items'] if stats['items'] else 0.0,
+            'queue_size': self.queue_size,
+            'put_wait_seconds': stats['put_wait_seconds'],
+        }
+
+    def _run(self):
+        rows: List[Dict] = []
+        synced: List[int] = []
+        feed_states: List[Tuple] = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(deadline - self.clock(), 0.0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                break
+
+            if item is not None:
+                subscription_ids, videos, feed_state = item
+                synced.extend(subscription_ids)
+                if feed_state is not None:
+                    feed_states.append(feed_state)
+                rows.extend(dict(video, subscription_id=subscription_id,
+                                 youtube_video_id=video['video_id'])
+                            for subscription_id in subscription_ids for video in videos)
+                if deadline is None:
+                    deadline = self.clock() + self.flush_interval
+
+            if len(rows) >= self.batch_size or (deadline is not None and self.clock() >= deadline):
+                self._commit(rows, synced, feed_states)
+                rows, synced, feed_states, deadline = [], [], [], None
+
+        self._commit(rows, synced, feed_states)
+
+    def _commit(self, rows: List[Dict], synced: List[int], feed_states: List[Tuple]):
+        # After a failure the queue is still drained, so put() never blocks forever
+        if self._error is not None or not (rows or synced or feed_states):
+            return
+
+        started = self.clock()
+        try:
+            with timer.span('db.write_batch'):
+                new_counts = self.db.save_videos_batch(rows, synced, feed_states)
+        except Exception as e:
+            logger.error(f"Saving fetched videos failed: {e}", exc_info=True)
+            self._error = e
+            return
+
+        for subscription_id, count in new_counts.items():
+            self.new_videos[subscription_id] = self.new_videos.get(subscription_id, 0) + count
+        self.stats['rows'] += len(rows)
+        self.stats['commits'] += 1
+        self.stats['write_seconds'] += self.clock() - started
@@ -0,0 +1,94 @@
+"""
+Cost and duration estimates for a sync that has not run yet (--plan).
+
+Everything here works from the database alone: the cached subscription
+pages and feed states, the learned upload intervals and the timings of
+past runs in sync_runs. No request is sent.
+"""
+
+import heapq
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+
+DEFAULT_CALL_SECONDS = 0.3              # per API call when there is no run history
+HISTORY_RUNS = 20                       # finished runs used to learn the latencies
+
+
+def change_probability(target: Dict, feed_state: Optional[Dict],
+                       now: Optional[datetime] = None) -> float:
+    """
+    Estimates the chance that the feed of a creator changed since its last sync.
+
+    A feed requested without a validator (no cached ETag or Last-Modified,
+    or a subscription that was never synced) always counts as changed.
+    Otherwise the chance is the time since the last sync over the shortest
+    learned upload interval of its subscriptions.
+    """
+    if not feed_state or not (feed_state.get('etag') or feed_state.get('last_modified')):
+        return 1.0
+    if any(not sub.get('last_video_sync_at') for sub in target['subscriptions']):
+        return 1.0
+
+    intervals = [sub['upload_interval_seconds'] for sub in target['subscriptions']
+                 if sub.get('upload_interval_seconds')]
+    if not intervals:
+        return 1.0
+
+    elapsed = ((now or datetime.now())
+               - datetime.fromisoformat(target['last_video_sync_at'])).total_seconds()
+    return min(max(elapsed, 0) / min(intervals), 1.0)
+
+
+def historical_latency(runs: Iterable[Dict], per: Optional[str] = None) -> Optional[float]:
+    """
+    Mean seconds per account (or per fetched channel with per='channels') in past runs.
+
+    Args:
+        runs: Rows of Database.get_sync_runs; only finished runs with
+            account timings count.
+        per: An account counter to divide by, e.g. 'channels'.
+
+    Returns:
+        The mean, or None without any usable run.
+    """
+    seconds = 0.0
+    count = 0
+
+    for run in runs:
+        if run['duration_seconds'] is None:
+            continue
+        for account in run['accounts'].values():
+            if 'seconds' not in account:
+                continue
+            units = account.get(per, 0) if per else 1
+            if units:
+                seconds += account['seconds']
+                count += units
+
+    return seconds / count if count else None
+
+
+def wall_time(account_seconds: List[float], processes: int = 1) -> float:
+    """
+    Estimates the wall time of accounts synchronized by `processes` workers.
+
+    Accounts are handed to the least busy worker, longest first, as a
+    process pool would work through them.
+    """
+    if processes <= 1:
+        return sum(account_seconds)
+
+    workers = [0.0] * processes
+    for seconds in sorted(account_seconds, reverse=True):
+        heapq.heapreplace(workers, workers[0] + seconds)
+    return max(workers)
+
+
+def format_duration(seconds: float) -> str:
+    """Duration like 1:02:03 or 4:05."""
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
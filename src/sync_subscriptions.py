@@ -5,7 +5,28 @@ Script for synchronizing subscriptions and fetching new videos.
 
 import sys
 import os
-from datetime import datetime
+import argparse
+import builtins
+import contextlib
+import contextvars
+import io
+import json
+import functools
+import hashlib
+import logging
+import math
+import multiprocessing
+import threading
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED,
+                                as_completed, wait)
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+import requests
 
 # Add the project root folder to the path
 current_dir = os.path.dirname(os.path.abspath(__file__))  # src/
@@ -13,159 +34,683 @@ project_root = os.path.dirname(current_dir)  # project root
 sys.path.insert(0, project_root)
 
 from src.db_manager import Database
-from src.youtube_api import YouTubeAPI
+from src.youtube_api import YouTubeAPI, ClientRegistry, get_client_registry
+from src.rss_feed import FeedClient, DEFAULT_FEED_URL
+from src.circuit_breaker import (DEFAULT_BASE_BACKOFF_HOURS, DEFAULT_FAILURE_THRESHOLD,
+                                 DEFAULT_MAX_BACKOFF_DAYS, record_failure, record_success,
+                                 split_tripped)
+from src.polling import (DEFAULT_MAX_INTERVAL_HOURS, DEFAULT_MIN_INTERVAL_MINUTES, HISTORY_SIZE,
+                         engagement_score, schedule_subscriptions, split_due, sync_priority)
+from src.request_executor import DEFAULT_RATE_LIMIT, RequestExecutor, classify_error
+from src.sync_plan import (DEFAULT_CALL_SECONDS, HISTORY_RUNS, change_probability, format_duration,
+                           historical_latency, wall_time)
+from src.sync_pipeline import DEFAULT_BATCH_SIZE, DEFAULT_FLUSH_INTERVAL, BatchWriter
+from src.sync_daemon import DEFAULT_JITTER_SECONDS, RunLock, SyncDaemon
+from src.timing import timer
+from src.quota import (QuotaLedger, DEFAULT_DAILY_QUOTA, QUOTA_COSTS, VIDEO_SYNC_COST,
+                       get_project_id, plan_video_sync, video_sync_cost)
 from locales.i18n import t, load_locale_from_config
 
 # Load locale from settings
 load_locale_from_config()
 
+CREDENTIALS_FILE = 'config/client_secrets.json'
+
+# Where the progress of the current run is printed (see run_sync); stdout if unset
+_output: contextvars.ContextVar = contextvars.ContextVar('sync_output', default=None)
+
+
+def print(*args, **kwargs):
+    """builtins.print() to the output of the current run."""
+    kwargs.setdefault('file', _output.get() or sys.stdout)
+    builtins.print(*args, **kwargs)
+
+
+def load_config() -> Dict:
+    """Load settings from config/settings.json."""
+    config_path = os.path.join(project_root, 'config', 'settings.json')
+
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def create_quota_ledger(db: Database, daily_budget: Optional[int] = None) -> QuotaLedger:
+    """Create a quota ledger for the project in client_secrets.json."""
+    if daily_budget is None:
+        daily_budget = load_config().get('daily_quota_budget', DEFAULT_DAILY_QUOTA)
+    return QuotaLedger(db, get_project_id(CREDENTIALS_FILE), daily_budget)
+
+
+def get_registry(api_endpoint: Optional[str] = None,
+                 rate_limit: Optional[float] = None) -> ClientRegistry:
+    """Get the process-wide client registry, configured from settings.json."""
+    config = load_config()
+    if rate_limit is not None:
+        config['api_rate_limit_per_second'] = rate_limit
+    return get_client_registry(CREDENTIALS_FILE,
+                               executor=RequestExecutor.from_config(config),
+                               api_endpoint=api_endpoint or config.get('youtube_api_endpoint'))
+
+
+def print_api_metrics(registry: ClientRegistry):
+    """Print request, retry and throttling counters."""
+    metrics = registry.executor.metrics.snapshot()
+    print(t('sync.api_metrics', requests=metrics['requests'], retries=metrics['retries'],
+            throttle_waits=metrics['throttle_waits'],
+            wait_seconds=round(metrics['retry_wait_seconds'] + metrics['throttle_wait_seconds'], 1)))
+
 
-def sync_subscriptions(db: Database):
-    """Synchronize subscriptions for all personal channels."""
+def print_quota_summary(ledger: QuotaLedger):
+    """Print the quota spent by this run and what is left for today."""
+    print(t('sync.quota_used', units=ledger.session_units(), calls=ledger.session_calls()))
+    print(t('sync.quota_remaining', remaining=ledger.remaining(), budget=ledger.daily_budget))
+
+
+def print_pipeline_stats(writer: BatchWriter):
+    """Print the throughput of the fetch and write stages and the writer queue depth."""
+    stats = writer.summary()
+    print(t('sync.pipeline_fetch', channels=stats['channels'],
+            seconds=round(stats['fetch_seconds'], 1), rate=round(stats['fetch_rate'], 1)))
+    print(t('sync.pipeline_write', rows=stats['rows'], commits=stats['commits'],
+            seconds=round(stats['write_seconds'], 2), rate=round(stats['write_rate'])))
+    print(t('sync.pipeline_queue', max=stats['max_depth'], size=stats['queue_size'],
+            mean=round(stats['mean_depth'], 1), wait_seconds=round(stats['put_wait_seconds'], 2)))
+
+
+def print_stage_timings():
+    """Print the per-stage histograms collected while the timer was enabled."""
+    summary = timer.summary()
+    if not summary:
+        return
+
+    print(f"\n{t('sync.timings_title')}")
+    print(f"  {'':<30} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'total s':>9}")
+    for stage, stats in summary.items():
+        print(f"  {stage:<30} {stats['count']:>7} {stats['p50'] * 1000:>9.1f} "
+              f"{stats['p95'] * 1000:>9.1f} {stats['max'] * 1000:>9.1f} {stats['total']:>9.2f}")
+
+
+def get_channels(db: Database, channel_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+    """Personal channels to synchronize: all of them, or the given IDs."""
     channels = db.get_all_personal_channels()
+    if channel_ids is not None:
+        selected = set(channel_ids)
+        channels = [channel for channel in channels if channel['id'] in selected]
+    return channels
+
+
+def get_run_kind(kind: str, channels: List[Dict],
+                 channel_ids: Optional[Iterable[int]] = None) -> str:
+    """sync_runs kind of a run; runs of selected accounts get their own kind ('videos:1,2')."""
+    if channel_ids is None:
+        return kind
+    return kind + ':' + ','.join(str(channel['id']) for channel in channels)
+
+
+def run_usage_stats(ledger: QuotaLedger, before: Dict[str, Dict[str, int]]) -> Dict:
+    """
+    API calls by endpoint and quota units recorded since the before snapshot
+    of ledger.session_usage() (the ledger may be shared by several runs).
+    """
+    api_calls = {}
+    quota_units = 0
+    for endpoint, usage in ledger.session_usage().items():
+        previous = before.get(endpoint, {'calls': 0, 'units': 0})
+        if usage['calls'] > previous['calls']:
+            api_calls[endpoint] = usage['calls'] - previous['calls']
+        quota_units += usage['units'] - previous['units']
+    return {'api_calls': api_calls, 'quota_units': quota_units}
+
+
+def hash_subscriptions(youtube_channel_ids: Iterable[str]) -> str:
+    """Hash of a subscription set, independent of the order of the pages."""
+    return hashlib.sha256('\n'.join(sorted(youtube_channel_ids)).encode('utf-8')).hexdigest()
+
+
+def sync_subscription_pages(db: Database, personal_channel_id: int,
+                            api: YouTubeAPI) -> Tuple[Dict, Set[str]]:
+    """
+    Synchronize the subscriptions of a personal channel.
+
+    Returns (stats, youtube_channel_ids).
+    """
+    stats = {'added': 0, 'activated': 0, 'unchanged': 0, 'deactivated': 0, 'skipped': False}
+    state = db.get_subscription_sync_state(personal_channel_id)
+    cached_pages = {page['page_token']: page for page in state['pages']} if state else {}
+
+    current_youtube_ids = set()
+    pages = []
+    changed_pages = []
+
+    def upsert(items: List[Dict]):
+        with timer.span('db.upsert_subscriptions'):
+            changes = db.upsert_subscriptions(personal_channel_id, items)
+        for key, value in changes.items():
+            stats[key] += value
+
+    for page in api.iter_subscription_pages(cached_pages=cached_pages):
+        if page['items'] is None:
+            channel_ids = cached_pages[page['page_token']]['channel_ids']
+        else:
+            channel_ids = [sub['channel_id'] for sub in page['items']]
+            if state is None:
+                upsert(page['items'])
+            else:
+                changed_pages.append(page['items'])
+
+        current_youtube_ids.update(channel_ids)
+        pages.append({'page_token': page['page_token'], 'etag': page['etag'],
+                      'next_page_token': page['next_page_token'], 'channel_ids': channel_ids})
+
+    subscriptions_hash = hash_subscriptions(current_youtube_ids)
+
+    if state is not None and state['subscriptions_hash'] == subscriptions_hash:
+        stats['skipped'] = True
+        stats['unchanged'] = len(current_youtube_ids)
+    else:
+        for items in changed_pages:
+            upsert(items)
+        # All pages have arrived: subscriptions not seen are gone
+        with timer.span('db.deactivate_subscriptions'):
+            stats['deactivated'] = db.deactivate_missing_subscriptions(
+                personal_channel_id, current_youtube_ids)
+
+    with timer.span('db.save_subscription_state'):
+        db.save_subscription_sync_state(personal_channel_id, subscriptions_hash, pages)
+    return stats, current_youtube_ids
+
+
+def sync_subscriptions(db: Database, ledger: Optional[QuotaLedger] = None,
+                       registry: Optional[ClientRegistry] = None,
+                       channel_ids: Optional[Iterable[int]] = None) -> Dict[str, int]:
+    """Synchronize subscriptions for all personal channels (or only channel_ids)."""
+    channels = get_channels(db, channel_ids)
+    summary = {'added': 0, 'activated': 0, 'deactivated': 0, 'failed': 0}
 
     if not channels:
         print(f"❌ {t('sync.no_channels')}")
-        return
+        return summary
+
+    ledger = ledger or create_quota_ledger(db)
+    registry = registry or get_registry()
 
     print(t('sync.channels_found', count=len(channels)))
 
-    for channel in channels:
-        print(f"\n{'=' * 60}")
-        print(t('sync.sync_channel', name=channel['name']))
-        print('=' * 60)
+    # Authentication + at least one page of subscriptions
+    min_cost = QUOTA_COSTS['channels.list'] + QUOTA_COSTS['subscriptions.list']
 
-        try:
-            api = YouTubeAPI('config/client_secrets.json')
-            api.authenticate(channel['oauth_token_path'])
-
-            # Get subscriptions
-            print(t('sync.loading_subscriptions'))
-            subscriptions = api.get_subscriptions()
-            print(t('sync.subscriptions_found', count=len(subscriptions)))
-
-            # Get a list of YouTube channel IDs
-            current_youtube_ids = [sub['channel_id'] for sub in subscriptions]
-
-            # Synchronize status (active/inactive)
-            print(t('sync.checking_status'))
-            stats = db.sync_subscriptions_status(channel['id'], current_youtube_ids)
-
-            if stats['deactivated'] > 0:
-                print(f"  ⚠️  {t('sync.deactivated', count=stats['deactivated'])}")
-            if stats['activated'] > 0:
-                print(f"  ✓ {t('sync.activated', count=stats['activated'])}")
-            print(f"  ✓ {t('sync.unchanged', count=stats['unchanged'])}")
-
-            # Save new subscriptions to the database
-            added_count = 0
-            for sub in subscriptions:
-                subscription_id = db.add_subscription(
-                    personal_channel_id=channel['id'],
-                    youtube_channel_id=sub['channel_id'],
-                    channel_name=sub['channel_name'],
-                    channel_thumbnail=sub['thumbnail']
-                )
-                if subscription_id:
-                    added_count += 1
-
-            if added_count > 0:
-                print(f"  ✓ {t('sync.new_subscriptions', count=added_count)}")
-
-            print(f"✓ {t('sync.sync_complete', channel=channel['name'])}")
+    run_id = db.start_sync_run(get_run_kind('subscriptions', channels, channel_ids),
+                               planned=len(channels))
+    usage_before = ledger.session_usage()
+    accounts = {}
+    status = 'failed'
+    quota_exhausted = False
 
-        except Exception as e:
-            print(f"❌ {t('common.error')}: {e}")
-            continue
+    try:
+        for channel in channels:
+            if not ledger.can_afford(min_cost):
+                quota_exhausted = True
+                print(f"\n⚠️  {t('sync.quota_exhausted')}")
+                break
 
+            print(f"\n{'=' * 60}")
+            print(t('sync.sync_channel', name=channel['name']))
+            print('=' * 60)
+            started = time.monotonic()
 
-def sync_videos(db: Database, max_videos_per_channel: int = 5):
-    """Fetch new videos from all subscriptions."""
-    channels = db.get_all_personal_channels()
+            try:
+                with timer.span('sync.authenticate'):
+                    api = registry.get(channel['oauth_token_path'],
+                                       channel_id=channel['youtube_channel_id'],
+                                       quota_ledger=ledger)
+
+                print(t('sync.loading_subscriptions'))
+                with timer.span('sync.subscription_pages'):
+                    stats, current_youtube_ids = sync_subscription_pages(db, channel['id'], api)
+                print(t('sync.subscriptions_found', count=len(current_youtube_ids)))
+
+                if stats['skipped']:
+                    print(f"  ✓ {t('sync.subscriptions_unchanged')}")
+                elif stats['deactivated'] > 0:
+                    print(f"  ⚠️  {t('sync.deactivated', count=stats['deactivated'])}")
+                if stats['activated'] > 0:
+                    print(f"  ✓ {t('sync.activated', count=stats['activated'])}")
+                print(f"  ✓ {t('sync.unchanged', count=stats['unchanged'])}")
+
+                if stats['added'] > 0:
+                    print(f"  ✓ {t('sync.new_subscriptions', count=stats['added'])}")
+
+                for key in ('added', 'activated', 'deactivated'):
+                    summary[key] += stats[key]
+                print(f"✓ {t('sync.sync_complete', channel=channel['name'])}")
+
+            except Exception as e:
+                summary['failed'] += 1
+                print(f"❌ {t('common.error')}: {e}")
+                continue
+            finally:
+                ledger.flush()
+                accounts[channel['id']] = {'name': channel['name'],
+                                           'seconds': round(time.monotonic() - started, 3)}
+
+        status = 'interrupted' if quota_exhausted else 'completed'
+    except KeyboardInterrupt:
+        status = 'interrupted'
+        raise
+    finally:
+        db.update_sync_run_progress(run_id, len(accounts))
+        db.finish_sync_run(run_id, status, dict(
+            run_usage_stats(ledger, usage_before),
+            subscriptions_added=summary['added'],
+            subscriptions_activated=summary['activated'],
+            subscriptions_deactivated=summary['deactivated'],
+            errors=summary['failed'],
+            accounts=accounts))
+
+    print_quota_summary(ledger)
+    print_api_metrics(registry)
+    return summary
+
+
+def iter_subscription_videos(api: YouTubeAPI, subscriptions: List[Dict],
+                             max_results: int, workers: int = 1,
+                             fetch: Optional[Callable[[YouTubeAPI, Dict], List[Dict]]] = None
+                             ) -> Iterator[Tuple[Dict, Optional[List[Dict]], Optional[Exception]]]:
+    """
+    Fetch the latest videos of each subscription in a pool of worker threads.
+
+    Yields (subscription, videos, error) in completion order.
+    """
+    if fetch is None:
+        def fetch(client: YouTubeAPI, sub: Dict) -> List[Dict]:
+            return client.get_channel_videos(sub['youtube_channel_id'],
+                                             max_results=max_results)
+
+    if workers <= 1:
+        for sub in subscriptions:
+            try:
+                with timer.span('sync.fetch_channel'):
+                    videos = fetch(api, sub)
+            except Exception as e:
+                yield sub, None, e
+            else:
+                yield sub, videos, None
+        return
+
+    local = threading.local()
+
+    def fetch_in_worker(sub: Dict) -> List[Dict]:
+        if not hasattr(local, 'api'):
+            local.api = api.create_worker_client()
+        with timer.span('sync.fetch_channel'):
+            return fetch(local.api, sub)
+
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sync-fetch')
+    queue = iter(subscriptions)
+    # Only a small window is submitted ahead, so stopping early wastes no quota
+    pending = {executor.submit(fetch_in_worker, sub): sub for sub in islice(queue, workers * 2)}
+
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                sub = pending.pop(future)
+                try:
+                    result = (sub, future.result(), None)
+                except Exception as e:
+                    result = (sub, None, e)
+                yield result
+
+                next_sub = next(queue, None)
+                if next_sub is not None:
+                    pending[executor.submit(fetch_in_worker, next_sub)] = next_sub
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def fetch_via_feed(api: YouTubeAPI, target: Dict, feed_client: FeedClient,
+                   known_ids: Dict[int, Set[str]], max_results: int) -> List[Dict]:
+    """Fetch the new videos of a creator through its feed, hydrating only unknown IDs."""
+    state = target.get('feed_state') or {}
+    subscriptions = target['subscriptions']
+
+    # New subscriptions need the current uploads even if the feed is unchanged
+    conditional = all(known_ids.get(sub['id']) for sub in subscriptions)
+
+    try:
+        with timer.span('feed.fetch'):
+            feed = feed_client.fetch(target['youtube_channel_id'],
+                                     etag=state.get('etag') if conditional else None,
+                                     last_modified=state.get('last_modified') if conditional else None)
+    except (requests.RequestException, ET.ParseError):
+        return api.get_channel_videos(target['youtube_channel_id'], max_results=max_results)
+
+    videos = []
+    if feed['modified']:
+        video_ids = [entry['video_id'] for entry in feed['entries'][:max_results]]
+        missing = [video_id for video_id in video_ids
+                   if any(video_id not in known_ids.get(sub['id'], ()) for sub in subscriptions)]
+        if missing:
+            videos = api.get_videos(missing)
+
+    target['feed_state'] = {'etag': feed['etag'], 'last_modified': feed['last_modified']}
+    target['feed_updated'] = True
+    return videos
+
+
+def group_subscriptions_by_channel(subscriptions: List[Dict]) -> List[Dict]:
+    """Group the subscription rows of all personal channels by YouTube channel."""
+    targets = {}
+
+    for sub in subscriptions:
+        target = targets.get(sub['youtube_channel_id'])
+        if target is None:
+            target = targets[sub['youtube_channel_id']] = {
+                'youtube_channel_id': sub['youtube_channel_id'],
+                'channel_name': sub['channel_name'],
+                'subscriptions': [],
+                'last_video_sync_at': sub.get('last_video_sync_at'),
+                'next_video_sync_at': sub.get('next_video_sync_at'),
+            }
+        else:
+            for key in ('last_video_sync_at', 'next_video_sync_at'):
+                target[key] = min(target[key], sub.get(key), key=lambda value: value or '')
+        target['subscriptions'].append(sub)
+
+    return list(targets.values())
+
+
+def sync_videos(db: Database, max_videos_per_channel: int = 5,
+                ledger: Optional[QuotaLedger] = None, workers: Optional[int] = None,
+                registry: Optional[ClientRegistry] = None,
+                fetch_strategy: Optional[str] = None, feed_url: Optional[str] = None,
+                adaptive_polling: Optional[bool] = None, resume: bool = False,
+                channel_ids: Optional[Iterable[int]] = None) -> Dict:
+    """
+    Fetch new videos from all subscriptions (or only those of channel_ids).
+
+    Parameters left as None are taken from settings.json.
+    """
+    channels = get_channels(db, channel_ids)
+    summary = {'new_videos': 0, 'errors': {}, 'status': None}
     
     if not channels:
         print(f"❌ {t('sync.no_channels')}")
-        return
+        return summary
 
-    total_new_videos = 0
+    config = load_config()
+    ledger = ledger or create_quota_ledger(db)
+    registry = registry or get_registry()
+    if workers is None:
+        workers = config.get('sync_workers', 1)
+    if fetch_strategy is None:
+        fetch_strategy = config.get('video_fetch_strategy', 'api')
+    if feed_url is None:
+        feed_url = config.get('rss_feed_url', DEFAULT_FEED_URL)
+    if adaptive_polling is None:
+        adaptive_polling = config.get('adaptive_polling', True)
 
-    for channel in channels:
-        print(f"\n{'=' * 60}")
-        print(t('sync.video_loading', name=channel['name']))
-        print('=' * 60)
+    channels_by_id = {channel['id']: channel for channel in channels}
+    with timer.span('db.load_subscriptions'):
+        all_subscriptions = [sub for channel in channels
+                             for sub in db.get_subscriptions_by_channel(channel['id'])]
+
+    # Personal channels often follow the same creators: fetch each creator once
+    targets = group_subscriptions_by_channel(all_subscriptions)
+    print(t('sync.distinct_channels', channels=len(targets), subscriptions=len(all_subscriptions)))
+
+    # Dead or private channels are not fetched until their backoff expires
+    targets, tripped = split_tripped(targets)
+    if tripped:
+        print(t('sync.circuit_skipped', count=len(tripped)))
+    backoff = {
+        'threshold': config.get('circuit_failure_threshold', DEFAULT_FAILURE_THRESHOLD),
+        'base': int(config.get('circuit_base_backoff_hours', DEFAULT_BASE_BACKOFF_HOURS) * 3600),
+        'maximum': int(config.get('circuit_max_backoff_days', DEFAULT_MAX_BACKOFF_DAYS) * 86400),
+    }
+
+    if adaptive_polling:
+        targets, not_due = split_due(targets)
+        if not_due:
+            print(t('sync.not_due', count=len(not_due)))
+
+    run_kind = get_run_kind('videos', channels, channel_ids)
+
+    run = db.get_resumable_sync_run(run_kind) if resume else None
+    if run is not None:
+        recent = datetime.now() - timedelta(minutes=config.get('sync_interval_minutes', 30))
+        cutoff = min(run['started_at'], recent.isoformat())
+        remaining = [target for target in targets
+                     if (target['last_video_sync_at'] or '') < cutoff]
+        print(t('sync.resuming', run_id=run['id'], skipped=len(targets) - len(remaining)))
+        targets = remaining
+
+    # The channels that are watched most are fetched first
+    with timer.span('db.engagement_stats'):
+        engagement = db.get_engagement_stats([sub['id'] for target in targets
+                                              for sub in target['subscriptions']])
+    for target in targets:
+        target['priority'] = sync_priority(
+            max(engagement_score(engagement[sub['id']]) for sub in target['subscriptions']),
+            target['last_video_sync_at'])
+
+    # Plan the run within the quota budget before calling the API.
+    # Accounts without a known channel ID look it up with one channels.list call
+    unknown_ids = sum(1 for channel in channels if not channel['youtube_channel_id'])
+    budget = ledger.remaining() - unknown_ids * QUOTA_COSTS['channels.list']
+    sync_cost = video_sync_cost(fetch_strategy)
+    planned, deferred = plan_video_sync(targets, budget, sync_cost)
 
+    print(t('sync.quota_remaining', remaining=ledger.remaining(), budget=ledger.daily_budget))
+    if deferred:
+        print(f"⚠️  {t('sync.quota_planned', planned=len(planned), total=len(targets), deferred=len(deferred))}")
+
+    # Authenticate the accounts that follow the planned channels
+    followers = {sub['personal_channel_id'] for target in planned for sub in target['subscriptions']}
+    clients = {}
+    for channel in channels:
+        if channel['id'] not in followers:
+            continue
         try:
-            api = YouTubeAPI('config/client_secrets.json')
-            api.authenticate(channel['oauth_token_path'])
+            with timer.span('sync.authenticate'):
+                clients[channel['id']] = registry.get(channel['oauth_token_path'],
+                                                      channel_id=channel['youtube_channel_id'],
+                                                      quota_ledger=ledger)
+        except Exception as e:
+            print(f"❌ {channel['name']}: {t('sync.error_processing_channel', error=str(e))}")
 
-            # Get subscriptions from the database
-            subscriptions = db.get_subscriptions_by_channel(channel['id'])
-            print(t('sync.processing_subscriptions', count=len(subscriptions)))
+    # Uploads are public, so any authorized follower can fetch them
+    assignments = {channel_id: [] for channel_id in clients}
+    for target in planned:
+        for sub in target['subscriptions']:
+            if sub['personal_channel_id'] in clients:
+                assignments[sub['personal_channel_id']].append(target)
+                break
+
+    fetch = None
+    feed_client = None
+    if fetch_strategy == 'rss':
+        feed_client = FeedClient(feed_url, pool_size=max(workers, 1))
+        cache = db.get_channel_cache([target['youtube_channel_id'] for target in planned])
+        known_ids = db.get_video_ids_by_subscription(
+            [sub['id'] for target in planned for sub in target['subscriptions']])
+
+        for target in planned:
+            entry = cache.get(target['youtube_channel_id'], {})
+            target['feed_state'] = {'etag': entry.get('feed_etag'),
+                                    'last_modified': entry.get('feed_last_modified')}
+
+        fetch = functools.partial(fetch_via_feed, feed_client=feed_client,
+                                  known_ids=known_ids, max_results=max_videos_per_channel)
+
+    polled = []
+    circuit_updates = []
+    quota_exhausted = False
+    usage_before = ledger.session_usage()
+    accounts = {}
+
+    if run is not None:
+        run_id, processed = run['id'], run['processed']
+        db.resume_sync_run(run_id, planned=len(planned))
+    else:
+        run_id, processed = db.start_sync_run(run_kind, planned=len(planned)), 0
+    status = 'failed'
+    incomplete = False
+
+    writer = BatchWriter(db, batch_size=config.get('sync_write_batch_size', DEFAULT_BATCH_SIZE),
+                         flush_interval=config.get('sync_write_interval_ms',
+                                                   DEFAULT_FLUSH_INTERVAL * 1000) / 1000)
+    writer.start()
+
+    try:
+        for channel_id, channel_targets in assignments.items():
+            if quota_exhausted:
+                break
+            if not channel_targets:
+                continue
+
+            channel = channels_by_id[channel_id]
+            print(f"\n{'=' * 60}")
+            print(t('sync.video_loading', name=channel['name']))
+            print('=' * 60)
+            print(t('sync.processing_subscriptions', count=len(channel_targets)))
+            started = time.monotonic()
+
+            results = iter_subscription_videos(clients[channel_id], channel_targets,
+                                               max_videos_per_channel, workers, fetch=fetch)
+
+            try:
+                for i, (target, videos, error) in enumerate(results, 1):
+                    feed_state = None
+                    # A failed fetch keeps the previous validators of the feed
+                    if target.pop('feed_updated', False) and error is None:
+                        feed_state = (target['youtube_channel_id'],
+                                      target['feed_state']['etag'],
+                                      target['feed_state']['last_modified'])
+
+                    if error is not None:
+                        error_msg = str(error)
+                        # Determine the error type from the API error reason
+                        error_type = classify_error(error)
+
+                        summary['errors'][error_type] = (summary['errors'].get(error_type, 0)
+                                                         + len(target['subscriptions']))
+
+                        # Log the error for every subscription of this creator
+                        with timer.span('db.log_sync_error'):
+                            for sub in target['subscriptions']:
+                                db.log_sync_error(
+                                    personal_channel_id=sub['personal_channel_id'],
+                                    subscription_id=sub['id'],
+                                    channel_name=sub['channel_name'],
+                                    error_type=error_type,
+                                    error_message=error_msg[:500]  # Limit the length
+                                )
+
+                        print(f"  ⚠️  {t('sync.error_processing_subscription', channel=target['channel_name'], error=error_type)}")
+
+                        updates = [update for update in (record_failure(sub, error_type, **backoff)
+                                                         for sub in target['subscriptions'])
+                                   if update is not None]
+                        circuit_updates.extend(updates)
+                        open_until = [update[2] for update in updates if update[2]]
+                        if open_until:
+                            print(f"  ⛔ {t('sync.circuit_opened', channel=target['channel_name'], until=min(open_until)[:16].replace('T', ' '))}")
+
+                        # The remaining subscriptions would fail the same way
+                        if error_type == 'QUOTA_EXCEEDED':
+                            quota_exhausted = True
+                            break
+                    else:
+                        circuit_updates.extend(update for update in map(record_success,
+                                                                        target['subscriptions'])
+                                               if update is not None)
+
+                        # The writer fans the videos out to every subscription of this
+                        # creator and marks them synced; a failed fetch is retried on resume
+                        writer.put([sub['id'] for sub in target['subscriptions']], videos or [],
+                                   feed_state)
+                        polled.extend(sub['id'] for sub in target['subscriptions'])
+                    processed += 1
 
-            channel_new_videos = 0
-            
-            for i, sub in enumerate(subscriptions, 1):
-                try:
-                    # Get the latest videos from the channel
-                    videos = api.get_channel_videos(
-                        sub['youtube_channel_id'],
-                        max_results=max_videos_per_channel
-                    )
-                    
-                    # Save to the database
-                    for video in videos:
-                        video_id = db.add_video(
-                            subscription_id=sub['id'],
-                            youtube_video_id=video['video_id'],
-                            title=video['title'],
-                            thumbnail=video['thumbnail'],
-                            published_at=video['published_at'],
-                            duration=video['duration'],
-                            description=video.get('description'),
-                            view_count=video.get('view_count')
-                        )
-                        
-                        if video_id:  # New video
-                            channel_new_videos += 1
-                    
                     # Progress
                     if i % 10 == 0:
-                        print(f"  {t('sync.progress', current=i, total=len(subscriptions))}")
-                
-                except Exception as e:
-                    error_msg = str(e)
-                    # Determine the error type
-                    if 'playlistNotFound' in error_msg or '404' in error_msg:
-                        error_type = 'PLAYLIST_NOT_FOUND'
-                    elif 'duration' in error_msg:
-                        error_type = 'DURATION_PARSE_ERROR'
-                    elif 'quota' in error_msg.lower():
-                        error_type = 'QUOTA_EXCEEDED'
-                    else:
-                        error_type = 'UNKNOWN'
-                    
-                    # Log the error
-                    db.log_sync_error(
-                        personal_channel_id=channel['id'],
-                        subscription_id=sub['id'],
-                        channel_name=sub['channel_name'],
-                        error_type=error_type,
-                        error_message=error_msg[:500]  # Limit the length
-                    )
-                    
-                    print(f"  ⚠️  {t('sync.error_processing_subscription', channel=sub['channel_name'], error=error_type)}")
-                    continue
-
-            print(t('sync.new_videos_found', count=channel_new_videos, channel=channel['name']))
-            total_new_videos += channel_new_videos
+                        print(f"  {t('sync.progress', current=i, total=len(channel_targets))}")
+                        db.update_sync_run_progress(run_id, processed)
+
+                    if i < len(channel_targets) and not ledger.can_afford(sync_cost):
+                        quota_exhausted = True
+                        break
+
+            except Exception as e:
+                incomplete = True
+                print(f"❌ {t('sync.error_processing_channel', error=str(e))}")
+            finally:
+                # Cancels fetches that have not started yet
+                results.close()
+                ledger.flush()
+                accounts[channel_id] = {'name': channel['name'], 'channels': len(channel_targets),
+                                        'seconds': round(time.monotonic() - started, 3)}
 
+        status = 'interrupted' if quota_exhausted or incomplete or deferred else 'completed'
+    except KeyboardInterrupt:
+        status = 'interrupted'
+        raise
+    finally:
+        try:
+            writer.close()
         except Exception as e:
+            status = 'failed'
             print(f"❌ {t('sync.error_processing_channel', error=str(e))}")
-            continue
+
+        new_videos = {channel['id']: 0 for channel in channels}
+        for sub in all_subscriptions:
+            new_videos[sub['personal_channel_id']] += writer.new_videos.get(sub['id'], 0)
+        for channel_id, account in accounts.items():
+            account['new_videos'] = new_videos[channel_id]
+
+        if circuit_updates:
+            with timer.span('db.circuit_state'):
+                db.update_circuit_state(circuit_updates)
+
+        db.update_sync_run_progress(run_id, processed)
+        db.finish_sync_run(run_id, status, dict(run_usage_stats(ledger, usage_before),
+                                                new_videos=sum(new_videos.values()),
+                                                errors=sum(summary['errors'].values()),
+                                                accounts=accounts))
+        if feed_client is not None:
+            feed_client.close()
+
+    if adaptive_polling and polled:
+        # Learn the upload cadence from the stored videos, including the new ones
+        with timer.span('db.poll_schedule'):
+            history = db.get_publish_history(polled, limit=HISTORY_SIZE)
+            db.update_poll_schedule(schedule_subscriptions(
+                history,
+                min_interval=int(config.get('poll_min_interval_minutes',
+                                            DEFAULT_MIN_INTERVAL_MINUTES) * 60),
+                max_interval=int(config.get('poll_max_interval_hours',
+                                            DEFAULT_MAX_INTERVAL_HOURS) * 3600)))
+
+    print()
+    for channel in channels:
+        print(t('sync.new_videos_found', count=new_videos[channel['id']], channel=channel['name']))
+    total_new_videos = sum(new_videos.values())
+
+    if quota_exhausted:
+        print(f"\n⚠️  {t('sync.quota_exhausted')}")
 
     print(f"\n{'=' * 60}")
     print(t('sync.sync_complete_global'))
     print(t('sync.total_new_videos', count=total_new_videos))
+    print_quota_summary(ledger)
+    print_api_metrics(registry)
+    print_pipeline_stats(writer)
 
     # Show error statistics
     errors = db.get_unresolved_errors()
@@ -184,14 +729,375 @@ def sync_videos(db: Database, max_videos_per_channel: int = 5):
 
     print('=' * 60)
 
+    summary['new_videos'] = total_new_videos
+    summary['status'] = status
+    return summary
 
-def main():
-    print("=" * 60)
-    print(f"{t('app.name')} - {t('sync.title')}")
-    print("=" * 60)
 
-    db = Database()
+def sync_account(db_path: str, channel_id: int, subscriptions: bool, videos: bool,
+                 project_id: str, quota_share: int, api_endpoint: Optional[str] = None,
+                 rate_limit: Optional[float] = None, timings: bool = False,
+                 **video_options) -> Dict:
+    """
+    Synchronize one personal channel in a worker process within quota_share units.
+
+    The console output is returned in the result instead of being printed.
+    """
+    result = {'channel_id': channel_id, 'subscriptions': None, 'videos': None,
+              'quota_units': 0, 'quota_calls': 0, 'error': None}
+    output = io.StringIO()
+    started = time.monotonic()
+    timer.enabled = timings
+
+    with contextlib.redirect_stdout(output):
+        try:
+            db = Database(db_path)
+            ledger = QuotaLedger(db, project_id)
+            ledger.daily_budget = ledger.used_today() + quota_share
+            registry = get_registry(api_endpoint, rate_limit)
+
+            try:
+                if subscriptions:
+                    result['subscriptions'] = sync_subscriptions(db, ledger=ledger, registry=registry,
+                                                                 channel_ids=[channel_id])
+                if videos:
+                    result['videos'] = sync_videos(db, ledger=ledger, registry=registry,
+                                                   channel_ids=[channel_id], **video_options)
+            finally:
+                ledger.flush()
+                result['quota_units'] = ledger.session_units()
+                result['quota_calls'] = ledger.session_calls()
+        except Exception as e:
+            result['error'] = str(e)
+            traceback.print_exc(file=output)
+
+    result['seconds'] = time.monotonic() - started
+    result['output'] = output.getvalue()
+    result['timings'] = timer.samples()
+    return result
+
+
+def account_quota_share(ledger: QuotaLedger, accounts: int) -> int:
+    """Units of today's remaining quota each account may spend in a parallel sync."""
+    return ledger.remaining() // accounts
+
+
+def run_parallel_accounts(db: Database, processes: int, subscriptions: bool = True,
+                          videos: bool = True, ledger: Optional[QuotaLedger] = None,
+                          api_endpoint: Optional[str] = None, rate_limit: Optional[float] = None,
+                          **video_options) -> List[Dict]:
+    """
+    Synchronize every personal channel in its own worker process.
+
+    video_options are passed on to sync_videos.
+    """
+    channels = db.get_all_personal_channels()
+
+    if not channels:
+        print(f"❌ {t('sync.no_channels')}")
+        return []
+
+    db.enable_wal()
+    ledger = ledger or create_quota_ledger(db)
+    quota_share = account_quota_share(ledger, len(channels))
+    processes = max(min(processes, len(channels)), 1)
+    if rate_limit is None:
+        rate_limit = load_config().get('api_rate_limit_per_second', DEFAULT_RATE_LIMIT)
+    process_rate_limit = rate_limit / processes
+
+    print(t('sync.parallel_started', accounts=len(channels), processes=processes))
+
+    results = {}
+    # spawn: forked children would share the parent's HTTP connections
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=processes, mp_context=context) as executor:
+        futures = {
+            executor.submit(sync_account, db.db_path, channel['id'], subscriptions, videos,
+                            ledger.project_id, quota_share, api_endpoint, process_rate_limit,
+                            timer.enabled, **video_options): channel
+            for channel in channels
+        }
+
+        for future in as_completed(futures):
+            channel = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:      # the worker process died
+                result = {'channel_id': channel['id'], 'subscriptions': None, 'videos': None,
+                          'quota_units': 0, 'quota_calls': 0, 'error': str(e),
+                          'seconds': 0.0, 'output': '', 'timings': {}}
+            print(result['output'], end='')
+            timer.merge(result['timings'])
+            results[channel['id']] = result
+
+    # The workers recorded their usage in the database
+    ledger.reload()
+
+    results = [results[channel['id']] for channel in channels]
+    print_parallel_summary(channels, results)
+    return results
+
+
+def print_parallel_summary(channels: List[Dict], results: List[Dict]):
+    """Print the combined totals of a --parallel-accounts run."""
+    print(f"\n{'=' * 60}")
+    print(t('sync.parallel_complete', accounts=len(results),
+            failed=sum(1 for result in results if result['error'])))
+
+    totals = {'added': 0, 'activated': 0, 'deactivated': 0}
+    errors = {}
+    for channel, result in zip(channels, results):
+        new_videos = result['videos']['new_videos'] if result['videos'] else 0
+        print(t('sync.parallel_account', name=channel['name'], seconds=round(result['seconds'], 1),
+                new_videos=new_videos, units=result['quota_units']))
+        if result['error']:
+            print(f"  ❌ {t('common.error')}: {result['error']}")
+
+        for key in totals:
+            totals[key] += result['subscriptions'][key] if result['subscriptions'] else 0
+        for error_type, count in (result['videos'] or {}).get('errors', {}).items():
+            errors[error_type] = errors.get(error_type, 0) + count
+
+    if totals['added']:
+        print(f"  ✓ {t('sync.new_subscriptions', count=totals['added'])}")
+    if totals['activated']:
+        print(f"  ✓ {t('sync.activated', count=totals['activated'])}")
+    if totals['deactivated']:
+        print(f"  ⚠️  {t('sync.deactivated', count=totals['deactivated'])}")
+
+    print(t('sync.total_new_videos',
+            count=sum(result['videos']['new_videos'] for result in results if result['videos'])))
+    print(t('sync.quota_used', units=sum(result['quota_units'] for result in results),
+            calls=sum(result['quota_calls'] for result in results)))
+
+    if errors:
+        print(f"\n⚠️  {t('sync.errors_found', count=sum(errors.values()))}")
+        for error_type, count in errors.items():
+            print(f"  - {error_type}: {count} subscriptions")
+    print('=' * 60)
+
+
+def plan_sync(db: Database, subscriptions: bool = True, videos: bool = True,
+              ledger: Optional[QuotaLedger] = None, parallel_accounts: Optional[int] = None,
+              workers: Optional[int] = None, fetch_strategy: Optional[str] = None,
+              adaptive_polling: Optional[bool] = None, now: Optional[datetime] = None) -> Dict:
+    """
+    Predict the API calls, quota units and wall time of a sync from the database only.
+
+    Parameters left as None are taken from settings.json, as in sync_videos.
+    """
+    config = load_config()
+    now = now or datetime.now()
+    ledger = ledger or create_quota_ledger(db)
+    channels = get_channels(db)
+    processes = parallel_accounts if parallel_accounts and parallel_accounts > 1 else 1
+    if workers is None:
+        workers = config.get('sync_workers', 1)
+    workers = max(workers, 1)
+    if fetch_strategy is None:
+        fetch_strategy = config.get('video_fetch_strategy', 'api')
+    if adaptive_polling is None:
+        adaptive_polling = config.get('adaptive_polling', True)
+
+    history = {kind: [run for run in db.get_sync_runs(limit=HISTORY_RUNS, kind=kind)
+                      if run['status'] == 'completed']
+               for kind in ('subscriptions', 'videos')}
+    account_latency = historical_latency(history['subscriptions'])
+    channel_latency = historical_latency(history['videos'], per='channels')
 
+    plan = {'accounts': len(channels), 'subscriptions': 0, 'channels': 0, 'tripped': 0,
+            'not_due': 0, 'planned': 0, 'deferred': 0, 'feed_requests': 0,
+            'api_calls': {endpoint: 0 for endpoint in QUOTA_COSTS},
+            'remaining': ledger.remaining(),
+            'history': {kind: len(runs) for kind, runs in history.items()}}
+    calls = plan['api_calls']
+    seconds = {channel['id']: 0.0 for channel in channels}
+    units = {channel['id']: 0 for channel in channels}
+    authenticated = set()
+
+    if subscriptions:
+        for channel in channels:
+            # Every page is requested again, with its ETag
+            state = db.get_subscription_sync_state(channel['id'])
+            pages = len(state['pages']) if state else max(math.ceil(
+                len(db.get_subscriptions_by_channel(channel['id'])) / 50), 1)
+            calls['subscriptions.list'] += pages
+            units[channel['id']] += pages * QUOTA_COSTS['subscriptions.list']
+            authenticated.add(channel['id'])
+            seconds[channel['id']] += (account_latency if account_latency is not None
+                                       else pages * DEFAULT_CALL_SECONDS)
+
+    if videos:
+        # Worker processes sync their own subscriptions and videos with a share of the quota
+        groups = [[channel] for channel in channels] if processes > 1 else [channels]
+        share = (account_quota_share(ledger, len(channels)) if processes > 1
+                 else ledger.remaining())
+        changed_feeds = 0.0
+
+        for group in groups:
+            # Accounts without a known channel ID look it up with one channels.list call
+            budget = share - sum(units[channel['id']] for channel in group) - sum(
+                QUOTA_COSTS['channels.list'] for channel in group if not channel['youtube_channel_id'])
+            group_subscriptions = [sub for channel in group
+                                   for sub in db.get_subscriptions_by_channel(channel['id'])]
+            targets = group_subscriptions_by_channel(group_subscriptions)
+            plan['subscriptions'] += len(group_subscriptions)
+            plan['channels'] += len(targets)
+
+            targets, tripped = split_tripped(targets, now)
+            plan['tripped'] += len(tripped)
+            if adaptive_polling:
+                targets, not_due = split_due(targets, now)
+                plan['not_due'] += len(not_due)
+
+            planned, deferred = plan_video_sync(targets, budget, video_sync_cost(fetch_strategy))
+            plan['planned'] += len(planned)
+            plan['deferred'] += len(deferred)
+
+            cache = {}
+            if fetch_strategy == 'rss':
+                cache = db.get_channel_cache([target['youtube_channel_id'] for target in planned])
+
+            for target in planned:
+                channel_id = target['subscriptions'][0]['personal_channel_id']
+                authenticated.add(channel_id)
+
+                if fetch_strategy == 'rss':
+                    entry = cache.get(target['youtube_channel_id'], {})
+                    feed_state = {'etag': entry.get('feed_etag'),
+                                  'last_modified': entry.get('feed_last_modified')}
+                    changed = change_probability(target, feed_state, now)
+                    changed_feeds += changed
+                    plan['feed_requests'] += 1
+                    channel_calls = 1 + changed
+                else:
+                    for endpoint in ('channels.list', 'playlistItems.list', 'videos.list'):
+                        calls[endpoint] += 1
+                    channel_calls = VIDEO_SYNC_COST
+
+                seconds[channel_id] += (channel_latency if channel_latency is not None
+                                        else channel_calls * DEFAULT_CALL_SECONDS / workers)
+
+        calls['videos.list'] += math.ceil(changed_feeds)
+
+    # Accounts without a stored channel ID look it up while authenticating
+    calls['channels.list'] += sum(1 for channel in channels if channel['id'] in authenticated
+                                  and not channel['youtube_channel_id'])
+
+    plan['quota_units'] = sum(QUOTA_COSTS[endpoint] * count for endpoint, count in calls.items())
+    plan['account_seconds'] = {channel['name']: seconds[channel['id']] for channel in channels}
+    plan['wall_seconds'] = wall_time(list(seconds.values()), processes)
+    return plan
+
+
+def print_sync_plan(plan: Dict):
+    """Print the prediction of plan_sync()."""
+    print(f"\n{'=' * 60}")
+    print(t('sync_plan.title'))
+    print('=' * 60)
+    print(t('sync_plan.accounts', accounts=plan['accounts'], subscriptions=plan['subscriptions'],
+            channels=plan['channels']))
+    print(t('sync_plan.channels', planned=plan['planned'], not_due=plan['not_due'],
+            tripped=plan['tripped'], deferred=plan['deferred']))
+    if plan['feed_requests']:
+        print(t('sync_plan.feed_requests', count=plan['feed_requests']))
+
+    print(f"\n{t('sync_plan.api_calls')}")
+    for endpoint, calls in plan['api_calls'].items():
+        if calls:
+            print(f"  {endpoint:<22} {calls:>7}")
+    print(t('sync_plan.quota', units=plan['quota_units'], remaining=plan['remaining']))
+    if plan['quota_units'] > plan['remaining']:
+        print(f"⚠️  {t('sync_plan.over_budget')}")
+
+    print(f"\n{t('sync_plan.wall_time', duration=format_duration(plan['wall_seconds']))}")
+    if plan['history']['videos'] or plan['history']['subscriptions']:
+        print(t('sync_plan.history', videos=plan['history']['videos'],
+                subscriptions=plan['history']['subscriptions']))
+    else:
+        print(t('sync_plan.no_history', seconds=DEFAULT_CALL_SECONDS))
+    for name, seconds in sorted(plan['account_seconds'].items(), key=lambda item: -item[1]):
+        print(f"  {name}: {format_duration(seconds)}")
+    print('=' * 60)
+
+
+def get_sync_lock(db: Database) -> RunLock:
+    """Lock that keeps two synchronizations of a database from running at once."""
+    return RunLock(os.path.join(os.path.dirname(os.path.abspath(db.db_path)), 'sync.lock'))
+
+
+def run_sync(db: Database, subscriptions: bool = True, videos: bool = True,
+             max_videos: int = 5, ledger: Optional[QuotaLedger] = None,
+             registry: Optional[ClientRegistry] = None, resume: bool = False,
+             parallel_accounts: Optional[int] = None, timings_json: Optional[str] = None,
+             output: Optional[TextIO] = None):
+    """Run one synchronization (subscriptions, videos or both), printing to output."""
+    ledger = ledger or create_quota_ledger(db)
+    token = _output.set(output)
+
+    try:
+        if parallel_accounts and parallel_accounts > 1:
+            run_parallel_accounts(db, parallel_accounts, subscriptions=subscriptions,
+                                  videos=videos, ledger=ledger,
+                                  max_videos_per_channel=max_videos, resume=resume)
+            return
+
+        if subscriptions:
+            sync_subscriptions(db, ledger=ledger, registry=registry)
+
+        if subscriptions and videos:
+            print(f"\n{'=' * 60}")
+            print(t('sync.transition_to_videos'))
+            print('=' * 60)
+
+        if videos:
+            sync_videos(db, max_videos_per_channel=max_videos, ledger=ledger, registry=registry,
+                        resume=resume)
+    finally:
+        if timer.enabled:
+            print_stage_timings()
+            if timings_json:
+                timer.export(timings_json)
+            timer.reset()
+        _output.reset(token)
+
+
+def run_daemon(db: Database, config: Dict, subscriptions: bool, videos: bool,
+               max_videos: int, interval_minutes: float,
+               parallel_accounts: Optional[int] = None, timings_json: Optional[str] = None):
+    """
+    Run synchronization every interval_minutes until SIGTERM/SIGINT.
+
+    The clients and the quota ledger are shared by all runs.
+    """
+    logging.basicConfig(level=config.get('log_level', 'INFO'),
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    ledger = create_quota_ledger(db)
+    registry = get_registry()
+    lock = get_sync_lock(db)
+
+    def job():
+        print(f"\n{'=' * 60}")
+        print(t('sync.daemon_run_started', time=datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        # Continues a run cut short by a restart or quota exhaustion
+        run_sync(db, subscriptions=subscriptions, videos=videos, max_videos=max_videos,
+                 ledger=ledger, registry=registry, resume=True,
+                 parallel_accounts=parallel_accounts, timings_json=timings_json)
+
+    daemon = SyncDaemon(job, interval=interval_minutes * 60,
+                        jitter=config.get('sync_jitter_seconds', DEFAULT_JITTER_SECONDS),
+                        lock=lock)
+    daemon.install_signal_handlers()
+
+    print(t('sync.daemon_started', minutes=interval_minutes))
+    daemon.run()
+    print(t('sync.daemon_stopped', runs=daemon.stats['runs'], failed=daemon.stats['failed'],
+            skipped=daemon.stats['skipped']))
+
+
+def run_interactive(db: Database):
+    """Ask what to synchronize (the menu shown without command-line options)."""
     print(f"\n{t('sync.choose_action')}:")
     print("1. Synchronize subscriptions (update channel list)")
     print("2. Download new videos")
@@ -200,24 +1106,87 @@ def main():
     choice = input(f"\n{t('sync.your_choice', min=1, max=3)}: ").strip()
 
     if choice == '1':
-        sync_subscriptions(db)
+        run_sync(db, videos=False)
     elif choice == '2':
         print("\nHow many videos to download from each channel?")
         try:
             max_videos = int(input(t('sync.video_count_default', default=5)).strip() or "5")
         except ValueError:
             max_videos = 5
-        sync_videos(db, max_videos_per_channel=max_videos)
+        run_sync(db, subscriptions=False, max_videos=max_videos)
     elif choice == '3':
-        sync_subscriptions(db)
-        print(f"\n{'=' * 60}")
-        print(t('sync.transition_to_videos'))
-        print('=' * 60)
-        sync_videos(db, max_videos_per_channel=5)
+        run_sync(db, max_videos=5)
     else:
         print(f"❌ {t('sync.invalid_choice')}")
 
 
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Synchronize subscriptions and videos. Without options, an interactive menu is shown.')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--subscriptions', action='store_true',
+                      help='synchronize subscriptions only')
+    mode.add_argument('--videos', action='store_true', help='download new videos only')
+    mode.add_argument('--full', action='store_true', help='subscriptions and videos')
+    parser.add_argument('--max-videos', type=int, default=None,
+                        help='videos per channel (default: max_videos_per_channel)')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted video sync (videos only unless --full)')
+    parser.add_argument('--parallel-accounts', type=int, default=None, metavar='N',
+                        help='synchronize personal channels in N worker processes')
+    parser.add_argument('--plan', action='store_true',
+                        help='predict the API calls, quota and duration of the sync and exit')
+    parser.add_argument('--timings', action='store_true',
+                        help='print per-stage timing histograms at the end of every run')
+    parser.add_argument('--timings-json', default=None, metavar='FILE',
+                        help='also write the timing histograms to FILE (implies --timings)')
+    parser.add_argument('--daemon', action='store_true',
+                        help='keep running and synchronize every --interval minutes')
+    parser.add_argument('--interval', type=float, default=None,
+                        help='minutes between runs in daemon mode (default: sync_interval_minutes)')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    config = load_config()
+
+    print("=" * 60)
+    print(f"{t('app.name')} - {t('sync.title')}")
+    print("=" * 60)
+
+    db = Database()
+    timer.enabled = args.timings or bool(args.timings_json)
+
+    if not (args.subscriptions or args.videos or args.full or args.daemon or args.resume
+            or args.parallel_accounts or args.plan):
+        run_interactive(db)
+        return
+
+    subscriptions = not (args.videos or (args.resume and not args.full))
+    videos = not args.subscriptions
+    max_videos = args.max_videos or config.get('max_videos_per_channel', 5)
+
+    if args.plan:
+        print_sync_plan(plan_sync(db, subscriptions=subscriptions, videos=videos,
+                                  parallel_accounts=args.parallel_accounts))
+        return
+
+    if args.daemon:
+        interval = args.interval or config.get('sync_interval_minutes', 30)
+        run_daemon(db, config, subscriptions, videos, max_videos, interval,
+                   parallel_accounts=args.parallel_accounts, timings_json=args.timings_json)
+        return
+
+    with get_sync_lock(db) as locked:
+        if not locked:
+            print(f"⚠️  {t('sync.already_running')}")
+            sys.exit(1)
+        run_sync(db, subscriptions=subscriptions, videos=videos, max_videos=max_videos,
+                 resume=args.resume, parallel_accounts=args.parallel_accounts,
+                 timings_json=args.timings_json)
+
+
 if __name__ == '__main__':
     try:
         main()
@@ -226,6 +1195,5 @@ if __name__ == '__main__':
         sys.exit(0)
     except Exception as e:
         print(f"\n❌ Critical error: {e}")
-        import traceback
         traceback.print_exc()
         sys.exit(1)
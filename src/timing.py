@@ -0,0 +1,106 @@
+"""
+Per-stage timing of synchronization.
+
+Code paths wrap their stages in `timer.span('api.videos.list')`; while the
+timer is enabled, every span adds a sample to the histogram of its stage
+(count, p50, p95, max). While it is disabled (the default), span() returns
+a shared no-op context manager, so instrumented code costs one method call.
+"""
+
+import contextlib
+import json
+import math
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ('timer', 'stage', 'started')
+
+    def __init__(self, timer: 'StageTimer', stage: str):
+        self.timer = timer
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = self.timer.clock()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.record(self.stage, self.timer.clock() - self.started)
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted samples."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(math.ceil(fraction * len(ordered)) - 1, 0))]
+
+
+class StageTimer:
+    """
+    Thread-safe collection of stage durations (in seconds).
+    """
+
+    def __init__(self, enabled: bool = False, clock: Callable[[], float] = time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self._samples: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def span(self, stage: str):
+        """Context manager timing one execution of a stage."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage: str, seconds: float):
+        """Adds a sample to a stage."""
+        with self._lock:
+            self._samples.setdefault(stage, []).append(seconds)
+
+    def samples(self) -> Dict[str, List[float]]:
+        """A copy of the raw samples, e.g. to merge() them in another process."""
+        with self._lock:
+            return {stage: list(values) for stage, values in self._samples.items()}
+
+    def merge(self, samples: Dict[str, List[float]]):
+        """Adds samples collected by another timer."""
+        with self._lock:
+            for stage, values in samples.items():
+                self._samples.setdefault(stage, []).extend(values)
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        Histogram of every stage, sorted by stage name.
+
+        Returns:
+            {stage: {'count', 'total', 'p50', 'p95', 'max'}} with times in seconds.
+        """
+        summary = {}
+        for stage, values in sorted(self.samples().items()):
+            ordered = sorted(values)
+            summary[stage] = {
+                'count': len(ordered),
+                'total': sum(ordered),
+                'p50': percentile(ordered, 0.50),
+                'p95': percentile(ordered, 0.95),
+                'max': ordered[-1],
+            }
+        return summary
+
+    def export(self, path: str):
+        """Writes the summary to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+
+
+# Process-wide timer used by YouTubeAPI and the sync functions
+timer = StageTimer()
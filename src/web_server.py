@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 """
 Flask Web Server for YouTube Dashboard
+
+create_app() builds an application with its own database and sync job
+runner; main() runs it on the Flask development server, src/wsgi.py
+under a production WSGI server.
 """
 
 import os
 import sys
 import json
+import functools
+import threading
+import time
 import webbrowser
 import logging
-from flask import Flask, jsonify, request, send_from_directory
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from flask import (Blueprint, Flask, Response, current_app, jsonify, request, send_from_directory,
+                   stream_with_context)
 from flask_cors import CORS
 
 # Add the root folder to the path
@@ -17,36 +27,147 @@ project_root = os.path.dirname(current_dir)
 sys.path.insert(0, project_root)
 
 from src.db_manager import Database
+from src.rss_feed import parse_feed, DEFAULT_FEED_URL
+from src.sync_jobs import SyncJobRunner, event_stream
+from src.sync_subscriptions import get_registry, create_quota_ledger, get_sync_lock, run_sync
+from src.websub import (LeaseManager, PushIngestor, DEFAULT_HUB_URL, DEFAULT_LEASE_SECONDS,
+                        DEFAULT_FLUSH_INTERVAL, verify_signature)
 from locales import load_locale_from_config, t
 
 # Load locale
 load_locale_from_config()
 
-# Create Flask application
-app = Flask(__name__, 
-            static_folder=os.path.join(project_root, 'frontend'),
-            static_url_path='')
-CORS(app)  # Enable CORS for development
-
-# Database
-db = Database()
-
-# Настройка логирования
-# Проверяем, находимся ли мы в тестовой среде
-is_testing = 'pytest' in sys.modules or 'PYTEST_CURRENT_TEST' in os.environ
-
-if is_testing:
-    # В тестовой среде используем простой логгер без файлов
-    logger = logging.getLogger(__name__)
-    logger.setLevel(logging.DEBUG)
-    if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-else:
-    # В рабочей среде настраиваем полное логирование
-    # Создаём директорию logs если она не существует
+logger = logging.getLogger(__name__)
+
+# Routes of the dashboard; create_app() registers them on each application
+api = Blueprint('api', __name__)
+
+DEFAULT_RESPONSE_CACHE_SECONDS = 300    # upper bound on serving a cached response
+RESPONSE_CACHE_ENTRIES = 256            # cached (route, query) pairs per application
+
+
+class ResponseCache:
+    """
+    Responses of read-only endpoints, valid while the data version is unchanged.
+
+    An entry is stored per route and query string together with the
+    Database.data_version() read before the response was built, so any
+    write since then turns the next request into a miss. Entries also
+    expire after max_age seconds, in case a write by another process goes
+    unnoticed by the file timestamps. max_age=0 disables the cache.
+    """
+
+    def __init__(self, max_age: float = DEFAULT_RESPONSE_CACHE_SECONDS,
+                 max_entries: int = RESPONSE_CACHE_ENTRIES, clock=time.monotonic):
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()        # (route, query) -> (version, stored at, body)
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """Get the cached body for the key if it was built from this data version"""
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] == version and self.clock() - entry[1] < self.max_age:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[2]
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, key, version, body):
+        if self.max_age <= 0:
+            return
+        with self._lock:
+            self.entries[key] = (version, self.clock(), body)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return dict(self.stats, entries=len(self.entries),
+                        hit_rate=self.stats['hits'] / lookups if lookups else 0.0)
+
+
+class DashboardState:
+    """
+    Objects shared by the requests of one application.
+
+    Args:
+        config: Settings (config/settings.json).
+        db: Database the application serves.
+    """
+
+    def __init__(self, config, db):
+        self.config = config
+        self.db = db
+        # Jobs are kept in the database; syncs run one at a time across all processes
+        self.sync_jobs = SyncJobRunner(db, functools.partial(run_sync_job, db))
+        self.response_cache = ResponseCache(
+            max_age=config.get('response_cache_seconds', DEFAULT_RESPONSE_CACHE_SECONDS))
+        # WebSub push notifications (set up by start_websub())
+        self.lease_manager = None
+        self.push_ingestor = None
+
+
+def get_state():
+    """Get the DashboardState of the application handling the request"""
+    return current_app.extensions['dashboard']
+
+
+def cached_response(view):
+    """Serve a read-only endpoint from the response cache until the data changes"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        state = get_state()
+        key = (request.path, tuple(sorted(request.args.items(multi=True))))
+        # Read before the response is built: a write during the request makes the entry stale
+        version = state.db.data_version()
+        
+        body = state.response_cache.get(key, version)
+        if body is not None:
+            return current_app.response_class(body, mimetype='application/json',
+                                              headers={'X-Cache': 'HIT'})
+        
+        response = current_app.make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            state.response_cache.put(key, version, response.get_data())
+        response.headers['X-Cache'] = 'MISS'
+        return response
+    
+    return wrapper
+
+
+def create_app(config=None, db=None):
+    """
+    Create the dashboard application.
+
+    Args:
+        config: Settings; read from config/settings.json if omitted.
+        db: Database to serve; by default the database_path of the config.
+    """
+    if config is None:
+        config = load_config()
+    if db is None:
+        db = Database(config.get('database_path', 'database/videos.db'))
+    
+    app = Flask(__name__,
+                static_folder=os.path.join(project_root, 'frontend'),
+                static_url_path='')
+    CORS(app)  # Enable CORS for development
+    
+    app.extensions['dashboard'] = DashboardState(config, db)
+    app.register_blueprint(api)
+    return app
+
+
+def configure_logging():
+    """Log to logs/web_server.log and the console (done by the server entry points)"""
     logs_dir = os.path.join(project_root, 'logs')
     os.makedirs(logs_dir, exist_ok=True)
 
@@ -58,23 +179,24 @@ else:
             logging.StreamHandler()
         ]
     )
-    logger = logging.getLogger(__name__)
 
 
 # === Static Files ===
 
-@app.route('/')
+@api.route('/')
 def index():
     """Main page"""
-    return send_from_directory(app.static_folder, 'index.html')
+    return send_from_directory(current_app.static_folder, 'index.html')
 
 
 # === API Endpoints ===
 
-@app.route('/api/channels', methods=['GET'])
+@api.route('/api/channels', methods=['GET'])
+@cached_response
 def get_channels():
     """Get all personal channels"""
     try:
+        db = get_state().db
         channels = db.get_all_personal_channels()
         
         # Add statistics for each channel
@@ -101,13 +223,22 @@ def get_channels():
         }), 500
 
 
-@app.route('/api/channels/<int:channel_id>/videos', methods=['GET'])
+@api.route('/api/channels/<int:channel_id>/videos', methods=['GET'])
 def get_channel_videos(channel_id):
     """Get videos for channel"""
     try:
+        db = get_state().db
         include_watched = request.args.get('include_watched', 'true').lower() == 'true'
         
-        videos = db.get_videos_by_personal_channel(channel_id, include_watched=include_watched)
+        # Optional duration range in seconds (e.g. max_duration=60 for Shorts)
+        filters = {}
+        for name in ('min_duration', 'max_duration'):
+            value = request.args.get(name, type=int)
+            if value is not None:
+                filters[name] = value
+        
+        videos = db.get_videos_by_personal_channel(channel_id, include_watched=include_watched,
+                                                   **filters)
         
         # Sort by publication date (newest first)
         videos.sort(key=lambda x: x['published_at'], reverse=True)
@@ -124,10 +255,11 @@ def get_channel_videos(channel_id):
         }), 500
 
 
-@app.route('/api/videos/<int:video_id>/watch', methods=['POST'])
+@api.route('/api/videos/<int:video_id>/watch', methods=['POST'])
 def mark_video_watched(video_id):
     """Mark video as watched"""
     try:
+        db = get_state().db
         db.mark_video_watched(video_id)
         
         return jsonify({
@@ -142,10 +274,11 @@ def mark_video_watched(video_id):
         }), 500
 
 
-@app.route('/api/videos/<int:video_id>', methods=['GET'])
+@api.route('/api/videos/<int:video_id>', methods=['GET'])
 def get_video(video_id):
     """Get video information (including authuser)"""
     try:
+        db = get_state().db
         video = db.get_video_by_id(video_id)
         
         if not video:
@@ -166,10 +299,11 @@ def get_video(video_id):
         }), 500
 
 
-@app.route('/api/channels/<int:channel_id>/clear', methods=['POST'])
+@api.route('/api/channels/<int:channel_id>/clear', methods=['POST'])
 def clear_watched_videos(channel_id):
     """Clear watched videos for channel"""
     try:
+        db = get_state().db
         db.clear_watched_videos(channel_id)
         
         return jsonify({
@@ -184,10 +318,12 @@ def clear_watched_videos(channel_id):
         }), 500
 
 
-@app.route('/api/stats', methods=['GET'])
+@api.route('/api/stats', methods=['GET'])
+@cached_response
 def get_stats():
     """Get overall statistics"""
     try:
+        db = get_state().db
         channels = db.get_all_personal_channels()
         
         total_videos = 0
@@ -220,10 +356,11 @@ def get_stats():
         }), 500
 
 
-@app.route('/api/errors', methods=['GET'])
+@api.route('/api/errors', methods=['GET'])
 def get_errors():
     """Get unresolved synchronization errors"""
     try:
+        db = get_state().db
         errors = db.get_unresolved_errors()
         
         return jsonify({
@@ -238,6 +375,237 @@ def get_errors():
         }), 500
 
 
+@api.route('/api/sync/runs', methods=['GET'])
+def get_sync_runs():
+    """Get recent sync runs (timings, API calls, quota units, results)"""
+    try:
+        db = get_state().db
+        limit = min(max(request.args.get('limit', 50, type=int), 1), 500)
+        kind = request.args.get('kind')
+        
+        return jsonify({
+            'success': True,
+            'data': db.get_sync_runs(limit=limit, kind=kind)
+        })
+    except Exception as e:
+        logger.error(f"Error in get_sync_runs: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+
+@api.route('/api/cache', methods=['GET'])
+def get_cache_stats():
+    """Get hit-rate metrics of the response cache"""
+    return jsonify({
+        'success': True,
+        'data': get_state().response_cache.metrics()
+    })
+
+
+# === Sync Jobs ===
+
+def run_sync_job(db, options, output):
+    """Run a sync requested through POST /api/sync (on the job worker thread)"""
+    # Keeps the job from overlapping a sync started from the command line or the daemon
+    with get_sync_lock(db) as locked:
+        if not locked:
+            raise RuntimeError(t('sync.already_running'))
+        run_sync(db, subscriptions=options['subscriptions'], videos=options['videos'],
+                 max_videos=options['max_videos'], resume=options['resume'], output=output)
+
+
+def parse_sync_options(body, config):
+    """Validate the JSON body of POST /api/sync"""
+    mode = body.get('mode', 'full')
+    if mode not in ('full', 'subscriptions', 'videos'):
+        raise ValueError(f"Unknown mode: {mode}")
+    
+    max_videos = body.get('max_videos', config.get('max_videos_per_channel', 5))
+    if not isinstance(max_videos, int) or isinstance(max_videos, bool) or max_videos < 1:
+        raise ValueError('max_videos must be a positive integer')
+    
+    return {
+        'subscriptions': mode != 'videos',
+        'videos': mode != 'subscriptions',
+        'max_videos': max_videos,
+        'resume': bool(body.get('resume', False))
+    }
+
+
+@api.route('/api/sync', methods=['POST'])
+def start_sync():
+    """Queue a sync, or join the queued or running one with the same options"""
+    state = get_state()
+    try:
+        options = parse_sync_options(request.get_json(silent=True) or {}, state.config)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    try:
+        job, created = state.sync_jobs.submit(options)
+        
+        return jsonify({
+            'success': True,
+            'created': created,
+            'data': job.to_dict(include_events=False)
+        }), 202
+    except Exception as e:
+        logger.error(f"Error in start_sync: {str(e)}", exc_info=True)
+        return jsonify({
+            'success': False,
+            'error': 'Internal server error'
+        }), 500
+
+
+@api.route('/api/sync', methods=['GET'])
+def get_sync_jobs():
+    """Get queued and running sync jobs"""
+    sync_jobs = get_state().sync_jobs
+    return jsonify({
+        'success': True,
+        'data': [job.to_dict(include_events=False) for job in sync_jobs.active()],
+        'stats': sync_jobs.metrics()
+    })
+
+
+@api.route('/api/sync/<job_id>', methods=['GET'])
+def get_sync_job(job_id):
+    """Get the status and progress log of a sync job"""
+    job = get_state().sync_jobs.get(job_id)
+    
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    
+    data = job.to_dict()
+    data['events'] = data['events'][request.args.get('after', 0, type=int):]
+    
+    return jsonify({
+        'success': True,
+        'data': data
+    })
+
+
+@api.route('/api/sync/<job_id>/events', methods=['GET'])
+def stream_sync_job(job_id):
+    """Stream the progress of a sync job as Server-Sent Events"""
+    job = get_state().sync_jobs.get(job_id)
+    
+    if not job:
+        return jsonify({
+            'success': False,
+            'error': 'Job not found'
+        }), 404
+    
+    # A reconnecting EventSource continues after the last event it received
+    after = request.headers.get('Last-Event-ID', type=int) or request.args.get('after', 0, type=int)
+    
+    return Response(stream_with_context(event_stream(job, after=after)),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# === WebSub ===
+
+@api.route('/websub/callback', methods=['GET'])
+def websub_verify():
+    """Confirm a hub (un)subscription request"""
+    lease_manager = get_state().lease_manager
+    if lease_manager is None:
+        return '', 404
+    
+    challenge = lease_manager.verify(
+        request.args.get('hub.mode'),
+        request.args.get('hub.topic'),
+        request.args.get('hub.challenge'),
+        request.args.get('hub.lease_seconds', type=int)
+    )
+    
+    if challenge is None:
+        return '', 404
+    return challenge, 200, {'Content-Type': 'text/plain'}
+
+
+@api.route('/websub/callback', methods=['POST'])
+def websub_notify():
+    """Receive a push notification with new or updated videos"""
+    state = get_state()
+    lease_manager, push_ingestor = state.lease_manager, state.push_ingestor
+    if push_ingestor is None:
+        return '', 404
+    
+    body = request.get_data()
+    
+    # Unsigned or forged notifications are acknowledged (as WebSub requires) but ignored
+    if not verify_signature(
+            lease_manager.secret, body, request.headers.get('X-Hub-Signature')):
+        logger.warning("WebSub notification with invalid signature ignored")
+        return '', 204
+    
+    try:
+        entries = parse_feed(body)
+    except ET.ParseError as e:
+        logger.warning(f"Invalid WebSub notification: {e}")
+        return '', 400
+    
+    push_ingestor.enqueue(entries)
+    return '', 204
+
+
+def create_hydration_client(db, ledger):
+    """Get an authorized API client for videos().list calls"""
+    for channel in db.get_all_personal_channels():
+        token_file = channel['oauth_token_path']
+        if token_file and os.path.exists(token_file):
+            return get_registry().get(token_file, channel_id=channel['youtube_channel_id'],
+                                      quota_ledger=ledger)
+    
+    raise RuntimeError('No authorized personal channels')
+
+
+def start_websub(state):
+    """
+    Start the push ingestor and the lease renewal thread of an application
+
+    Raises:
+        ValueError: If websub_secret is empty.
+    """
+    config, db = state.config, state.db
+    
+    lease_manager = LeaseManager(
+        db,
+        callback_url=config['websub_callback_url'],
+        hub_url=config.get('websub_hub_url', DEFAULT_HUB_URL),
+        lease_seconds=config.get('websub_lease_seconds', DEFAULT_LEASE_SECONDS),
+        secret=config.get('websub_secret'),
+        feed_url=config.get('rss_feed_url', DEFAULT_FEED_URL)
+    )
+    ledger = create_quota_ledger(db)
+    push_ingestor = PushIngestor(
+        db, functools.partial(create_hydration_client, db, ledger), ledger=ledger,
+        flush_interval=config.get('websub_flush_interval_seconds', DEFAULT_FLUSH_INTERVAL)
+    )
+    push_ingestor.start()
+    state.lease_manager, state.push_ingestor = lease_manager, push_ingestor
+    
+    stop_event = threading.Event()
+    threading.Thread(
+        target=lease_manager.run,
+        args=(stop_event, config.get('websub_renew_interval_minutes', 60) * 60),
+        name='websub-leases',
+        daemon=True
+    ).start()
+    
+    return stop_event
+
+
 # === Server Launch ===
 
 def load_config():
@@ -254,6 +622,8 @@ def load_config():
 def main():
     """Launch web server"""
     config = load_config()
+    configure_logging()
+    app = create_app(config)
     port = config.get('web_server_port', 8080)
     open_browser = config.get('open_browser_on_start', True)
     
@@ -266,11 +636,19 @@ def main():
     print(f"[OK] Press Ctrl+C to stop")
     print("=" * 60)
     
+    # Start WebSub only once the callback URL is reachable from the hub
+    if config.get('websub_enabled') and config.get('websub_callback_url'):
+        try:
+            start_websub(app.extensions['dashboard'])
+            print(f"[OK] WebSub callback: {config['websub_callback_url']}")
+        except ValueError as e:
+            print(f"[!] WebSub disabled: {e}")
+    
     # Open browser
     if open_browser:
         webbrowser.open(url)
 
-    # Launch Flask
+    # Launch the Flask development server (src/wsgi.py serves production WSGI servers)
     app.run(
         host='0.0.0.0',
         port=port,
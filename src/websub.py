@@ -0,0 +1,346 @@
+"""
+WebSub (PubSubHubbub) push notifications for new uploads.
+
+YouTube publishes every channel feed through a WebSub hub. The lease
+manager keeps a hub subscription for every channel with active
+subscriptions, and the push ingestor turns notifications into stored
+videos, hydrating the new IDs in batches.
+"""
+
+import hashlib
+import hmac
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+import requests
+
+from src.db_manager import Database
+from src.quota import QuotaLedger
+from src.rss_feed import DEFAULT_FEED_URL
+from src.youtube_api import YouTubeAPI
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HUB_URL = 'https://pubsubhubbub.appspot.com/subscribe'
+DEFAULT_LEASE_SECONDS = 5 * 24 * 3600
+RENEW_MARGIN_SECONDS = 24 * 3600        # renew leases expiring within a day
+PENDING_TIMEOUT_SECONDS = 3600          # re-request unverified subscriptions after an hour
+DEFAULT_FLUSH_INTERVAL = 30.0           # seconds
+DEFAULT_BATCH_SIZE = 50                 # IDs per videos.list call
+
+
+def topic_url(channel_id: str, feed_url: str = DEFAULT_FEED_URL) -> str:
+    """Gets the WebSub topic (feed URL) of a channel."""
+    return f"{feed_url}?{urlencode({'channel_id': channel_id})}"
+
+
+def channel_id_from_topic(topic: Optional[str]) -> Optional[str]:
+    """Extracts the channel ID from a topic URL."""
+    if not topic:
+        return None
+    return parse_qs(urlparse(topic).query).get('channel_id', [None])[0]
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """
+    Checks the X-Hub-Signature header of a notification.
+
+    Args:
+        secret: The hub.secret sent with the subscription request.
+        body: The raw request body.
+        signature: The header value, e.g. 'sha1=<hex digest>'.
+    """
+    if not secret or not signature or '=' not in signature:
+        return False
+
+    algorithm, digest = signature.split('=', 1)
+    if algorithm not in hashlib.algorithms_guaranteed:
+        return False
+
+    expected = hmac.new(secret.encode('utf-8'), body, algorithm).hexdigest()
+    return hmac.compare_digest(expected, digest)
+
+
+class LeaseManager:
+    """
+    Keeps hub subscriptions in line with the active rows in `subscriptions`.
+
+    Requests are asynchronous: the hub confirms them through a GET to the
+    callback URL, which is answered by verify().
+
+    A secret is required: the callback is public, and only notifications
+    signed with it are accepted.
+
+    Raises:
+        ValueError: If the secret is empty.
+    """
+
+    def __init__(self, db: Database, callback_url: str, hub_url: str = DEFAULT_HUB_URL,
+                 lease_seconds: int = DEFAULT_LEASE_SECONDS, secret: Optional[str] = None,
+                 feed_url: str = DEFAULT_FEED_URL, session: Optional[requests.Session] = None,
+                 timeout: float = 10.0):
+        if not secret:
+            raise ValueError('websub_secret must be set to subscribe to WebSub notifications')
+
+        self.db = db
+        self.callback_url = callback_url
+        self.hub_url = hub_url
+        self.lease_seconds = lease_seconds
+        self.secret = secret
+        self.feed_url = feed_url
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def request(self, channel_id: str, mode: str = 'subscribe'):
+        """
+        Sends a subscribe/unsubscribe request to the hub.
+
+        The request is marked as pending first: the hub may verify it before
+        the response arrives. A failed request is retried after
+        PENDING_TIMEOUT_SECONDS.
+
+        Raises:
+            requests.RequestException: If the hub rejects the request.
+        """
+        data = {
+            'hub.callback': self.callback_url,
+            'hub.topic': topic_url(channel_id, self.feed_url),
+            'hub.mode': mode,
+            'hub.verify': 'async',
+        }
+        if mode == 'subscribe':
+            data['hub.lease_seconds'] = str(self.lease_seconds)
+            data['hub.secret'] = self.secret
+
+        self.db.mark_websub_requested(channel_id)
+        response = self.session.post(self.hub_url, data=data, timeout=self.timeout)
+        response.raise_for_status()
+
+    def renew(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Subscribes channels whose lease is missing or about to expire and
+        unsubscribes channels that are no longer followed.
+
+        Returns:
+            {'subscribed': n, 'unsubscribed': n, 'failed': n}
+        """
+        now = now or datetime.now()
+        active = self.db.get_active_youtube_channel_ids()
+        leases = self.db.get_websub_leases()
+        stats = {'subscribed': 0, 'unsubscribed': 0, 'failed': 0}
+
+        requests_to_send = [(channel_id, 'subscribe') for channel_id in active
+                            if self._needs_renewal(leases.get(channel_id), now)]
+
+        active_ids = set(active)
+        for channel_id, lease in leases.items():
+            if channel_id in active_ids:
+                continue
+            expires_at = lease['websub_lease_expires_at']
+            if expires_at and datetime.fromisoformat(expires_at) > now:
+                requests_to_send.append((channel_id, 'unsubscribe'))
+            else:
+                self.db.update_websub_lease(channel_id, None)
+
+        for channel_id, mode in requests_to_send:
+            try:
+                self.request(channel_id, mode)
+                stats['subscribed' if mode == 'subscribe' else 'unsubscribed'] += 1
+            except requests.RequestException as e:
+                stats['failed'] += 1
+                logger.warning(f"WebSub {mode} failed for {channel_id}: {e}")
+
+        return stats
+
+    def _needs_renewal(self, lease: Optional[Dict], now: datetime) -> bool:
+        if not lease:
+            return True
+
+        requested_at = lease['websub_requested_at']
+        if requested_at and now - datetime.fromisoformat(requested_at) < timedelta(
+                seconds=PENDING_TIMEOUT_SECONDS):
+            return False
+
+        expires_at = lease['websub_lease_expires_at']
+        return not expires_at or datetime.fromisoformat(expires_at) - now < timedelta(
+            seconds=RENEW_MARGIN_SECONDS)
+
+    def verify(self, mode: str, topic: str, challenge: str,
+               lease_seconds: Optional[int] = None) -> Optional[str]:
+        """
+        Answers a hub verification request.
+
+        Returns:
+            The challenge to echo back, or None if the request is not expected.
+        """
+        channel_id = channel_id_from_topic(topic)
+        if not channel_id or not challenge:
+            return None
+
+        is_active = channel_id in set(self.db.get_active_youtube_channel_ids())
+
+        if mode == 'subscribe' and is_active:
+            expires_at = datetime.now() + timedelta(seconds=lease_seconds or self.lease_seconds)
+            self.db.update_websub_lease(channel_id, expires_at.isoformat())
+            return challenge
+
+        if mode == 'unsubscribe' and not is_active:
+            self.db.update_websub_lease(channel_id, None)
+            return challenge
+
+        return None
+
+    def run(self, stop_event: threading.Event, interval: float):
+        """Renews leases every `interval` seconds until stop_event is set."""
+        while not stop_event.is_set():
+            try:
+                stats = self.renew()
+                if any(stats.values()):
+                    logger.info(f"WebSub leases renewed: {stats}")
+            except Exception as e:
+                logger.error(f"WebSub lease renewal failed: {e}", exc_info=True)
+            stop_event.wait(interval)
+
+
+class PushIngestor:
+    """
+    Queues video IDs from push notifications and stores them in batches.
+
+    Only IDs missing from at least one active subscription are hydrated
+    through videos().list, so repeated notifications (title edits, etc.)
+    cost no quota. A video is only stored if videos().list reports the
+    channel that the notification named.
+    """
+
+    def __init__(self, db: Database, api_factory: Callable[[], YouTubeAPI],
+                 ledger: Optional[QuotaLedger] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.db = db
+        self.api_factory = api_factory
+        self.ledger = ledger
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue: Dict[str, str] = {}    # video_id -> channel_id
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def enqueue(self, entries: Iterable[Dict]) -> int:
+        """
+        Queues feed entries (see rss_feed.parse_feed).
+
+        Returns:
+            The number of entries queued.
+        """
+        queued = 0
+        with self._lock:
+            for entry in entries:
+                if entry.get('video_id') and entry.get('channel_id'):
+                    self._queue[entry['video_id']] = entry['channel_id']
+                    queued += 1
+            if len(self._queue) >= self.batch_size:
+                self._wake.set()
+        return queued
+
+    def pending(self) -> int:
+        """Number of queued video IDs."""
+        with self._lock:
+            return len(self._queue)
+
+    def flush(self) -> int:
+        """
+        Hydrates and stores the queued videos.
+
+        Returns:
+            The number of new video rows.
+        """
+        with self._lock:
+            queue, self._queue = self._queue, {}
+        if not queue:
+            return 0
+
+        subscriptions = self.db.get_active_subscriptions_by_youtube_channel(
+            sorted(set(queue.values())))
+        known_ids = self.db.get_video_ids_by_subscription(
+            [sub['id'] for subs in subscriptions.values() for sub in subs])
+
+        missing = [video_id for video_id, channel_id in queue.items()
+                   if any(video_id not in known_ids[sub['id']]
+                          for sub in subscriptions[channel_id])]
+        if not missing:
+            return 0
+
+        try:
+            videos = self.api_factory().get_videos(missing)
+        except Exception:
+            # Keep the IDs for the next attempt
+            with self._lock:
+                for video_id in missing:
+                    self._queue.setdefault(video_id, queue[video_id])
+            raise
+        finally:
+            if self.ledger is not None:
+                self.ledger.flush()
+
+        new_count = 0
+        for video in videos:
+            channel_id = queue[video['video_id']]
+            if video.get('channel_id') != channel_id:
+                logger.warning(f"WebSub: video {video['video_id']} belongs to "
+                               f"{video.get('channel_id')}, not {channel_id}; ignored")
+                continue
+            for sub in subscriptions[channel_id]:
+                if video['video_id'] in known_ids[sub['id']]:
+                    continue
+                video_id = self.db.add_video(
+                    subscription_id=sub['id'],
+                    youtube_video_id=video['video_id'],
+                    title=video['title'],
+                    thumbnail=video['thumbnail'],
+                    published_at=video['published_at'],
+                    duration=video['duration'],
+                    description=video.get('description'),
+                    view_count=video.get('view_count'),
+                    duration_seconds=video.get('duration_seconds')
+                )
+                if video_id:
+                    new_count += 1
+
+        return new_count
+
+    def start(self):
+        """Starts the background flush thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='websub-ingestor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the background thread after a final flush."""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                new_count = self.flush()
+                if new_count:
+                    logger.info(f"WebSub: stored {new_count} new videos")
+            except Exception as e:
+                logger.error(f"WebSub ingestion failed: {e}", exc_info=True)
+            if self._stop.is_set():
+                return
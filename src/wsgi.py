@@ -0,0 +1,31 @@
+"""
+WSGI entry point for running the dashboard under a production server.
+
+    gunicorn -w 4 -b 0.0.0.0:8080 src.wsgi:app                 (Linux, macOS)
+    waitress-serve --listen=0.0.0.0:8080 --threads=8 src.wsgi:app  (Windows)
+
+Every gunicorn worker process imports this module and builds its own
+application with create_app(). Sync jobs started with POST /api/sync are
+kept in the database, so any worker answers for them. Run WebSub
+(websub_enabled) with a single worker process, so leases are renewed and
+notifications batched in one place.
+"""
+
+import os
+import sys
+
+# Add the root folder to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.web_server import configure_logging, create_app, load_config, logger, start_websub
+
+configure_logging()
+
+config = load_config()
+app = create_app(config)
+
+if config.get('websub_enabled') and config.get('websub_callback_url'):
+    try:
+        start_websub(app.extensions['dashboard'])
+    except ValueError as e:
+        logger.error(f"WebSub disabled: {e}")
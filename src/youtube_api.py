@@ -1,11 +1,17 @@
+import functools
 import os
 import pickle
+import threading
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from typing import List, Dict, Optional
-from datetime import datetime, timezone
-import isodate
+from googleapiclient.errors import HttpError
+from typing import Iterator, List, Dict, Optional, Tuple
+from datetime import datetime
+from src.duration import parse_duration
+from src.quota import QuotaLedger
+from src.request_executor import RequestExecutor, NOT_MODIFIED, get_error_status
+from src.timing import timer
 
 
 class YouTubeAPI:
@@ -16,18 +22,72 @@ class YouTubeAPI:
     SCOPES = ['https://www.googleapis.com/auth/youtube.readonly']
     API_SERVICE_NAME = 'youtube'
     API_VERSION = 'v3'
+    MAX_IDS_PER_REQUEST = 50
+
+    # Partial responses (fields=): only what the parsers below read
+    FIELDS = {
+        'channels.mine': 'items(id,snippet/title)',
+        'channels.uploads': 'items/contentDetails/relatedPlaylists/uploads',
+        'subscriptions': ('etag,nextPageToken,'
+                          'items/snippet(title,resourceId/channelId,thumbnails/default/url)'),
+        'playlistItems': 'items/contentDetails/videoId',
+        'videos': ('items(id,snippet(channelId,title,description,publishedAt,thumbnails/medium/url),'
+                   'contentDetails/duration,statistics/viewCount)'),
+    }
     
-    def __init__(self, credentials_file: str = 'config/client_secrets.json'):
+    def __init__(self, credentials_file: str = 'config/client_secrets.json',
+                 quota_ledger: Optional[QuotaLedger] = None,
+                 executor: Optional[RequestExecutor] = None,
+                 api_endpoint: Optional[str] = None):
         self.credentials_file = credentials_file
+        self.quota_ledger = quota_ledger
+        self.executor = executor or RequestExecutor()
+        # Base URL of another server with the same API (e.g. the fake server in benchmarks/)
+        self.api_endpoint = api_endpoint
+        self.credentials = None
         self.service = None
         self.channel_info = None
+
+    def _execute(self, request, endpoint: str) -> Dict:
+        """
+        Executes an API request through the rate limiter and retry policy,
+        recording the quota cost of every attempt.
+
+        Args:
+            request: A googleapiclient HttpRequest.
+            endpoint: The endpoint name used for quota accounting (e.g. 'videos.list').
+
+        Returns:
+            The API response.
+        """
+        on_attempt = None
+        if self.quota_ledger is not None:
+            # Failed requests are charged as well
+            on_attempt = functools.partial(self.quota_ledger.record, endpoint)
+        # Includes retries and rate limiter waits
+        with timer.span('api.' + endpoint):
+            return self.executor.execute(request, on_attempt=on_attempt)
     
-    def authenticate(self, token_file: str) -> bool:
+    def _build_service(self, creds):
+        """
+        Builds the service object from the discovery document bundled with
+        google-api-python-client, so no discovery request is sent.
+        """
+        options = {}
+        if self.api_endpoint:
+            options['client_options'] = {'api_endpoint': self.api_endpoint}
+        with timer.span('api.build_service'):
+            return build(self.API_SERVICE_NAME, self.API_VERSION, credentials=creds,
+                         static_discovery=True, cache_discovery=False, **options)
+
+    def authenticate(self, token_file: str, channel_id: Optional[str] = None) -> bool:
         """
         Authenticates via OAuth 2.0.
 
         Args:
             token_file: Path to the file with saved tokens.
+            channel_id: The known YouTube channel ID of the account. When given,
+                the channels().list(mine=True) request is skipped.
 
         Returns:
             True if authentication is successful.
@@ -43,7 +103,8 @@ class YouTubeAPI:
         if not creds or not creds.valid:
             if creds and creds.expired and creds.refresh_token:
                 try:
-                    creds.refresh(Request())
+                    with timer.span('oauth.refresh'):
+                        creds.refresh(Request())
                 except Exception as e:
                     print(f"Error refreshing token: {e}")
                     creds = None
@@ -66,25 +127,52 @@ class YouTubeAPI:
                 pickle.dump(creds, token)
 
         # Create the service object
-        self.service = build(self.API_SERVICE_NAME, self.API_VERSION, credentials=creds)
+        self.credentials = creds
+        self.service = self._build_service(creds)
 
         # Get channel information
-        self.channel_info = self._get_my_channel_info()
+        if channel_id:
+            self.channel_info = {'id': channel_id}
+        else:
+            self.channel_info = self._get_my_channel_info()
 
         return True
     
+    def create_worker_client(self) -> 'YouTubeAPI':
+        """
+        Creates a client for use in another thread.
+
+        The client shares the credentials, channel information and quota ledger,
+        but gets its own service object and HTTP connection, because httplib2
+        is not thread-safe.
+
+        Returns:
+            A new authorized YouTubeAPI instance.
+        """
+        if not self.credentials:
+            raise RuntimeError("Not authorized. Call authenticate() first.")
+
+        client = YouTubeAPI(self.credentials_file, quota_ledger=self.quota_ledger,
+                            executor=self.executor, api_endpoint=self.api_endpoint)
+        client.credentials = self.credentials
+        # build() wraps the credentials in a new AuthorizedHttp every time
+        client.service = self._build_service(self.credentials)
+        client.channel_info = self.channel_info
+        return client
+    
     def _get_my_channel_info(self) -> Dict:
         """Gets information about the current channel."""
         if not self.service:
             return None
         
         request = self.service.channels().list(
-            part='snippet,contentDetails',
-            mine=True
+            part='snippet',
+            mine=True,
+            fields=self.FIELDS['channels.mine']
         )
-        response = request.execute()
+        response = self._execute(request, 'channels.list')
         
-        if response['items']:
+        if response.get('items'):
             return response['items'][0]
         return None
     
@@ -97,7 +185,7 @@ class YouTubeAPI:
     def get_channel_title(self) -> Optional[str]:
         """Gets the title of the current channel."""
         if self.channel_info:
-            return self.channel_info['snippet']['title']
+            return self.channel_info.get('snippet', {}).get('title')
         return None
     
     def get_subscriptions(self, max_results: int = 50) -> List[Dict]:
@@ -110,36 +198,83 @@ class YouTubeAPI:
         Returns:
             A list of subscriptions with channel information.
         """
+        return [sub for page in self.iter_subscriptions(max_results) for sub in page]
+    
+    def iter_subscriptions(self, max_results: int = 50) -> Iterator[List[Dict]]:
+        """
+        Gets subscriptions page by page, as each page arrives.
+
+        Args:
+            max_results: The maximum number of results per request.
+
+        Yields:
+            Lists of subscriptions with channel information.
+        """
+        for page in self.iter_subscription_pages(max_results):
+            yield page['items']
+    
+    def iter_subscription_pages(self, max_results: int = 50,
+                                cached_pages: Optional[Dict[str, Dict]] = None
+                                ) -> Iterator[Dict]:
+        """
+        Gets subscription pages with their ETags, using conditional requests.
+
+        Args:
+            max_results: The maximum number of results per request.
+            cached_pages: Pages of the previous listing by page token ('' for
+                the first page), each with etag and next_page_token. A page
+                whose ETag still matches is not downloaded again.
+
+        Yields:
+            {'page_token', 'etag', 'next_page_token', 'items'}; items is None
+            for a page that has not changed since the cached listing.
+        """
         if not self.service:
             raise RuntimeError("Not authorized. Call authenticate() first.")
         
-        subscriptions = []
-        next_page_token = None
+        cached_pages = cached_pages or {}
+        page_token = ''
         
         while True:
             request = self.service.subscriptions().list(
                 part='snippet',
                 mine=True,
                 maxResults=max_results,
-                pageToken=next_page_token
+                pageToken=page_token or None,
+                fields=self.FIELDS['subscriptions']
             )
             
-            response = request.execute()
+            cached = cached_pages.get(page_token)
+            if cached and cached.get('etag'):
+                request.headers['If-None-Match'] = cached['etag']
             
-            for item in response.get('items', []):
-                subscription = {
-                    'channel_id': item['snippet']['resourceId']['channelId'],
-                    'channel_name': item['snippet']['title'],
-                    'thumbnail': item['snippet']['thumbnails']['default']['url'],
-                    'description': item['snippet']['description']
+            try:
+                response = self._execute(request, 'subscriptions.list')
+            except HttpError as e:
+                if not cached or get_error_status(e) != NOT_MODIFIED:
+                    raise
+                page = {'page_token': page_token, 'etag': cached['etag'],
+                        'next_page_token': cached.get('next_page_token'), 'items': None}
+            else:
+                page = {
+                    'page_token': page_token,
+                    'etag': response.get('etag'),
+                    'next_page_token': response.get('nextPageToken'),
+                    'items': [
+                        {
+                            'channel_id': item['snippet']['resourceId']['channelId'],
+                            'channel_name': item['snippet']['title'],
+                            'thumbnail': item['snippet']['thumbnails']['default']['url']
+                        }
+                        for item in response.get('items', [])
+                    ]
                 }
-                subscriptions.append(subscription)
             
-            next_page_token = response.get('nextPageToken')
-            if not next_page_token:
+            yield page
+            
+            page_token = page['next_page_token']
+            if not page_token:
                 break
-        
-        return subscriptions
     
     def get_channel_videos(self, channel_id: str, max_results: int = 10) -> List[Dict]:
         """
@@ -158,66 +293,88 @@ class YouTubeAPI:
         # Get the uploads playlist ID
         request = self.service.channels().list(
             part='contentDetails',
-            id=channel_id
+            id=channel_id,
+            fields=self.FIELDS['channels.uploads']
         )
-        response = request.execute()
+        response = self._execute(request, 'channels.list')
 
-        if not response['items']:
+        if not response.get('items'):
             return []
 
         uploads_playlist_id = response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
 
         # Get videos from the uploads playlist
         request = self.service.playlistItems().list(
-            part='snippet,contentDetails',
+            part='contentDetails',
             playlistId=uploads_playlist_id,
-            maxResults=max_results
+            maxResults=max_results,
+            fields=self.FIELDS['playlistItems']
         )
-        response = request.execute()
+        response = self._execute(request, 'playlistItems.list')
 
         video_ids = [item['contentDetails']['videoId'] for item in response.get('items', [])]
 
-        if not video_ids:
-            return []
+        return self.get_videos(video_ids)
 
-        # Get detailed information about the videos
-        videos_request = self.service.videos().list(
-            part='snippet,contentDetails,statistics',
-            id=','.join(video_ids)
-        )
-        videos_response = videos_request.execute()
+    def get_videos(self, video_ids: List[str]) -> List[Dict]:
+        """
+        Gets detailed information about videos.
+
+        Args:
+            video_ids: YouTube video IDs (up to 50 per request).
+
+        Returns:
+            A list of videos with metadata.
+        """
+        if not self.service:
+            raise RuntimeError("Not authorized. Call authenticate() first.")
 
         videos = []
-        for item in videos_response.get('items', []):
-            try:
-                # Parse ISO 8601 duration
-                duration_iso = item['contentDetails'].get('duration', 'PT0S')
-
-                # Check for livestream (duration is missing or PT0S)
-                if not duration_iso or duration_iso == 'PT0S':
-                    duration_formatted = "LIVE"
-                else:
-                    duration_seconds = int(isodate.parse_duration(duration_iso).total_seconds())
-                    if duration_seconds == 0:
-                        duration_formatted = "LIVE"
-                    else:
-                        duration_formatted = self._format_duration(duration_seconds)
-            except (KeyError, ValueError, AttributeError):
-                # Livestream or other format
-                duration_formatted = "LIVE"
-
-            video = {
-                'video_id': item['id'],
-                'title': item['snippet']['title'],
-                'description': item['snippet'].get('description', ''),
-                'thumbnail': item['snippet']['thumbnails'].get('medium', {}).get('url', ''),
-                'published_at': item['snippet']['publishedAt'],
-                'duration': duration_formatted,
-                'view_count': int(item['statistics'].get('viewCount', 0))
-            }
-            videos.append(video)
+
+        for start in range(0, len(video_ids), self.MAX_IDS_PER_REQUEST):
+            videos_request = self.service.videos().list(
+                part='snippet,contentDetails,statistics',
+                id=','.join(video_ids[start:start + self.MAX_IDS_PER_REQUEST]),
+                fields=self.FIELDS['videos']
+            )
+            videos_response = self._execute(videos_request, 'videos.list')
+
+            videos.extend(self._parse_video(item) for item in videos_response.get('items', []))
 
         return videos
+
+    def _parse_video(self, item: Dict) -> Dict:
+        """Converts a videos().list item to the stored video format."""
+        duration_seconds = None
+        try:
+            # Parse ISO 8601 duration
+            duration_iso = item['contentDetails'].get('duration', 'PT0S')
+
+            # Check for livestream (duration is missing or PT0S)
+            if duration_iso and duration_iso != 'PT0S':
+                with timer.span('parse.duration'):
+                    duration_seconds = parse_duration(duration_iso) or None
+        except (KeyError, ValueError, AttributeError):
+            # Livestream or other format
+            pass
+
+        if duration_seconds is None:
+            duration_formatted = "LIVE"
+        else:
+            duration_formatted = self._format_duration(duration_seconds)
+
+        return {
+            'video_id': item['id'],
+            'channel_id': item['snippet'].get('channelId'),
+            'title': item['snippet']['title'],
+            'description': item['snippet'].get('description', ''),
+            'thumbnail': item['snippet'].get('thumbnails', {}).get('medium', {}).get('url', ''),
+            'published_at': item['snippet']['publishedAt'],
+            'duration': duration_formatted,
+            'duration_seconds': duration_seconds,
+            # Missing from partial responses when the count is hidden
+            'view_count': int(item.get('statistics', {}).get('viewCount', 0))
+        }
     
     def get_latest_videos_from_subscriptions(self, hours: int = 24, 
                                              max_videos_per_channel: int = 5) -> List[Dict]:
@@ -270,6 +427,74 @@ class YouTubeAPI:
         return datetime.fromisoformat(date_str.replace('Z', '+00:00'))
 
 
+class ClientRegistry:
+    """
+    Per-process registry of authenticated YouTubeAPI clients.
+
+    Each account is authenticated and its service built only once, and the
+    client is reused by every sync phase (subscriptions, videos) in the process.
+    """
+
+    def __init__(self, credentials_file: str = 'config/client_secrets.json',
+                 executor: Optional[RequestExecutor] = None,
+                 api_endpoint: Optional[str] = None):
+        self.credentials_file = credentials_file
+        self.executor = executor or RequestExecutor()
+        self.api_endpoint = api_endpoint
+        self._clients: Dict[str, YouTubeAPI] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token_file: str, channel_id: Optional[str] = None,
+            quota_ledger: Optional[QuotaLedger] = None) -> YouTubeAPI:
+        """
+        Gets an authenticated client for an account.
+
+        Args:
+            token_file: Path to the file with saved tokens.
+            channel_id: The known YouTube channel ID (skips channels().list(mine=True)).
+            quota_ledger: The ledger that records the cost of the client's calls.
+
+        Returns:
+            An authenticated YouTubeAPI instance.
+        """
+        with self._lock:
+            client = self._clients.get(token_file)
+            if client is None:
+                client = YouTubeAPI(self.credentials_file, quota_ledger=quota_ledger,
+                                    executor=self.executor, api_endpoint=self.api_endpoint)
+                client.authenticate(token_file, channel_id=channel_id)
+                self._clients[token_file] = client
+            elif quota_ledger is not None:
+                client.quota_ledger = quota_ledger
+            return client
+
+    def clear(self):
+        """Forgets all clients (e.g. after tokens have been replaced)."""
+        with self._lock:
+            self._clients.clear()
+
+
+_registries: Dict[Tuple[str, Optional[str]], ClientRegistry] = {}
+
+
+def get_client_registry(credentials_file: str = 'config/client_secrets.json',
+                        executor: Optional[RequestExecutor] = None,
+                        api_endpoint: Optional[str] = None) -> ClientRegistry:
+    """
+    Gets the process-wide client registry for a credentials file.
+
+    Args:
+        credentials_file: The path to client_secrets.json.
+        executor: The request executor, used only when the registry is created.
+        api_endpoint: Base URL of the API server (None for Google).
+    """
+    key = (credentials_file, api_endpoint)
+    if key not in _registries:
+        _registries[key] = ClientRegistry(credentials_file, executor=executor,
+                                          api_endpoint=api_endpoint)
+    return _registries[key]
+
+
 def setup_new_channel(channel_name: str, credentials_file: str = 'config/client_secrets.json') -> Dict:
     """
     Sets up a new personal channel (helper function).
@@ -0,0 +1,98 @@
+"""
+Тесты circuit breaker для постоянно падающих подписок
+"""
+
+import json
+import socket
+import pytest
+from datetime import datetime
+from unittest.mock import Mock
+
+import httplib2
+from google.auth.exceptions import RefreshError
+from googleapiclient.errors import HttpError
+
+from src.request_executor import classify_error
+from src.circuit_breaker import (backoff_seconds, circuit_state, record_failure, record_success,
+                                 split_tripped, CLOSED, HALF_OPEN, OPEN)
+
+
+NOW = datetime(2025, 1, 15, 12, 0, 0)
+HOUR = 3600
+
+
+@pytest.mark.unit
+class TestCircuitBreaker:
+    """Тесты счётчика ошибок и экспоненциальной паузы"""
+
+    def test_backoff_doubles_up_to_maximum(self):
+        """Тест: пауза удваивается с каждой ошибкой после порога"""
+        delays = [backoff_seconds(failures, threshold=3, base=6 * HOUR, maximum=48 * HOUR)
+                  for failures in range(1, 8)]
+
+        assert delays == [0, 0, 6 * HOUR, 12 * HOUR, 24 * HOUR, 48 * HOUR, 48 * HOUR]
+        assert backoff_seconds(10 ** 6, threshold=3, base=HOUR, maximum=HOUR) == HOUR
+
+    def test_failures_open_circuit(self):
+        """Тест: блокировка открывается после threshold ошибок подряд"""
+        sub = {'id': 7, 'failure_count': 1}
+
+        assert record_failure(sub, 'PLAYLIST_NOT_FOUND', NOW, threshold=3) == (
+            7, 2, None, 'PLAYLIST_NOT_FOUND')
+
+        sub['failure_count'] = 2
+        assert record_failure(sub, 'PLAYLIST_NOT_FOUND', NOW, threshold=3, base=HOUR) == (
+            7, 3, '2025-01-15T13:00:00', 'PLAYLIST_NOT_FOUND')
+
+    @pytest.mark.parametrize('error_type', ['QUOTA_EXCEEDED', 'RATE_LIMITED', 'SERVER_ERROR',
+                                            'DURATION_PARSE_ERROR', 'UNKNOWN'])
+    def test_transient_errors_not_counted(self, error_type):
+        """Тест: временные ошибки не считаются ошибками канала"""
+        assert record_failure({'id': 1, 'failure_count': 5}, error_type, NOW) is None
+    
+    @pytest.mark.parametrize('error', [
+        ConnectionError('connection reset'),
+        TimeoutError('timed out'),
+        socket.gaierror(-2, 'Name or service not known'),
+        httplib2.ServerNotFoundError('Unable to find the server'),
+    ])
+    def test_network_errors_not_counted(self, error):
+        """Тест: сбой сети не открывает блокировку всех подписок"""
+        sub = {'id': 1, 'failure_count': 2}
+        assert record_failure(sub, classify_error(error), NOW, threshold=3) is None
+    
+    def test_auth_errors_not_counted(self):
+        """Тест: отозванный токен не открывает блокировку всех подписок"""
+        resp = Mock(status=401, reason='Unauthorized')
+        content = json.dumps({'error': {'code': 401, 'message': 'Invalid Credentials',
+                                        'errors': [{'reason': 'authError'}]}})
+        sub = {'id': 1, 'failure_count': 2}
+        
+        for error in (RefreshError('invalid_grant: Token has been expired or revoked.'),
+                      HttpError(resp, content.encode('utf-8'))):
+            assert record_failure(sub, classify_error(error), NOW, threshold=3) is None
+
+    def test_success_resets_circuit(self):
+        """Тест: успешная загрузка закрывает блокировку"""
+        assert record_success({'id': 1, 'failure_count': 4}) == (1, 0, None, None)
+        assert record_success({'id': 1, 'failure_count': 0}) is None
+
+    def test_circuit_state(self):
+        """Тест: закрыта, открыта до срока, полуоткрыта после"""
+        assert circuit_state({'circuit_open_until': None}, NOW) == CLOSED
+        assert circuit_state({'circuit_open_until': '2025-01-15T13:00:00'}, NOW) == OPEN
+        assert circuit_state({'circuit_open_until': '2025-01-15T11:00:00'}, NOW) == HALF_OPEN
+
+    def test_split_tripped(self):
+        """Тест: канал пропускается, только если заблокированы все его подписки"""
+        blocked = {'circuit_open_until': '2025-01-16T00:00:00'}
+        targets = [
+            {'youtube_channel_id': 'UC_dead', 'subscriptions': [blocked, dict(blocked)]},
+            {'youtube_channel_id': 'UC_new_follower', 'subscriptions': [blocked, {}]},
+            {'youtube_channel_id': 'UC_ok', 'subscriptions': [{}]},
+        ]
+
+        fetched, tripped = split_tripped(targets, NOW)
+
+        assert [t['youtube_channel_id'] for t in fetched] == ['UC_new_follower', 'UC_ok']
+        assert [t['youtube_channel_id'] for t in tripped] == ['UC_dead']
@@ -107,6 +107,175 @@ class TestSubscriptions:
         
         assert result['is_active'] == 0
     
+    def test_batch_marks_subscription_synced(self, populated_db):
+        """Тест отметки времени загрузки видео подписки в пакете записи"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        subscription_id = populated_db['subscription_id']
+        
+        assert db.get_subscriptions_by_channel(channel_id)[0]['last_video_sync_at'] is None
+        
+        db.save_videos_batch([], synced_ids=[subscription_id])
+        
+        assert db.get_subscriptions_by_channel(channel_id)[0]['last_video_sync_at'] is not None
+    
+    def test_poll_schedule(self, populated_db):
+        """Тест истории публикаций и сохранения расписания опроса"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        subscription_id = populated_db['subscription_id']
+        for i in range(1, 4):
+            db.add_video(subscription_id, f'vid_{i}', 'Video', 'thumb.jpg',
+                         f'2025-01-1{i}T10:00:00Z', '1:00')
+        
+        history = db.get_publish_history([subscription_id, 999], limit=3)
+        
+        # Самые новые первыми, включая видео из populated_db
+        assert history[subscription_id] == ['2025-01-15T10:30:00Z', '2025-01-13T10:00:00Z',
+                                            '2025-01-12T10:00:00Z']
+        assert history[999] == []
+        
+        db.update_poll_schedule([(subscription_id, 86400, '2025-01-16T10:00:00')])
+        
+        subscription = db.get_subscriptions_by_channel(channel_id)[0]
+        assert subscription['upload_interval_seconds'] == 86400
+        assert subscription['next_video_sync_at'] == '2025-01-16T10:00:00'
+    
+    def test_get_engagement_stats(self, populated_db):
+        """Тест статистики просмотров подписки"""
+        db = populated_db['db']
+        subscription_id = populated_db['subscription_id']
+        video_id = db.add_video(subscription_id, 'vid_2', 'Video', 'thumb.jpg',
+                                '2025-01-16T10:00:00Z', '1:00')
+        db.mark_video_watched(video_id)
+        
+        stats = db.get_engagement_stats([subscription_id, 999])
+        
+        assert stats[subscription_id]['videos'] == 2
+        assert stats[subscription_id]['watched'] == 1
+        assert stats[subscription_id]['last_watched_at'] is not None
+        assert stats[999] == {'videos': 0, 'watched': 0, 'last_watched_at': None}
+    
+    def test_filter_videos_by_duration(self, populated_db):
+        """Тест фильтрации видео по длительности"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        subscription_id = populated_db['subscription_id']
+        
+        db.add_video(subscription_id, 'short', 'Short', 'thumb.jpg', '2025-01-16T10:00:00Z',
+                     duration='0:45', duration_seconds=45)
+        db.add_video(subscription_id, 'long', 'Long', 'thumb.jpg', '2025-01-17T10:00:00Z',
+                     duration='1:10:00', duration_seconds=4200)
+        db.add_video(subscription_id, 'live', 'Live', 'thumb.jpg', '2025-01-18T10:00:00Z',
+                     duration='LIVE')
+        
+        def video_ids(**filters):
+            return [v['youtube_video_id']
+                    for v in db.get_videos_by_personal_channel(channel_id, **filters)]
+        
+        assert video_ids(max_duration=60) == ['short']
+        assert video_ids(min_duration=3600) == ['long']
+        assert video_ids(min_duration=61, max_duration=3599) == []
+        assert len(video_ids()) == 4
+    
+    def test_get_video_ids_by_subscription(self, populated_db):
+        """Тест получения известных ID видео по подпискам"""
+        db = populated_db['db']
+        subscription_id = populated_db['subscription_id']
+        
+        known = db.get_video_ids_by_subscription([subscription_id, 999])
+        
+        assert known[subscription_id] == {'test_video_789'}
+        assert known[999] == set()
+    
+    def test_feed_state(self, db):
+        """Тест сохранения ETag и Last-Modified RSS-ленты в пакете записи"""
+        assert db.get_channel_cache(['UC_feed']) == {}
+        
+        db.save_videos_batch([], feed_states=[
+            ('UC_feed', '"etag1"', 'Wed, 15 Jan 2025 10:00:00 GMT')])
+        db.save_videos_batch([], feed_states=[('UC_feed', '"etag2"', None)])
+        
+        cache = db.get_channel_cache(['UC_feed', 'UC_other'])
+        assert list(cache) == ['UC_feed']
+        assert cache['UC_feed']['feed_etag'] == '"etag2"'
+        assert cache['UC_feed']['feed_checked_at'] is not None
+    
+    def test_get_active_subscriptions_by_youtube_channel(self, populated_db):
+        """Тест получения активных подписок по ID канала YouTube"""
+        db = populated_db['db']
+        subscription_id = populated_db['subscription_id']
+        
+        assert db.get_active_youtube_channel_ids() == ['UC_subscription_456']
+        
+        subscriptions = db.get_active_subscriptions_by_youtube_channel(
+            ['UC_subscription_456', 'UC_missing'])
+        assert [s['id'] for s in subscriptions['UC_subscription_456']] == [subscription_id]
+        assert subscriptions['UC_missing'] == []
+    
+    def test_websub_lease(self, db):
+        """Тест сохранения состояния подписки WebSub"""
+        db.mark_websub_requested('UC_feed')
+        assert db.get_websub_leases()['UC_feed']['websub_requested_at'] is not None
+        
+        db.update_websub_lease('UC_feed', '2025-01-20T10:00:00')
+        lease = db.get_websub_leases()['UC_feed']
+        assert lease['websub_requested_at'] is None
+        assert lease['websub_lease_expires_at'] == '2025-01-20T10:00:00'
+        
+        db.update_websub_lease('UC_feed', None)
+        assert db.get_websub_leases() == {}
+    
+    def test_upsert_subscriptions(self, populated_db):
+        """Тест сохранения страницы подписок"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        
+        deleted_id = db.add_subscription(channel_id, 'UC_deleted', 'Deleted')
+        db.mark_subscription_deleted(deleted_id)
+        inactive_id = db.add_subscription(channel_id, 'UC_inactive', 'Inactive')
+        db.deactivate_subscription(inactive_id)
+        
+        page = [
+            {'channel_id': cid, 'channel_name': cid, 'thumbnail': 'thumb.jpg'}
+            for cid in ('UC_subscription_456', 'UC_new', 'UC_inactive', 'UC_deleted')
+        ]
+        stats = db.upsert_subscriptions(channel_id, page)
+        
+        assert stats == {'added': 1, 'activated': 1, 'unchanged': 1}
+        active = {s['youtube_channel_id'] for s in db.get_subscriptions_by_channel(channel_id)}
+        assert active == {'UC_subscription_456', 'UC_new', 'UC_inactive'}
+    
+    def test_deactivate_missing_subscriptions(self, populated_db):
+        """Тест деактивации подписок, отсутствующих в полном списке"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        db.add_subscription(channel_id, 'UC_kept', 'Kept')
+        
+        deactivated = db.deactivate_missing_subscriptions(channel_id, {'UC_kept'})
+        
+        assert deactivated == 1
+        active = [s['youtube_channel_id'] for s in db.get_subscriptions_by_channel(channel_id)]
+        assert active == ['UC_kept']
+        assert db.get_videos_by_personal_channel(channel_id) == []
+    
+    def test_subscription_sync_state(self, populated_db):
+        """Тест сохранения снимка синхронизации подписок"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        pages = [{'page_token': '', 'etag': 'etag-1', 'next_page_token': None,
+                  'channel_ids': ['UC_subscription_456']}]
+        
+        assert db.get_subscription_sync_state(channel_id) is None
+        
+        db.save_subscription_sync_state(channel_id, 'hash1', [])
+        db.save_subscription_sync_state(channel_id, 'hash2', pages)
+        
+        state = db.get_subscription_sync_state(channel_id)
+        assert state['subscriptions_hash'] == 'hash2'
+        assert state['pages'] == pages
+        assert state['synced_at'] is not None
+    
     def test_sync_subscriptions_status(self, populated_db):
         """Тест синхронизации статусов подписок"""
         db = populated_db['db']
@@ -254,6 +423,126 @@ class TestSyncErrors:
         # Проверяем
         errors_after = db.get_unresolved_errors(channel_id)
         assert len(errors_after) == 0
+    
+    def test_circuit_state(self, populated_db):
+        """Тест блокировки постоянно падающей подписки и её снятия"""
+        db = populated_db['db']
+        subscription_id = populated_db['subscription_id']
+        
+        db.update_circuit_state([(subscription_id, 3, '2099-01-01T00:00:00', 'PLAYLIST_NOT_FOUND')])
+        
+        tripped = db.get_tripped_subscriptions()
+        assert len(tripped) == 1
+        assert tripped[0]['personal_channel_name'] == 'Test Channel'
+        assert tripped[0]['failure_count'] == 3
+        assert tripped[0]['last_failure_at'] is not None
+        
+        # Успешная загрузка сбрасывает счётчик, но тип последней ошибки остаётся
+        db.update_circuit_state([(subscription_id, 0, None, None)])
+        assert db.get_tripped_subscriptions() == []
+        sub = db.get_subscriptions_by_channel(populated_db['channel_id'])[0]
+        assert sub['last_failure_type'] == 'PLAYLIST_NOT_FOUND'
+        
+        db.update_circuit_state([(subscription_id, 4, '2099-01-01T00:00:00', 'UNKNOWN')])
+        assert db.reset_circuit(subscription_id) == 1
+        assert db.reset_circuit() == 0
+
+
+@pytest.mark.unit
+class TestSyncRuns:
+    """Тесты для журнала запусков синхронизации"""
+    
+    def test_resumable_run(self, db):
+        """Тест продолжения прерванного запуска"""
+        run_id = db.start_sync_run('videos', planned=10)
+        db.update_sync_run_progress(run_id, 4)
+        db.finish_sync_run(run_id, 'interrupted')
+        
+        run = db.get_resumable_sync_run('videos')
+        assert run['id'] == run_id
+        assert run['processed'] == 4
+        
+        db.resume_sync_run(run_id, planned=6)
+        run = db.get_resumable_sync_run('videos')
+        assert run['status'] == 'running'
+        assert run['planned'] == 10
+        assert run['resumed_count'] == 1
+    
+    def test_completed_run_not_resumable(self, db):
+        """Тест: завершённый запуск не продолжается"""
+        assert db.get_resumable_sync_run('videos') is None
+        
+        run_id = db.start_sync_run('videos', planned=2)
+        db.finish_sync_run(run_id, 'completed')
+        
+        assert db.get_resumable_sync_run('videos') is None
+    
+    def test_run_stats(self, db):
+        """Тест: итоги продолжаемого запуска суммируются"""
+        run_id = db.start_sync_run('videos', planned=4)
+        db.finish_sync_run(run_id, 'interrupted', {
+            'api_calls': {'playlistItems.list': 2}, 'quota_units': 6, 'new_videos': 3,
+            'errors': 1, 'accounts': {1: {'name': 'Main', 'seconds': 1.5, 'new_videos': 3}}})
+        
+        db.resume_sync_run(run_id, planned=2)
+        db.finish_sync_run(run_id, 'completed', {
+            'api_calls': {'playlistItems.list': 1, 'videos.list': 1}, 'quota_units': 2,
+            'new_videos': 1, 'accounts': {1: {'name': 'Main', 'seconds': 0.5, 'new_videos': 1}}})
+        
+        db.start_sync_run('subscriptions:1')
+        
+        runs = db.get_sync_runs(kind='videos')
+        assert len(runs) == 1
+        run = runs[0]
+        assert run['status'] == 'completed'
+        assert run['api_calls'] == {'playlistItems.list': 3, 'videos.list': 1}
+        assert (run['quota_units'], run['new_videos'], run['errors']) == (8, 4, 1)
+        assert run['accounts'] == {'1': {'name': 'Main', 'seconds': 2.0, 'new_videos': 4}}
+        assert run['duration_seconds'] >= 0
+        
+        latest = db.get_sync_runs(limit=1)[0]
+        assert latest['kind'] == 'subscriptions:1'
+        assert latest['duration_seconds'] is None
+        assert [run['kind'] for run in db.get_sync_runs(kind='subscriptions')] == ['subscriptions:1']
+
+
+@pytest.mark.unit
+class TestDataVersion:
+    """Тесты для версии данных"""
+    
+    def test_changes_on_write(self, db, sample_channel_data):
+        """Тест: запись меняет версию, чтение - нет"""
+        version = db.data_version()
+        db.get_all_personal_channels()
+        assert db.data_version() == version
+        
+        channel_id = db.add_personal_channel(
+            name=sample_channel_data['name'],
+            youtube_channel_id=sample_channel_data['youtube_channel_id'],
+            oauth_token_path=sample_channel_data['oauth_token_path']
+        )
+        written = db.data_version()
+        assert written != version
+        
+        db.update_authuser_index(channel_id, 1)
+        assert db.data_version() not in (version, written)
+    
+    def test_write_by_other_connection(self, tmp_path):
+        """Тест: запись другого процесса видна по журналу WAL"""
+        import sqlite3
+        from src.db_manager import Database
+        
+        db = Database(str(tmp_path / 'videos.db'))
+        db.enable_wal()
+        db.add_personal_channel('Main', 'UC_main', 'token.json')
+        version = db.data_version()
+        
+        conn = sqlite3.connect(db.db_path)
+        conn.execute("UPDATE personal_channels SET name = 'Renamed'")
+        conn.commit()
+        conn.close()
+        
+        assert db.data_version() != version
 
 
 @pytest.mark.integration
@@ -0,0 +1,31 @@
+"""
+Тесты для разбора длительности видео
+"""
+
+import isodate
+import pytest
+
+from src.duration import parse_duration
+
+
+@pytest.mark.unit
+class TestParseDuration:
+    """Тесты быстрого разбора ISO 8601"""
+
+    @pytest.mark.parametrize('value', [
+        'PT12M34S', 'PT59S', 'PT1H2M3S', 'PT4M', 'PT1H', 'PT0S', 'P0D', 'P1DT2H', 'PT100H',
+    ])
+    def test_matches_isodate(self, value):
+        """Тест: результат совпадает с isodate"""
+        assert parse_duration(value) == int(isodate.parse_duration(value).total_seconds())
+
+    def test_falls_back_to_isodate(self):
+        """Тест: форматы вне подмножества YouTube разбираются через isodate"""
+        assert parse_duration('P1W') == 7 * 86400
+        assert parse_duration('PT1.5S') == 1
+
+    @pytest.mark.parametrize('value', ['', 'P', '12:34', 'PT1X'])
+    def test_invalid_duration(self, value):
+        """Тест: некорректная длительность вызывает ISO8601Error"""
+        with pytest.raises(isodate.ISO8601Error):
+            parse_duration(value)
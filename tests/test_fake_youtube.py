@@ -0,0 +1,222 @@
+"""
+Тесты локального сервера YouTube API для бенчмарков
+"""
+
+import pytest
+from unittest.mock import patch
+
+from benchmarks.fake_youtube import FakeYouTubeData, FakeYouTubeServer, write_tokens
+from src.quota import QuotaLedger
+from src.request_executor import RequestExecutor
+from src.sync_subscriptions import (plan_sync, run_parallel_accounts, sync_subscriptions,
+                                    sync_videos)
+from src.youtube_api import ClientRegistry, YouTubeAPI
+
+
+@pytest.fixture
+def fake_data():
+    return FakeYouTubeData.generate(accounts=2, subscriptions=12, channels=16,
+                                    videos_per_channel=8, seed=1)
+
+
+@pytest.fixture
+def fake_server(fake_data):
+    with FakeYouTubeServer(fake_data) as server:
+        yield server
+
+
+@pytest.fixture
+def fake_db(db, fake_data, tmp_path):
+    """Личные каналы для всех синтетических аккаунтов"""
+    token_files = write_tokens(fake_data, str(tmp_path))
+    for token, account in fake_data.accounts.items():
+        db.add_personal_channel(name=account['title'],
+                                youtube_channel_id=account['channel_id'],
+                                oauth_token_path=token_files[token])
+    return db
+
+
+def make_registry(server):
+    return ClientRegistry(api_endpoint=server.url,
+                          executor=RequestExecutor(base_delay=0.01, max_delay=0.05))
+
+
+@pytest.mark.unit
+class TestFakeYouTubeData:
+    """Тесты генерации данных"""
+
+    def test_generate_is_reproducible(self):
+        """Тест: одинаковый seed даёт одинаковые данные"""
+        first = FakeYouTubeData.generate(accounts=2, subscriptions=5, seed=3)
+        second = FakeYouTubeData.generate(accounts=2, subscriptions=5, seed=3)
+
+        assert first.accounts == second.accounts
+        assert list(first.videos) == list(second.videos)
+        assert all(len(account['subscriptions']) == 5 for account in first.accounts.values())
+        assert len(first.channels) == 10
+
+
+@pytest.mark.integration
+class TestFakeYouTubeServer:
+    """Синхронизация через googleapiclient против локального сервера"""
+
+    def test_client_requests(self, fake_data, fake_server, tmp_path):
+        """Тест: подписки постранично, 304 по ETag, видео с длительностью"""
+        token, account = next(iter(fake_data.accounts.items()))
+        token_file = write_tokens(fake_data, str(tmp_path))[token]
+        api = YouTubeAPI(api_endpoint=fake_server.url)
+        api.authenticate(token_file)
+
+        assert api.get_channel_id() == account['channel_id']
+
+        pages = list(api.iter_subscription_pages(max_results=5))
+        assert [len(page['items']) for page in pages] == [5, 5, 2]
+        assert [item['channel_id'] for page in pages for item in page['items']] == \
+            account['subscriptions']
+
+        cached = list(api.iter_subscription_pages(max_results=5, cached_pages={
+            page['page_token']: page for page in pages}))
+        assert all(page['items'] is None for page in cached)
+        assert fake_server.stats['not_modified'] == 3
+
+        videos = api.get_channel_videos(account['subscriptions'][0], max_results=3)
+        expected = fake_data.channels[account['subscriptions'][0]]['videos'][:3]
+        assert [video['video_id'] for video in videos] == [video['id'] for video in expected]
+        assert all(video['duration_seconds'] > 0 for video in videos)
+
+    def test_full_sync(self, fake_db, fake_data, fake_server):
+        """Тест: полная синхронизация двух аккаунтов"""
+        registry = make_registry(fake_server)
+        ledger = QuotaLedger(fake_db, 'test', daily_budget=10 ** 6)
+
+        with patch('builtins.print'):
+            sync_subscriptions(fake_db, ledger=ledger, registry=registry)
+            sync_videos(fake_db, max_videos_per_channel=3, ledger=ledger, workers=4,
+                        registry=registry, fetch_strategy='api', adaptive_polling=False)
+
+        for channel in fake_db.get_all_personal_channels():
+            subscriptions = fake_db.get_subscriptions_by_channel(channel['id'])
+            assert len(subscriptions) == 12
+            assert len(fake_db.get_videos_by_personal_channel(channel['id'])) == 36
+        assert ledger.session_units() == fake_server.quota_units()
+
+        # Журнал запусков: квота и вызовы по методам, длительность по аккаунтам
+        videos_run, subscriptions_run = fake_db.get_sync_runs()
+        assert subscriptions_run['subscriptions_added'] == 24
+        assert subscriptions_run['api_calls']['subscriptions.list'] == fake_server.stats['subscriptions.list']
+        assert videos_run['new_videos'] == 72
+        assert videos_run['api_calls']['videos.list'] == fake_server.stats['videos.list']
+        assert subscriptions_run['quota_units'] + videos_run['quota_units'] == fake_server.quota_units()
+        assert len(subscriptions_run['accounts']) == 2
+        assert all(account['seconds'] > 0 for account in videos_run['accounts'].values())
+
+    def test_plan_matches_run(self, fake_db, fake_server):
+        """Тест: план повторной синхронизации совпадает с реальными вызовами API"""
+        registry = make_registry(fake_server)
+        ledger = QuotaLedger(fake_db, 'test', daily_budget=10 ** 6)
+        options = dict(workers=4, fetch_strategy='api', adaptive_polling=False)
+
+        with patch('builtins.print'):
+            sync_subscriptions(fake_db, ledger=ledger, registry=registry)
+            sync_videos(fake_db, max_videos_per_channel=3, ledger=ledger, registry=registry,
+                        **options)
+
+            plan = plan_sync(fake_db, ledger=ledger, **options)
+            fake_server.reset_stats()
+            sync_subscriptions(fake_db, ledger=ledger, registry=registry)
+            sync_videos(fake_db, max_videos_per_channel=3, ledger=ledger, registry=registry,
+                        **options)
+
+        # Подписки общих каналов загружаются один раз
+        assert plan['subscriptions'] == 24
+        assert plan['planned'] == plan['channels'] < 24
+        assert plan['api_calls'] == {endpoint: fake_server.stats[endpoint]
+                                     for endpoint in plan['api_calls']}
+        assert plan['quota_units'] == fake_server.quota_units()
+        assert plan['history'] == {'subscriptions': 1, 'videos': 1}
+        assert plan['wall_seconds'] > 0
+
+    def test_incremental_rss_sync(self, fake_db, fake_server):
+        """Тест: повторная синхронизация через RSS не тратит квоту на видео"""
+        registry = make_registry(fake_server)
+        ledger = QuotaLedger(fake_db, 'test', daily_budget=10 ** 6)
+
+        with patch('builtins.print'):
+            sync_subscriptions(fake_db, ledger=ledger, registry=registry)
+            sync_videos(fake_db, max_videos_per_channel=3, ledger=ledger, workers=4,
+                        registry=registry, fetch_strategy='rss', feed_url=fake_server.feed_url,
+                        adaptive_polling=False)
+            fake_server.reset_stats()
+            sync_videos(fake_db, max_videos_per_channel=3, ledger=ledger, workers=4,
+                        registry=registry, fetch_strategy='rss', feed_url=fake_server.feed_url,
+                        adaptive_polling=False)
+
+        assert fake_server.stats['feed'] > 0
+        assert fake_server.stats['not_modified'] == fake_server.stats['feed']
+        assert fake_server.quota_units() == 0
+
+    def test_parallel_accounts(self, fake_db, fake_server):
+        """Тест: аккаунты синхронизируются в отдельных процессах"""
+        ledger = QuotaLedger(fake_db, 'test', daily_budget=10 ** 6)
+
+        with patch('builtins.print'):
+            results = run_parallel_accounts(fake_db, 2, ledger=ledger, api_endpoint=fake_server.url,
+                                            rate_limit=0,
+                                            max_videos_per_channel=3, workers=2,
+                                            fetch_strategy='api', adaptive_polling=False)
+
+        assert [result['error'] for result in results] == [None, None]
+        assert all(result['videos']['new_videos'] == 36 for result in results)
+        assert sum(result['quota_units'] for result in results) == fake_server.quota_units()
+        assert ledger.used_today() == fake_server.quota_units()
+
+        for channel in fake_db.get_all_personal_channels():
+            assert len(fake_db.get_videos_by_personal_channel(channel['id'])) == 36
+        with fake_db.get_connection() as conn:
+            assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    def test_parallel_plan_matches_run(self, db, tmp_path):
+        """Тест: план с --parallel-accounts делит квоту между аккаунтами так же, как запуск"""
+        data = FakeYouTubeData.generate(accounts=2, subscriptions=60, channels=80,
+                                        videos_per_channel=2, seed=1)
+        # Две страницы подписок у первого аккаунта и одна у второго
+        second = list(data.accounts.values())[1]
+        second['subscriptions'] = second['subscriptions'][:20]
+        token_files = write_tokens(data, str(tmp_path))
+        for token, account in data.accounts.items():
+            db.add_personal_channel(name=account['title'], youtube_channel_id=account['channel_id'],
+                                    oauth_token_path=token_files[token])
+        options = dict(workers=2, fetch_strategy='api', adaptive_polling=False)
+
+        with FakeYouTubeServer(data) as server, patch('builtins.print'):
+            run_parallel_accounts(db, 2, ledger=QuotaLedger(db, 'test', daily_budget=10 ** 6),
+                                  api_endpoint=server.url, rate_limit=0,
+                                  max_videos_per_channel=2, **options)
+
+            # Квоты хватает не на все каналы: 19 единиц на аккаунт
+            ledger = QuotaLedger(db, 'tight', daily_budget=38)
+            plan = plan_sync(db, ledger=ledger, parallel_accounts=2, **options)
+            server.reset_stats()
+            results = run_parallel_accounts(db, 2, ledger=ledger, api_endpoint=server.url,
+                                            rate_limit=0, max_videos_per_channel=2, **options)
+
+            assert [result['error'] for result in results] == [None, None]
+            assert plan['planned'] == 5 + 6
+            assert plan['deferred'] == plan['channels'] - plan['planned']
+            assert plan['api_calls'] == {endpoint: server.stats[endpoint]
+                                         for endpoint in plan['api_calls']}
+            assert plan['quota_units'] == server.quota_units()
+
+    def test_injected_errors_are_retried(self, fake_db, fake_data):
+        """Тест: ответы 503 повторяются исполнителем запросов"""
+        with FakeYouTubeServer(fake_data, error_rate=0.5, seed=1) as server:
+            registry = make_registry(server)
+            ledger = QuotaLedger(fake_db, 'test', daily_budget=10 ** 6)
+
+            with patch('builtins.print'):
+                sync_subscriptions(fake_db, ledger=ledger, registry=registry)
+
+        assert server.stats['errors'] > 0
+        assert registry.executor.metrics.snapshot()['retries'] > 0
+        for channel in fake_db.get_all_personal_channels():
+            assert len(fake_db.get_subscriptions_by_channel(channel['id'])) == 12
@@ -239,6 +239,197 @@ class TestRealMigrations:
         
         conn.close()
     
+    def test_migration_004_quota_usage(self, temp_db_path):
+        """Тест миграции 004: add_quota_usage"""
+        manager = MigrationManager(temp_db_path)
+        
+        manager.migrate(target_version=4)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT name FROM sqlite_master 
+            WHERE type='table' AND name='quota_usage'
+        """)
+        assert cursor.fetchone() is not None
+        
+        cursor.execute('PRAGMA table_info(subscriptions)')
+        columns = [row[1] for row in cursor.fetchall()]
+        assert 'last_video_sync_at' in columns
+        
+        conn.close()
+    
+    def test_migration_005_channel_cache(self, temp_db_path):
+        """Тест миграции 005: add_channel_cache"""
+        manager = MigrationManager(temp_db_path)
+        
+        manager.migrate(target_version=5)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('PRAGMA table_info(channel_cache)')
+        columns = [row[1] for row in cursor.fetchall()]
+        assert 'feed_etag' in columns
+        assert 'feed_last_modified' in columns
+        
+        conn.close()
+    
+    def test_migration_006_websub_leases(self, temp_db_path):
+        """Тест миграции 006: add_websub_leases"""
+        manager = MigrationManager(temp_db_path)
+        
+        manager.migrate(target_version=6)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('PRAGMA table_info(channel_cache)')
+        columns = [row[1] for row in cursor.fetchall()]
+        assert 'websub_requested_at' in columns
+        assert 'websub_lease_expires_at' in columns
+        
+        conn.close()
+    
+    def test_migration_007_duration_seconds(self, temp_db_path):
+        """Тест миграции 007: add_duration_seconds с заполнением старых видео"""
+        manager = MigrationManager(temp_db_path)
+        manager.migrate(target_version=6)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        cursor.execute("""
+            INSERT INTO subscriptions (personal_channel_id, youtube_channel_id, channel_name)
+            VALUES (1, 'UC_1', 'Sub')
+        """)
+        for video_id, duration in (('v1', '12:34'), ('v2', '1:02:03'), ('v3', 'LIVE')):
+            cursor.execute("""
+                INSERT INTO videos (subscription_id, youtube_video_id, title, published_at, duration)
+                VALUES (1, ?, 'Video', '2025-01-15T10:00:00Z', ?)
+            """, (video_id, duration))
+        conn.commit()
+        conn.close()
+        
+        manager.migrate(target_version=7)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT youtube_video_id, duration_seconds FROM videos ORDER BY youtube_video_id')
+        assert cursor.fetchall() == [('v1', 754), ('v2', 3723), ('v3', None)]
+        
+        cursor.execute("""
+            SELECT name FROM sqlite_master 
+            WHERE type='index' AND name='idx_videos_duration'
+        """)
+        assert cursor.fetchone() is not None
+        
+        conn.close()
+    
+    def test_migration_008_subscription_sync_state(self, temp_db_path):
+        """Тест миграции 008: add_subscription_sync_state"""
+        manager = MigrationManager(temp_db_path)
+        
+        manager.migrate(target_version=8)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT name FROM sqlite_master 
+            WHERE type='table' AND name='subscription_sync_state'
+        """)
+        assert cursor.fetchone() is not None
+        
+        conn.close()
+    
+    def test_migration_009_poll_schedule(self, temp_db_path):
+        """Тест миграции 009: add_poll_schedule"""
+        manager = MigrationManager(temp_db_path)
+        
+        manager.migrate(target_version=9)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('PRAGMA table_info(subscriptions)')
+        columns = [row[1] for row in cursor.fetchall()]
+        assert 'upload_interval_seconds' in columns
+        assert 'next_video_sync_at' in columns
+        
+        conn.close()
+    
+    def test_migration_010_sync_runs(self, temp_db_path):
+        """Тест миграции 010: add_sync_runs"""
+        manager = MigrationManager(temp_db_path)
+        
+        manager.migrate(target_version=10)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('PRAGMA table_info(sync_runs)')
+        columns = [row[1] for row in cursor.fetchall()]
+        assert 'status' in columns
+        assert 'processed' in columns
+        
+        conn.close()
+    
+    def test_migration_011_sync_run_stats(self, temp_db_path):
+        """Тест миграции 011: add_sync_run_stats"""
+        manager = MigrationManager(temp_db_path)
+        
+        manager.migrate(target_version=11)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('PRAGMA table_info(sync_runs)')
+        columns = [row[1] for row in cursor.fetchall()]
+        assert 'api_calls' in columns
+        assert 'quota_units' in columns
+        assert 'accounts' in columns
+        
+        conn.close()
+    
+    def test_migration_012_circuit_breaker(self, temp_db_path):
+        """Тест миграции 012: add_circuit_breaker"""
+        manager = MigrationManager(temp_db_path)
+        
+        manager.migrate(target_version=12)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('PRAGMA table_info(subscriptions)')
+        columns = [row[1] for row in cursor.fetchall()]
+        assert 'failure_count' in columns
+        assert 'circuit_open_until' in columns
+        assert 'last_failure_type' in columns
+        
+        conn.close()
+    
+    def test_migration_013_sync_jobs(self, temp_db_path):
+        """Тест миграции 013: add_sync_jobs"""
+        manager = MigrationManager(temp_db_path)
+        
+        manager.migrate(target_version=13)
+        
+        conn = sqlite3.connect(temp_db_path)
+        cursor = conn.cursor()
+        
+        cursor.execute('PRAGMA table_info(sync_jobs)')
+        columns = [row[1] for row in cursor.fetchall()]
+        assert 'options' in columns
+        assert 'heartbeat_at' in columns
+        
+        cursor.execute('PRAGMA table_info(sync_job_events)')
+        columns = [row[1] for row in cursor.fetchall()]
+        assert 'message' in columns
+        
+        conn.close()
+    
     def test_incremental_migrations(self, temp_db_path):
         """Тест последовательного применения миграций"""
         manager = MigrationManager(temp_db_path)
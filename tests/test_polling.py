@@ -0,0 +1,111 @@
+"""
+Тесты адаптивных интервалов опроса подписок
+"""
+
+import math
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from src.polling import (engagement_score, estimate_upload_interval, poll_interval,
+                         schedule_subscriptions, split_due, sync_priority)
+
+
+NOW = datetime(2025, 1, 15, 12, 0, tzinfo=timezone.utc)
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+def uploads(*hours_ago):
+    return [(NOW - timedelta(hours=hours)).strftime('%Y-%m-%dT%H:%M:%SZ') for hours in hours_ago]
+
+
+@pytest.mark.unit
+class TestEstimateUploadInterval:
+    """Тесты оценки интервала между загрузками"""
+
+    def test_median_gap(self):
+        """Тест: медиана промежутков устойчива к одному долгому перерыву"""
+        assert estimate_upload_interval(uploads(1, 3, 5, 7, 100), NOW) == 2 * HOUR
+
+    def test_quiet_channel_slows_down(self):
+        """Тест: давно молчащий канал опрашивается реже"""
+        assert estimate_upload_interval(uploads(240, 241, 242), NOW) == 240 * HOUR
+
+    def test_not_enough_history(self):
+        """Тест: по одному видео интервал не оценивается"""
+        assert estimate_upload_interval(uploads(5), NOW) is None
+        assert estimate_upload_interval([], NOW) is None
+
+
+@pytest.mark.unit
+class TestPollInterval:
+    """Тесты интервала опроса"""
+
+    def test_bounds(self):
+        """Тест: интервал ограничен минимумом и максимумом"""
+        assert poll_interval(4 * DAY, HOUR, 7 * DAY) == DAY
+        assert poll_interval(HOUR, 30 * 60, 7 * DAY) == 30 * 60
+        assert poll_interval(365 * DAY, HOUR, 7 * DAY) == 7 * DAY
+
+    def test_unknown_cadence_uses_minimum(self):
+        """Тест: без истории подписка опрашивается как можно чаще"""
+        assert poll_interval(None, HOUR, 7 * DAY) == HOUR
+
+
+@pytest.mark.unit
+class TestSchedule:
+    """Тесты расписания опроса"""
+
+    def test_schedule_subscriptions(self):
+        """Тест: следующий опрос через долю интервала загрузок"""
+        now = NOW.astimezone().replace(tzinfo=None)
+        schedule = schedule_subscriptions({1: uploads(1, 25, 49), 2: []},
+                                          min_interval=HOUR, max_interval=7 * DAY, now=now)
+
+        assert schedule == [
+            (1, DAY, (now + timedelta(hours=6)).isoformat()),
+            (2, None, (now + timedelta(hours=1)).isoformat()),
+        ]
+
+    def test_split_due(self):
+        """Тест: без расписания и с прошедшим временем подписка к опросу"""
+        now = datetime(2025, 1, 15, 12, 0)
+        targets = [
+            {'youtube_channel_id': 'UC_new', 'next_video_sync_at': None},
+            {'youtube_channel_id': 'UC_due', 'next_video_sync_at': '2025-01-15T11:00:00'},
+            {'youtube_channel_id': 'UC_later', 'next_video_sync_at': '2025-01-15T13:00:00'},
+        ]
+
+        due, not_due = split_due(targets, now)
+
+        assert [target['youtube_channel_id'] for target in due] == ['UC_new', 'UC_due']
+        assert [target['youtube_channel_id'] for target in not_due] == ['UC_later']
+
+
+@pytest.mark.unit
+class TestPriority:
+    """Тесты приоритета синхронизации по истории просмотров"""
+
+    def test_engagement_score(self):
+        """Тест: просматриваемый канал важнее заброшенного и нового"""
+        now = datetime(2025, 1, 15, 12, 0)
+        watched = engagement_score({'videos': 10, 'watched': 8,
+                                    'last_watched_at': '2025-01-15T09:00:00'}, now)
+        stale = engagement_score({'videos': 10, 'watched': 8,
+                                  'last_watched_at': '2024-10-01T09:00:00'}, now)
+        ignored = engagement_score({'videos': 20, 'watched': 0, 'last_watched_at': None}, now)
+        new = engagement_score({'videos': 0, 'watched': 0, 'last_watched_at': None}, now)
+
+        assert 0.8 < watched <= 1
+        assert watched > stale > new > ignored
+        assert new == 0.25
+
+    def test_sync_priority_ages(self):
+        """Тест: неактуальный канал со временем обгоняет просматриваемый"""
+        now = datetime(2025, 1, 15, 12, 0)
+
+        assert sync_priority(0.9, '2025-01-15T11:00:00', now) > \
+            sync_priority(0.05, '2025-01-14T12:00:00', now)
+        assert sync_priority(0.9, '2025-01-15T11:00:00', now) < \
+            sync_priority(0.05, '2025-01-05T12:00:00', now)
+        assert sync_priority(0.0, None, now) == math.inf
@@ -0,0 +1,155 @@
+"""
+Тесты для учёта квоты YouTube API
+"""
+
+import json
+import pytest
+from datetime import datetime, timezone
+from unittest.mock import Mock
+
+from src.quota import (QuotaLedger, quota_day, get_project_id, plan_video_sync,
+                       video_sync_cost, VIDEO_SYNC_COST)
+from src.youtube_api import YouTubeAPI
+
+
+@pytest.mark.unit
+class TestQuotaDay:
+    """Тесты определения дня квоты"""
+    
+    def test_quota_day_uses_pacific_time(self):
+        """Тест: день квоты сбрасывается в полночь по тихоокеанскому времени"""
+        # 05:00 UTC = 21:00/22:00 предыдущего дня в Калифорнии
+        moment = datetime(2025, 1, 15, 5, 0, tzinfo=timezone.utc)
+        assert quota_day(moment) == '2025-01-14'
+    
+    def test_get_project_id(self, tmp_path):
+        """Тест получения project_id из client_secrets.json"""
+        secrets = tmp_path / 'client_secrets.json'
+        secrets.write_text(json.dumps({'installed': {'project_id': 'my-project'}}))
+        
+        assert get_project_id(str(secrets)) == 'my-project'
+        assert get_project_id(str(tmp_path / 'missing.json')) == 'default'
+
+
+@pytest.mark.unit
+class TestQuotaLedger:
+    """Тесты журнала квоты"""
+    
+    def test_record_and_remaining(self, db):
+        """Тест учёта вызовов и остатка бюджета"""
+        ledger = QuotaLedger(db, 'test-project', daily_budget=100)
+        
+        ledger.record('videos.list')
+        ledger.record('channels.list', calls=2)
+        
+        assert ledger.used_today() == 3
+        assert ledger.remaining() == 97
+        assert ledger.session_usage()['channels.list'] == {'calls': 2, 'units': 2}
+    
+    def test_flush_persists_usage(self, db):
+        """Тест сохранения расхода в БД"""
+        ledger = QuotaLedger(db, 'test-project', daily_budget=100)
+        ledger.record('playlistItems.list', calls=5)
+        ledger.flush()
+        
+        # Новый журнал видит уже потраченную квоту
+        restored = QuotaLedger(db, 'test-project', daily_budget=100)
+        assert restored.used_today() == 5
+        assert restored.session_units() == 0
+        
+        # Другой проект не затронут
+        assert QuotaLedger(db, 'other-project').used_today() == 0
+    
+    def test_repeated_flush_accumulates(self, db):
+        """Тест: повторные flush суммируются"""
+        ledger = QuotaLedger(db, 'test-project')
+        ledger.record('videos.list')
+        ledger.flush()
+        ledger.record('videos.list')
+        ledger.flush()
+        
+        usage = db.get_quota_usage('test-project', quota_day())
+        assert usage == [{'endpoint': 'videos.list', 'calls': 2, 'units': 2}]
+    
+    def test_reload_sees_other_ledgers(self, db):
+        """Тест: reload учитывает расход других процессов"""
+        ledger = QuotaLedger(db, 'test-project', daily_budget=100)
+        other = QuotaLedger(db, 'test-project', daily_budget=100)
+        other.record('videos.list', calls=7)
+        other.flush()
+        
+        assert ledger.used_today() == 0
+        ledger.reload()
+        assert ledger.used_today() == 7
+    
+    def test_api_records_every_call(self):
+        """Тест: YouTubeAPI записывает стоимость каждого запроса"""
+        ledger = QuotaLedger(daily_budget=100)
+        api = YouTubeAPI('fake_credentials.json', quota_ledger=ledger)
+        
+        failing_request = Mock()
+        failing_request.execute.side_effect = Exception('boom')
+        
+        api._execute(Mock(), 'channels.list')
+        with pytest.raises(Exception):
+            api._execute(failing_request, 'videos.list')
+        
+        # Неудачные запросы тоже расходуют квоту
+        assert ledger.session_calls() == 2
+
+
+@pytest.mark.unit
+class TestPlanVideoSync:
+    """Тесты планировщика синхронизации видео"""
+    
+    def test_plan_within_budget(self):
+        """Тест: в план попадает столько подписок, сколько покрывает бюджет"""
+        subscriptions = [{'id': i, 'last_video_sync_at': None} for i in range(10)]
+        
+        planned, deferred = plan_video_sync(subscriptions, budget_units=4 * VIDEO_SYNC_COST + 1)
+        
+        assert len(planned) == 4
+        assert len(deferred) == 6
+    
+    def test_plan_prefers_least_recently_synced(self):
+        """Тест: сначала подписки, которые дольше всего не обновлялись"""
+        subscriptions = [
+            {'id': 1, 'last_video_sync_at': '2025-01-15T10:00:00'},
+            {'id': 2, 'last_video_sync_at': None},
+            {'id': 3, 'last_video_sync_at': '2025-01-14T10:00:00'},
+        ]
+        
+        planned, deferred = plan_video_sync(subscriptions, budget_units=2 * VIDEO_SYNC_COST)
+        
+        assert [s['id'] for s in planned] == [2, 3]
+        assert [s['id'] for s in deferred] == [1]
+    
+    def test_plan_prefers_priority(self):
+        """Тест: приоритет важнее давности обновления"""
+        subscriptions = [
+            {'id': 1, 'last_video_sync_at': '2025-01-14T10:00:00', 'priority': 0.2},
+            {'id': 2, 'last_video_sync_at': '2025-01-15T10:00:00', 'priority': 0.9},
+            {'id': 3, 'last_video_sync_at': '2025-01-13T10:00:00', 'priority': 0.2},
+        ]
+        
+        planned, deferred = plan_video_sync(subscriptions, budget_units=2 * VIDEO_SYNC_COST)
+        
+        assert [s['id'] for s in planned] == [2, 3]
+        assert [s['id'] for s in deferred] == [1]
+    
+    def test_rss_cost(self):
+        """Тест: при загрузке через RSS в бюджет помещается больше каналов"""
+        subscriptions = [{'id': i, 'last_video_sync_at': None} for i in range(10)]
+        
+        planned, _ = plan_video_sync(subscriptions, budget_units=6,
+                                     cost_per_subscription=video_sync_cost('rss'))
+        
+        assert video_sync_cost('api') == VIDEO_SYNC_COST
+        assert len(planned) == 6
+    
+    def test_plan_with_exhausted_budget(self):
+        """Тест: при исчерпанном бюджете ничего не планируется"""
+        planned, deferred = plan_video_sync([{'id': 1}], budget_units=-5)
+        
+        assert planned == []
+        assert len(deferred) == 1
@@ -0,0 +1,177 @@
+"""
+Тесты для выполнения запросов к YouTube API (лимиты, повторы, ошибки)
+"""
+
+import json
+import pytest
+from unittest.mock import Mock
+
+import isodate
+from googleapiclient.errors import HttpError
+
+from src.request_executor import (RequestExecutor, TokenBucket, classify_error,
+                                  get_error_reason, is_retryable)
+
+
+def make_http_error(status, reason=None):
+    """Создаёт HttpError с ответом в формате YouTube API"""
+    resp = Mock()
+    resp.status = status
+    resp.reason = 'error'
+    errors = [{'reason': reason, 'message': reason}] if reason else []
+    content = json.dumps({'error': {'code': status, 'message': 'error', 'errors': errors}})
+    return HttpError(resp, content.encode('utf-8'))
+
+
+def make_request(*outcomes):
+    """Мок запроса: исключения выбрасываются, остальное возвращается"""
+    request = Mock()
+    request.execute.side_effect = list(outcomes)
+    return request
+
+
+@pytest.mark.unit
+class TestErrorClassification:
+    """Тесты классификации ошибок по reason"""
+    
+    def test_get_error_reason(self):
+        """Тест получения reason из ответа API"""
+        assert get_error_reason(make_http_error(403, 'quotaExceeded')) == 'quotaExceeded'
+        assert get_error_reason(ValueError('quotaExceeded')) is None
+    
+    @pytest.mark.parametrize('status,reason,expected', [
+        (403, 'quotaExceeded', 'QUOTA_EXCEEDED'),
+        (404, 'playlistNotFound', 'PLAYLIST_NOT_FOUND'),
+        (404, None, 'PLAYLIST_NOT_FOUND'),
+        (403, 'rateLimitExceeded', 'RATE_LIMITED'),
+        (503, 'backendError', 'SERVER_ERROR'),
+        (400, 'invalidParameter', 'UNKNOWN'),
+    ])
+    def test_classify_http_errors(self, status, reason, expected):
+        """Тест классификации HttpError"""
+        assert classify_error(make_http_error(status, reason)) == expected
+    
+    def test_classify_other_errors(self):
+        """Тест: текст сообщения не влияет на классификацию"""
+        assert classify_error(isodate.ISO8601Error('bad')) == 'DURATION_PARSE_ERROR'
+        assert classify_error(ValueError('quota 404 duration')) == 'UNKNOWN'
+    
+    def test_is_retryable(self):
+        """Тест определения временных ошибок"""
+        assert is_retryable(make_http_error(503))
+        assert is_retryable(make_http_error(403, 'rateLimitExceeded'))
+        assert is_retryable(ConnectionResetError())
+        assert not is_retryable(make_http_error(403, 'quotaExceeded'))
+        assert not is_retryable(make_http_error(404, 'playlistNotFound'))
+
+
+@pytest.mark.unit
+class TestTokenBucket:
+    """Тесты ограничителя частоты запросов"""
+    
+    def test_burst_then_throttle(self):
+        """Тест: после исчерпания burst запросы ждут"""
+        now = [0.0]
+        sleeps = []
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleeps.append)
+        
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == pytest.approx(0.5)
+        assert sleeps == [pytest.approx(0.5)]
+    
+    def test_tokens_refill(self):
+        """Тест пополнения токенов со временем"""
+        now = [0.0]
+        bucket = TokenBucket(rate=1, capacity=1, clock=lambda: now[0], sleep=lambda s: None)
+        
+        bucket.acquire()
+        now[0] = 1.0
+        
+        assert bucket.acquire() == 0
+
+
+@pytest.mark.unit
+class TestRequestExecutor:
+    """Тесты повторов с экспоненциальной задержкой"""
+    
+    def test_retries_transient_errors(self):
+        """Тест: 503 и rateLimitExceeded повторяются"""
+        sleeps = []
+        executor = RequestExecutor(sleep=sleeps.append)
+        request = make_request(make_http_error(503), make_http_error(403, 'rateLimitExceeded'),
+                               {'items': []})
+        attempts = []
+        
+        response = executor.execute(request, on_attempt=lambda: attempts.append(1))
+        
+        assert response == {'items': []}
+        assert len(attempts) == 3  # Каждая попытка расходует квоту
+        assert len(sleeps) == 2
+        
+        metrics = executor.metrics.snapshot()
+        assert metrics['requests'] == 3
+        assert metrics['retries'] == 2
+        assert metrics['errors_by_reason'] == {'rateLimitExceeded': 1, 'HttpError': 1}
+    
+    def test_does_not_retry_permanent_errors(self):
+        """Тест: quotaExceeded не повторяется"""
+        executor = RequestExecutor(sleep=lambda s: None)
+        request = make_request(make_http_error(403, 'quotaExceeded'))
+        
+        with pytest.raises(HttpError):
+            executor.execute(request)
+        
+        assert request.execute.call_count == 1
+        assert executor.metrics.snapshot()['retries'] == 0
+    
+    def test_not_modified_is_not_a_failure(self):
+        """Тест: 304 на условный запрос не повторяется и не считается ошибкой"""
+        executor = RequestExecutor(sleep=lambda s: None)
+        request = make_request(make_http_error(304))
+        
+        with pytest.raises(HttpError):
+            executor.execute(request)
+        
+        metrics = executor.metrics.snapshot()
+        assert request.execute.call_count == 1
+        assert metrics['requests'] == 1
+        assert metrics['failures'] == 0
+    
+    def test_gives_up_after_max_retries(self):
+        """Тест: после max_retries ошибка пробрасывается"""
+        executor = RequestExecutor(max_retries=2, sleep=lambda s: None)
+        request = make_request(*[make_http_error(500)] * 5)
+        
+        with pytest.raises(HttpError):
+            executor.execute(request)
+        
+        assert request.execute.call_count == 3
+    
+    def test_backoff_delay_is_bounded(self):
+        """Тест: задержка растёт экспоненциально и ограничена сверху"""
+        executor = RequestExecutor(base_delay=1, max_delay=8)
+        
+        for attempt in range(10):
+            assert 0 <= executor.backoff_delay(attempt) <= min(8, 2 ** attempt)
+    
+    def test_throttle_waits_counted(self):
+        """Тест учёта ожиданий ограничителя"""
+        limiter = Mock()
+        limiter.acquire.return_value = 0.25
+        executor = RequestExecutor(rate_limiter=limiter)
+        
+        executor.execute(make_request({}))
+        
+        metrics = executor.metrics.snapshot()
+        assert metrics['throttle_waits'] == 1
+        assert metrics['throttle_wait_seconds'] == 0.25
+    
+    def test_from_config(self):
+        """Тест создания из настроек"""
+        executor = RequestExecutor.from_config({'api_rate_limit_per_second': 5,
+                                                'api_max_retries': 2})
+        
+        assert executor.rate_limiter.rate == 5
+        assert executor.max_retries == 2
+        assert RequestExecutor.from_config({'api_rate_limit_per_second': 0}).rate_limiter is None
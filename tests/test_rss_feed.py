@@ -0,0 +1,104 @@
+"""
+Тесты для RSS-лент каналов
+"""
+
+import pytest
+import requests
+from unittest.mock import Mock
+
+from src.rss_feed import FeedClient, parse_feed
+
+
+FEED_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015"
+      xmlns="http://www.w3.org/2005/Atom">
+  <title>Test Channel</title>
+  <entry>
+    <id>yt:video:vid_2</id>
+    <yt:videoId>vid_2</yt:videoId>
+    <yt:channelId>UC_test</yt:channelId>
+    <title>Second Video</title>
+    <published>2025-01-16T10:00:00+00:00</published>
+  </entry>
+  <entry>
+    <id>yt:video:vid_1</id>
+    <yt:videoId>vid_1</yt:videoId>
+    <yt:channelId>UC_test</yt:channelId>
+    <title>First Video</title>
+    <published>2025-01-15T10:00:00+00:00</published>
+  </entry>
+</feed>"""
+
+
+def make_response(status_code, content=b'', headers=None):
+    response = Mock()
+    response.status_code = status_code
+    response.content = content
+    response.headers = headers or {}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(str(status_code))
+    return response
+
+
+@pytest.fixture
+def session():
+    return Mock(spec=requests.Session)
+
+
+@pytest.mark.unit
+class TestParseFeed:
+    """Тесты разбора Atom-ленты"""
+    
+    def test_parse_entries(self):
+        """Тест: записи разбираются в порядке ленты"""
+        entries = parse_feed(FEED_XML)
+        
+        assert [e['video_id'] for e in entries] == ['vid_2', 'vid_1']
+        assert entries[0]['channel_id'] == 'UC_test'
+        assert entries[0]['title'] == 'Second Video'
+        assert entries[1]['published_at'] == '2025-01-15T10:00:00+00:00'
+    
+    def test_parse_empty_feed(self):
+        """Тест: лента без записей"""
+        assert parse_feed(b'<feed xmlns="http://www.w3.org/2005/Atom"/>') == []
+
+
+@pytest.mark.unit
+class TestFeedClient:
+    """Тесты клиента RSS-лент"""
+    
+    def test_fetch_modified(self, session):
+        """Тест: новая лента возвращает записи и валидаторы"""
+        session.get.return_value = make_response(
+            200, FEED_XML, {'ETag': '"abc"', 'Last-Modified': 'Thu, 16 Jan 2025 10:00:00 GMT'})
+        client = FeedClient(session=session)
+        
+        feed = client.fetch('UC_test')
+        
+        assert feed['modified'] is True
+        assert len(feed['entries']) == 2
+        assert feed['etag'] == '"abc"'
+        assert session.get.call_args.kwargs['params'] == {'channel_id': 'UC_test'}
+        assert session.get.call_args.kwargs['headers'] == {}
+    
+    def test_fetch_not_modified(self, session):
+        """Тест: 304 означает отсутствие новых видео"""
+        session.get.return_value = make_response(304)
+        client = FeedClient(session=session)
+        
+        feed = client.fetch('UC_test', etag='"abc"',
+                            last_modified='Thu, 16 Jan 2025 10:00:00 GMT')
+        
+        assert feed == {'modified': False, 'entries': [], 'etag': '"abc"',
+                        'last_modified': 'Thu, 16 Jan 2025 10:00:00 GMT'}
+        headers = session.get.call_args.kwargs['headers']
+        assert headers['If-None-Match'] == '"abc"'
+        assert headers['If-Modified-Since'] == 'Thu, 16 Jan 2025 10:00:00 GMT'
+    
+    def test_fetch_error(self, session):
+        """Тест: HTTP-ошибка пробрасывается"""
+        session.get.return_value = make_response(404)
+        client = FeedClient(session=session)
+        
+        with pytest.raises(requests.HTTPError):
+            client.fetch('UC_missing')
@@ -0,0 +1,143 @@
+"""
+Тесты фоновой синхронизации по расписанию
+"""
+
+import random
+import pytest
+
+from src.sync_daemon import RunLock, SyncDaemon
+
+
+class FakeClock:
+    """Часы, которые двигаются только при ожидании и работе задачи"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+def make_daemon(clock, durations, interval=60, jitter=0.0, lock=None, stop_after=None):
+    """Демон, задача которого длится durations[i] секунд на i-м запуске"""
+    starts = []
+    daemon = None
+
+    def job():
+        starts.append(clock())
+        clock.advance(durations[len(starts) - 1])
+        if len(starts) == (stop_after or len(durations)):
+            daemon.stop()
+
+    def wait(timeout):
+        clock.advance(timeout)
+        return daemon.stopped
+
+    daemon = SyncDaemon(job, interval=interval, jitter=jitter, lock=lock, clock=clock,
+                        wait=wait, rng=random.Random(1))
+    return daemon, starts
+
+
+@pytest.mark.unit
+class TestSyncDaemon:
+    """Тесты планировщика"""
+
+    def test_schedule_does_not_drift(self):
+        """Тест: запуски по сетке от старта, независимо от длительности"""
+        clock = FakeClock()
+        daemon, starts = make_daemon(clock, [10, 25, 5, 1])
+
+        daemon.run()
+
+        assert starts == [0, 60, 120, 180]
+        assert daemon.stats == {'runs': 4, 'failed': 0, 'skipped': 0}
+
+    def test_overrun_skips_missed_ticks(self):
+        """Тест: после долгого запуска пропущенные такты не догоняются"""
+        clock = FakeClock()
+        daemon, starts = make_daemon(clock, [130, 5, 5])
+
+        daemon.run()
+
+        assert starts == [0, 180, 240]
+
+    def test_jitter_is_not_accumulated(self):
+        """Тест: случайная задержка в пределах jitter от каждого такта"""
+        clock = FakeClock()
+        daemon, starts = make_daemon(clock, [1] * 20, jitter=10)
+
+        daemon.run()
+
+        for tick, started in enumerate(starts[1:], 1):
+            assert tick * 60 <= started <= tick * 60 + 10
+        assert len(set(started - tick * 60 for tick, started in enumerate(starts))) > 2
+
+    def test_failed_run_does_not_stop_daemon(self):
+        """Тест: ошибка синхронизации записывается, демон продолжает работу"""
+        clock = FakeClock()
+        calls = []
+        daemon = None
+
+        def job():
+            calls.append(clock())
+            if len(calls) == 1:
+                raise RuntimeError('boom')
+            daemon.stop()
+
+        def wait(timeout):
+            clock.advance(timeout)
+            return daemon.stopped
+
+        daemon = SyncDaemon(job, interval=60, clock=clock, wait=wait)
+        daemon.run()
+
+        assert calls == [0, 60]
+        assert daemon.stats == {'runs': 2, 'failed': 1, 'skipped': 0}
+
+    def test_stop_interrupts_wait(self):
+        """Тест: остановка во время ожидания завершает демон сразу"""
+        daemon = SyncDaemon(lambda: daemon.stop(), interval=3600)
+
+        daemon.run()
+
+        assert daemon.stats['runs'] == 1
+
+    def test_locked_run_is_skipped(self, tmp_path):
+        """Тест: пока синхронизация идёт в другом процессе, запуск пропускается"""
+        lock_path = str(tmp_path / 'sync.lock')
+        other = RunLock(lock_path)
+        assert other.acquire()
+
+        clock = FakeClock()
+        daemon, starts = make_daemon(clock, [1, 1], lock=RunLock(lock_path))
+        daemon.run_once()
+        other.release()
+        daemon.run()
+
+        assert daemon.stats['skipped'] == 1
+        assert len(starts) == 2
+
+    def test_invalid_interval(self):
+        """Тест: интервал должен быть положительным"""
+        with pytest.raises(ValueError):
+            SyncDaemon(lambda: None, interval=0)
+
+
+@pytest.mark.unit
+class TestRunLock:
+    """Тесты блокировки запусков"""
+
+    def test_lock_is_exclusive(self, tmp_path):
+        """Тест: второй держатель не получает блокировку до освобождения"""
+        lock_path = str(tmp_path / 'sync.lock')
+        first, second = RunLock(lock_path), RunLock(lock_path)
+
+        with first as locked:
+            assert locked
+            assert not second.acquire()
+
+        assert second.acquire()
+        second.release()
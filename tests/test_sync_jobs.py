@@ -0,0 +1,231 @@
+"""
+Тесты фоновых задач синхронизации веб-сервера
+"""
+
+import sys
+import threading
+import pytest
+from datetime import datetime, timedelta
+
+from src.sync_jobs import SyncJobRunner, event_stream, COMPLETED, FAILED, QUEUED, RUNNING
+
+
+OPTIONS = {'subscriptions': True, 'videos': True, 'max_videos': 5, 'resume': False}
+POLL = 0.01
+
+
+class BlockingSync:
+    """Синхронизация, которая ждёт разрешения завершиться"""
+
+    def __init__(self, error=None):
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.error = error
+
+    def __call__(self, options, output):
+        self.calls.append(options)
+        print('Синхронизация подписок...', file=output)
+        print('Готово', end='', file=output)
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error:
+            raise self.error
+
+
+@pytest.fixture
+def runner(db):
+    sync = BlockingSync()
+    runner = SyncJobRunner(db, sync, poll_interval=POLL)
+    runner.sync = sync
+    yield runner
+    sync.release.set()
+    runner.stop(timeout=5)
+
+
+@pytest.mark.unit
+class TestSyncJobRunner:
+    """Тесты SyncJobRunner"""
+
+    def test_job_runs_in_background(self, runner):
+        """Тест: submit() возвращается сразу, вывод задачи попадает в журнал"""
+        job, created = runner.submit(OPTIONS)
+
+        assert created is True
+        assert runner.sync.started.wait(5)
+        assert runner.get(job.id).status == RUNNING
+
+        runner.sync.release.set()
+        events, finished = job.wait(0, timeout=5)
+        while not finished:
+            events, finished = job.wait(len(job.events), timeout=5)
+
+        assert job.status == COMPLETED
+        assert [event['message'] for event in job.events] == ['Синхронизация подписок...', 'Готово']
+        assert runner.metrics()['completed'] == 1
+
+    def test_duplicates_coalesce(self, runner):
+        """Тест: одинаковый запрос присоединяется к идущей задаче"""
+        job, _ = runner.submit(OPTIONS)
+        assert runner.sync.started.wait(5)
+
+        same, created = runner.submit(dict(OPTIONS))
+        other, other_created = runner.submit(dict(OPTIONS, resume=True))
+
+        assert created is False
+        assert same.id == job.id
+        assert runner.get(job.id).requests == 2
+        assert other_created is True
+        assert [queued.id for queued in runner.active()] == [job.id, other.id]
+        assert runner.metrics() == {'submitted': 3, 'coalesced': 1, 'completed': 0, 'failed': 0}
+
+        runner.sync.release.set()
+        for _ in event_stream(other):
+            pass
+        assert len(runner.sync.calls) == 2
+
+    def test_covering_job_coalesces(self, runner):
+        """Тест: запрос, который идущая задача уже выполняет, присоединяется к ней"""
+        job, _ = runner.submit(OPTIONS)
+        assert runner.sync.started.wait(5)
+
+        videos, videos_created = runner.submit(dict(OPTIONS, subscriptions=False))
+        fewer, fewer_created = runner.submit(dict(OPTIONS, subscriptions=False, max_videos=3))
+
+        assert videos_created is False
+        assert videos.id == job.id
+        assert fewer_created is True
+
+        # Синхронизация только видео не выполняет полную
+        full, full_created = runner.submit(dict(OPTIONS, max_videos=3))
+        assert full_created is True
+        assert full.id != fewer.id
+
+    def test_output_does_not_replace_stdout(self, runner):
+        """Тест: задача пишет в свой вывод, sys.stdout сервера не подменяется"""
+        stdout = sys.stdout
+        job, _ = runner.submit(OPTIONS)
+        assert runner.sync.started.wait(5)
+
+        assert sys.stdout is stdout
+        print('Запрос к серверу')
+        runner.sync.release.set()
+        list(event_stream(job))
+
+        assert 'Запрос к серверу' not in [event['message'] for event in job.events]
+        assert runner.metrics() == {'submitted': 1, 'coalesced': 0, 'completed': 1, 'failed': 0}
+
+    def test_failed_job(self, db):
+        """Тест: исключение синхронизации завершает задачу с ошибкой"""
+        sync = BlockingSync(error=RuntimeError('quota exceeded'))
+        sync.release.set()
+        runner = SyncJobRunner(db, sync, poll_interval=POLL)
+
+        job, _ = runner.submit(OPTIONS)
+        messages = list(event_stream(job))
+        runner.stop(timeout=5)
+
+        assert job.status == FAILED
+        assert job.error == 'quota exceeded'
+        assert messages[0].startswith('id: 1\nevent: progress\n')
+        assert messages[-1].startswith('event: status\n')
+        assert '"failed"' in messages[-1]
+
+    def test_stream_resumes_after_last_event(self, runner):
+        """Тест: переподключённый поток продолжает с Last-Event-ID"""
+        runner.sync.release.set()
+        job, _ = runner.submit(OPTIONS)
+        list(event_stream(job))
+
+        messages = list(event_stream(job, after=1))
+
+        assert len(messages) == 2
+        assert messages[0].startswith('id: 2\n')
+
+    def test_history_is_bounded(self, runner):
+        """Тест: хранится не больше history завершённых задач"""
+        runner.history = 1
+        runner.sync.release.set()
+
+        jobs = []
+        for max_videos in range(1, 4):
+            job, _ = runner.submit(dict(OPTIONS, max_videos=max_videos))
+            list(event_stream(job))
+            jobs.append(job)
+
+        assert runner.get(jobs[0].id) is None
+        assert runner.get(jobs[2].id).status == COMPLETED
+
+
+@pytest.mark.unit
+class TestSharedJobs:
+    """Тесты задач, общих для нескольких процессов веб-сервера"""
+
+    def test_job_visible_to_every_worker(self, db):
+        """Тест: задачу, принятую одним процессом, видит и объединяет другой"""
+        first_sync, second_sync = BlockingSync(), BlockingSync()
+        first = SyncJobRunner(db, first_sync, poll_interval=POLL)
+        second = SyncJobRunner(db, second_sync, poll_interval=POLL)
+        try:
+            job, _ = first.submit(OPTIONS)
+            assert first_sync.started.wait(5)
+
+            same, created = second.submit(dict(OPTIONS, subscriptions=False))
+            queued, _ = second.submit(dict(OPTIONS, resume=True))
+
+            assert created is False
+            assert same.id == job.id
+            assert second.get(job.id).status == RUNNING
+            assert second.get(queued.id).status == QUEUED
+            assert [event['message'] for event in second.get(job.id).events] == [
+                'Синхронизация подписок...']
+
+            # Задачи выполняются по одной во всех процессах
+            assert not second_sync.started.wait(0.2)
+
+            first_sync.release.set()
+            second_sync.release.set()
+            list(event_stream(second.get(queued.id)))
+
+            assert len(first_sync.calls) + len(second_sync.calls) == 2
+            assert second.get(job.id).status == COMPLETED
+        finally:
+            first_sync.release.set()
+            second_sync.release.set()
+            first.stop(timeout=5)
+            second.stop(timeout=5)
+
+    def test_stale_job_fails(self, db):
+        """Тест: задача остановленного процесса завершается с ошибкой, очередь идёт дальше"""
+        stale, _ = db.add_sync_job('stale', OPTIONS, lambda options: False, history=50)
+        assert db.claim_sync_job('2000-01-01T00:00:00', 'stopped')['id'] == 'stale'
+        db.touch_sync_job('stale')
+
+        sync = BlockingSync()
+        sync.release.set()
+        runner = SyncJobRunner(db, sync, poll_interval=POLL, heartbeat=0.01)
+        try:
+            job, created = runner.submit(dict(OPTIONS, resume=True))
+            list(event_stream(job))
+        finally:
+            runner.stop(timeout=5)
+
+        assert created is True
+        assert job.status == COMPLETED
+        assert runner.get('stale').status == FAILED
+        assert runner.get('stale').error
+
+    def test_running_job_sends_heartbeats(self, runner):
+        """Тест: идущая задача отмечает, что её процесс работает"""
+        runner.heartbeat = 0.01
+        job, _ = runner.submit(OPTIONS)
+        assert runner.sync.started.wait(5)
+        started = runner.db.get_sync_job(job.id)['heartbeat_at']
+
+        deadline = datetime.now() + timedelta(seconds=5)
+        while runner.db.get_sync_job(job.id)['heartbeat_at'] == started:
+            assert datetime.now() < deadline
+
+        # Задача с живым процессом не считается зависшей
+        assert runner.db.claim_sync_job(started, 'stopped') is None
+        assert runner.get(job.id).status == RUNNING
@@ -0,0 +1,97 @@
+"""
+Тесты пакетной записи видео при синхронизации
+"""
+
+import threading
+import pytest
+
+from src.sync_pipeline import BatchWriter
+
+
+def make_video(video_id):
+    return {
+        'video_id': video_id,
+        'title': f'Video {video_id}',
+        'thumbnail': 'thumb.jpg',
+        'published_at': '2025-02-01T10:00:00Z',
+        'duration': '5:00',
+        'duration_seconds': 300,
+    }
+
+
+class RecordingDatabase:
+    """БД, которая запоминает пакеты вместо записи"""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.fail = fail
+        self.written = threading.Event()
+
+    def save_videos_batch(self, videos, synced_ids=(), feed_states=()):
+        if self.fail:
+            raise RuntimeError('disk I/O error')
+        self.batches.append((list(videos), list(synced_ids), list(feed_states)))
+        self.written.set()
+        return {}
+
+
+@pytest.mark.unit
+class TestBatchWriter:
+    """Тесты BatchWriter"""
+
+    def test_commits_in_batches(self):
+        """Тест: записи группируются по batch_size строк"""
+        db = RecordingDatabase()
+
+        with BatchWriter(db, batch_size=4, flush_interval=60) as writer:
+            for i in range(5):
+                writer.put([i], [make_video(f'v{i}a'), make_video(f'v{i}b')])
+
+        # 2 + 2 строки -> коммит, 2 + 2 -> коммит, остаток при закрытии
+        assert [len(rows) for rows, _, _ in db.batches] == [4, 4, 2]
+        assert [synced for _, synced, _ in db.batches] == [[0, 1], [2, 3], [4]]
+        assert writer.stats['commits'] == 3
+        assert writer.summary()['channels'] == 5
+
+    def test_flush_interval(self):
+        """Тест: неполный пакет записывается по истечении интервала"""
+        db = RecordingDatabase()
+        writer = BatchWriter(db, batch_size=1000, flush_interval=0.01)
+        writer.start()
+
+        writer.put([1], [make_video('v1')], ('UC1', 'etag', None))
+        assert db.written.wait(5)
+        assert db.batches[0][2] == [('UC1', 'etag', None)]
+
+        writer.close()
+        assert len(db.batches) == 1
+
+    def test_fans_out_videos(self, populated_db):
+        """Тест: видео записываются для каждой подписки канала"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        subscription_id = populated_db['subscription_id']
+        other_id = db.add_subscription(channel_id, 'UC_other', 'Other')
+
+        with BatchWriter(db) as writer:
+            writer.put([subscription_id, other_id], [make_video('new_video')])
+            # Уже сохранённое видео не считается новым
+            writer.put([subscription_id], [make_video('test_video_789')])
+
+        assert writer.new_videos == {subscription_id: 1, other_id: 1}
+        assert writer.stats['rows'] == 3
+
+        subscriptions = {sub['id']: sub for sub in db.get_subscriptions_by_channel(channel_id)}
+        assert subscriptions[other_id]['last_video_sync_at'] is not None
+
+    def test_write_error_is_raised(self):
+        """Тест: ошибка записи не теряется и не блокирует загрузку"""
+        writer = BatchWriter(RecordingDatabase(fail=True), batch_size=1, queue_size=1)
+        writer.start()
+
+        with pytest.raises(RuntimeError):
+            for i in range(100):
+                writer.put([i], [make_video(f'v{i}')])
+
+        with pytest.raises(RuntimeError):
+            writer.close()
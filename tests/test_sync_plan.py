@@ -0,0 +1,59 @@
+"""
+Тесты прогноза стоимости и длительности синхронизации
+"""
+
+import pytest
+from datetime import datetime
+
+from src.sync_plan import change_probability, format_duration, historical_latency, wall_time
+
+
+NOW = datetime(2025, 1, 15, 12, 0, 0)
+
+
+def make_target(last_sync_at='2025-01-15T06:00:00', upload_interval=24 * 3600):
+    return {'last_video_sync_at': last_sync_at,
+            'subscriptions': [{'last_video_sync_at': last_sync_at,
+                               'upload_interval_seconds': upload_interval}]}
+
+
+@pytest.mark.unit
+class TestSyncPlan:
+    """Тесты функций прогноза"""
+
+    def test_change_probability(self):
+        """Тест: вероятность новой загрузки по интервалу загрузок и ETag"""
+        feed_state = {'etag': '"abc"', 'last_modified': None}
+
+        # 6 часов с последней синхронизации при загрузке раз в сутки
+        assert change_probability(make_target(), feed_state, NOW) == 0.25
+        assert change_probability(make_target(upload_interval=3600), feed_state, NOW) == 1.0
+        # Без ETag лента загружается целиком
+        assert change_probability(make_target(), {}, NOW) == 1.0
+        assert change_probability(make_target(last_sync_at=None), feed_state, NOW) == 1.0
+        assert change_probability(make_target(upload_interval=None), feed_state, NOW) == 1.0
+
+    def test_historical_latency(self):
+        """Тест: среднее время на аккаунт и на канал по завершённым запускам"""
+        runs = [
+            {'duration_seconds': 30.0, 'accounts': {'1': {'seconds': 20.0, 'channels': 10},
+                                                    '2': {'seconds': 10.0, 'channels': 10}}},
+            {'duration_seconds': None, 'accounts': {'1': {'seconds': 99.0, 'channels': 1}}},
+            {'duration_seconds': 5.0, 'accounts': {}},
+        ]
+
+        assert historical_latency(runs) == 15.0
+        assert historical_latency(runs, per='channels') == 1.5
+        assert historical_latency([]) is None
+
+    def test_wall_time(self):
+        """Тест: аккаунты распределяются между процессами, самые долгие первыми"""
+        assert wall_time([5.0, 3.0, 2.0]) == 10.0
+        assert wall_time([5.0, 3.0, 2.0], processes=2) == 5.0
+        assert wall_time([4.0, 4.0, 4.0], processes=2) == 8.0
+        assert wall_time([], processes=4) == 0.0
+
+    def test_format_duration(self):
+        """Тест форматирования длительности"""
+        assert format_duration(65.4) == '1:05'
+        assert format_duration(3723) == '1:02:03'
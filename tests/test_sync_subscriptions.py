@@ -0,0 +1,640 @@
+"""
+Тесты для синхронизации подписок и видео
+"""
+
+import io
+import json
+import threading
+import pytest
+import requests
+from unittest.mock import Mock, patch
+
+from googleapiclient.errors import HttpError
+
+from src.quota import QuotaLedger, VIDEO_SYNC_COST
+from src.sync_subscriptions import (iter_subscription_videos, group_subscriptions_by_channel,
+                                    main, plan_sync, run_sync, sync_subscriptions, sync_videos)
+
+
+def make_subscriptions(count):
+    return [
+        {'id': i, 'youtube_channel_id': f'UC_{i}', 'channel_name': f'Channel {i}'}
+        for i in range(count)
+    ]
+
+
+def make_http_error(status, reason):
+    """Создаёт HttpError с ответом в формате YouTube API"""
+    resp = Mock(status=status, reason='error')
+    content = json.dumps({'error': {'code': status, 'errors': [{'reason': reason}]}})
+    return HttpError(resp, content.encode('utf-8'))
+
+
+def make_api(fetch):
+    """Мок YouTubeAPI, каждый worker получает свой клиент"""
+    api = Mock()
+    api.get_channel_videos.side_effect = fetch
+    clients = []
+
+    def create_worker_client():
+        client = Mock()
+        client.thread = threading.current_thread().name
+        client.get_channel_videos.side_effect = fetch
+        clients.append(client)
+        return client
+
+    api.create_worker_client.side_effect = create_worker_client
+    return api, clients
+
+
+@pytest.mark.unit
+class TestIterSubscriptionVideos:
+    """Тесты параллельной загрузки видео"""
+    
+    def test_sequential_mode(self):
+        """Тест: с одним worker'ом используется исходный клиент"""
+        api, clients = make_api(lambda channel_id, max_results: [{'video_id': channel_id}])
+        
+        results = list(iter_subscription_videos(api, make_subscriptions(3), 5, workers=1))
+        
+        assert [sub['id'] for sub, _, _ in results] == [0, 1, 2]
+        assert clients == []
+    
+    def test_concurrent_mode_returns_all_results(self):
+        """Тест: все подписки обработаны, у каждого потока свой клиент"""
+        api, clients = make_api(lambda channel_id, max_results: [{'video_id': channel_id}])
+        
+        results = list(iter_subscription_videos(api, make_subscriptions(20), 5, workers=4))
+        
+        assert sorted(sub['id'] for sub, _, _ in results) == list(range(20))
+        assert all(videos == [{'video_id': sub['youtube_channel_id']}]
+                   for sub, videos, _ in results)
+        assert 1 <= len(clients) <= 4
+        assert len({client.thread for client in clients}) == len(clients)
+        api.get_channel_videos.assert_not_called()
+    
+    def test_errors_are_returned_to_caller(self):
+        """Тест: ошибки передаются вызывающему потоку"""
+        def fetch(channel_id, max_results):
+            if channel_id == 'UC_1':
+                raise ValueError('playlistNotFound')
+            return []
+        
+        api, _ = make_api(fetch)
+        
+        results = list(iter_subscription_videos(api, make_subscriptions(3), 5, workers=2))
+        errors = {sub['id']: error for sub, _, error in results if error is not None}
+        
+        assert list(errors) == [1]
+        assert 'playlistNotFound' in str(errors[1])
+    
+    def test_close_stops_submitting(self):
+        """Тест: после остановки новые запросы не отправляются"""
+        api, clients = make_api(lambda channel_id, max_results: [])
+        
+        results = iter_subscription_videos(api, make_subscriptions(100), 5, workers=2)
+        next(results)
+        results.close()
+        
+        calls = sum(client.get_channel_videos.call_count for client in clients)
+        assert calls <= 5
+
+
+@pytest.fixture
+def shared_subscriptions_db(db):
+    """Два личных канала, подписанных на один и тот же канал YouTube"""
+    channel_ids = []
+    for i in (1, 2):
+        channel_id = db.add_personal_channel(
+            name=f'Personal {i}',
+            youtube_channel_id=f'UC_personal_{i}',
+            oauth_token_path=f'token{i}.pickle'
+        )
+        db.add_subscription(channel_id, 'UC_shared', 'Shared Creator')
+        channel_ids.append(channel_id)
+    db.add_subscription(channel_ids[1], 'UC_only_second', 'Second Only')
+    return db, channel_ids
+
+
+def make_registry(fetch):
+    api = Mock()
+    api.get_channel_videos.side_effect = fetch
+    registry = Mock()
+    registry.get.return_value = api
+    registry.executor.metrics.snapshot.return_value = {
+        'requests': 0, 'retries': 0, 'throttle_waits': 0,
+        'retry_wait_seconds': 0, 'throttle_wait_seconds': 0,
+    }
+    return registry, api
+
+
+def make_page(*channel_ids, page_token='', next_page_token=None, etag=None, modified=True):
+    items = [{'channel_id': cid, 'channel_name': cid, 'thumbnail': 'thumb.jpg'}
+             for cid in channel_ids]
+    return {'page_token': page_token, 'etag': etag or f'etag-{page_token}',
+            'next_page_token': next_page_token, 'items': items if modified else None}
+
+
+@pytest.mark.integration
+class TestSyncSubscriptions:
+    """Тесты постраничной синхронизации подписок"""
+    
+    def test_pages_upserted_and_missing_deactivated(self, populated_db):
+        """Тест: все страницы сохранены, пропавшие подписки деактивированы"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        registry, api = make_registry(None)
+        api.iter_subscription_pages.return_value = iter([
+            make_page('UC_a', 'UC_b', next_page_token='p2'), make_page('UC_c', page_token='p2')])
+        
+        sync_subscriptions(db, ledger=QuotaLedger(db), registry=registry)
+        
+        active = {s['youtube_channel_id'] for s in db.get_subscriptions_by_channel(channel_id)}
+        assert active == {'UC_a', 'UC_b', 'UC_c'}
+    
+    def test_incomplete_listing_deactivates_nothing(self, populated_db):
+        """Тест: при ошибке на середине списка подписки не деактивируются"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        registry, api = make_registry(None)
+        
+        def pages():
+            yield make_page('UC_a')
+            raise RuntimeError('backendError')
+        
+        api.iter_subscription_pages.return_value = pages()
+        
+        sync_subscriptions(db, ledger=QuotaLedger(db), registry=registry)
+        
+        active = {s['youtube_channel_id'] for s in db.get_subscriptions_by_channel(channel_id)}
+        assert active == {'UC_subscription_456', 'UC_a'}
+        assert db.get_subscription_sync_state(channel_id) is None
+    
+    def test_unchanged_set_skips_diff(self, populated_db):
+        """Тест: при неизменном наборе подписок БД не обновляется"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        registry, api = make_registry(None)
+        api.iter_subscription_pages.return_value = iter([
+            make_page('UC_a', next_page_token='p2'), make_page('UC_b', page_token='p2')])
+        sync_subscriptions(db, ledger=QuotaLedger(db), registry=registry)
+        
+        state = db.get_subscription_sync_state(channel_id)
+        assert state['pages'][1] == {'page_token': 'p2', 'etag': 'etag-p2',
+                                     'next_page_token': None, 'channel_ids': ['UC_b']}
+        
+        # Первая страница не изменилась (304), вторая пришла в другом виде
+        api.iter_subscription_pages.return_value = iter([
+            make_page(next_page_token='p2', modified=False),
+            make_page('UC_b', page_token='p2', etag='etag-new')])
+        
+        with patch.object(db, 'upsert_subscriptions') as upsert, \
+             patch.object(db, 'deactivate_missing_subscriptions') as deactivate:
+            sync_subscriptions(db, ledger=QuotaLedger(db), registry=registry)
+        
+        cached = api.iter_subscription_pages.call_args.kwargs['cached_pages']
+        assert cached['']['etag'] == 'etag-'
+        upsert.assert_not_called()
+        deactivate.assert_not_called()
+        assert db.get_subscription_sync_state(channel_id)['pages'][1]['etag'] == 'etag-new'
+    
+    def test_changed_set_upserts_changed_pages(self, populated_db):
+        """Тест: изменившиеся страницы сохраняются, пропавшие подписки деактивируются"""
+        db = populated_db['db']
+        channel_id = populated_db['channel_id']
+        registry, api = make_registry(None)
+        api.iter_subscription_pages.return_value = iter([
+            make_page('UC_a', next_page_token='p2'), make_page('UC_b', page_token='p2')])
+        sync_subscriptions(db, ledger=QuotaLedger(db), registry=registry)
+        
+        api.iter_subscription_pages.return_value = iter([
+            make_page(next_page_token='p2', modified=False),
+            make_page('UC_c', page_token='p2', etag='etag-new')])
+        sync_subscriptions(db, ledger=QuotaLedger(db), registry=registry)
+        
+        active = {s['youtube_channel_id'] for s in db.get_subscriptions_by_channel(channel_id)}
+        assert active == {'UC_a', 'UC_c'}
+
+
+@pytest.mark.unit
+class TestGroupSubscriptions:
+    """Тесты группировки подписок по каналам YouTube"""
+    
+    def test_group_subscriptions_by_channel(self):
+        """Тест: одна цель на канал, самая старая дата синхронизации"""
+        subscriptions = [
+            {'id': 1, 'youtube_channel_id': 'UC_a', 'channel_name': 'A',
+             'last_video_sync_at': '2025-01-15', 'next_video_sync_at': '2025-01-16'},
+            {'id': 2, 'youtube_channel_id': 'UC_b', 'channel_name': 'B',
+             'last_video_sync_at': '2025-01-14'},
+            {'id': 3, 'youtube_channel_id': 'UC_a', 'channel_name': 'A',
+             'last_video_sync_at': None, 'next_video_sync_at': '2025-01-17'},
+        ]
+        
+        targets = group_subscriptions_by_channel(subscriptions)
+        
+        assert [t['youtube_channel_id'] for t in targets] == ['UC_a', 'UC_b']
+        assert [s['id'] for s in targets[0]['subscriptions']] == [1, 3]
+        assert targets[0]['last_video_sync_at'] is None
+        assert targets[0]['next_video_sync_at'] == '2025-01-16'
+
+
+@pytest.mark.integration
+class TestSyncVideos:
+    """Тесты загрузки видео"""
+    
+    def test_shared_channel_fetched_once(self, shared_subscriptions_db):
+        """Тест: общий канал загружается один раз, видео у обеих подписок"""
+        db, channel_ids = shared_subscriptions_db
+        video = {'video_id': 'vid_1', 'title': 'Video', 'thumbnail': 'thumb.jpg',
+                 'published_at': '2025-01-15T10:00:00Z', 'duration': '1:00'}
+        registry, api = make_registry(lambda channel_id, max_results: [dict(video)])
+        
+        sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry)
+        
+        fetched = [call.args[0] for call in api.get_channel_videos.call_args_list]
+        assert sorted(fetched) == ['UC_only_second', 'UC_shared']
+        assert len(db.get_videos_by_personal_channel(channel_ids[0])) == 1
+        assert len(db.get_videos_by_personal_channel(channel_ids[1])) == 2
+    
+    def test_adaptive_polling_skips_channels_not_due(self, shared_subscriptions_db):
+        """Тест: канал не опрашивается повторно до наступления срока"""
+        db, channel_ids = shared_subscriptions_db
+        registry, api = make_registry(lambda channel_id, max_results: [])
+        
+        sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                    adaptive_polling=True)
+        sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                    adaptive_polling=True)
+        
+        assert api.get_channel_videos.call_count == 2
+        assert all(sub['next_video_sync_at'] is not None
+                   for sub in db.get_subscriptions_by_channel(channel_ids[1]))
+        
+        sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                    adaptive_polling=False)
+        
+        assert api.get_channel_videos.call_count == 4
+    
+    def test_watched_channel_planned_first(self, shared_subscriptions_db):
+        """Тест: при нехватке квоты загружается канал, который смотрят"""
+        db, channel_ids = shared_subscriptions_db
+        for sub in db.get_subscriptions_by_channel(channel_ids[1]):
+            db.save_videos_batch([], synced_ids=[sub['id']])
+            if sub['youtube_channel_id'] == 'UC_only_second':
+                video_id = db.add_video(sub['id'], 'vid_seen', 'Seen', 'thumb.jpg',
+                                        '2025-01-15T10:00:00Z', '1:00')
+                db.mark_video_watched(video_id)
+        for sub in db.get_subscriptions_by_channel(channel_ids[0]):
+            db.save_videos_batch([], synced_ids=[sub['id']])
+        registry, api = make_registry(lambda channel_id, max_results: [])
+        ledger = QuotaLedger(db, daily_budget=VIDEO_SYNC_COST)
+        
+        sync_videos(db, ledger=ledger, workers=1, registry=registry, adaptive_polling=False)
+        
+        api.get_channel_videos.assert_called_once()
+        assert api.get_channel_videos.call_args.args[0] == 'UC_only_second'
+    
+    def test_resume_interrupted_run(self, shared_subscriptions_db):
+        """Тест: после прерывания --resume загружает только оставшиеся каналы"""
+        db, channel_ids = shared_subscriptions_db
+        
+        def interrupted(channel_id, max_results):
+            if channel_id == 'UC_only_second':
+                raise KeyboardInterrupt
+            return []
+        
+        registry, api = make_registry(interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                        adaptive_polling=False)
+        
+        run = db.get_resumable_sync_run('videos')
+        assert run['status'] == 'interrupted'
+        assert run['processed'] == 1
+        # Общий канал отмечен обработанным для обоих личных каналов: по этой
+        # отметке продолжение пропускает его
+        synced = {sub['youtube_channel_id']: sub['last_video_sync_at']
+                  for channel_id in channel_ids
+                  for sub in db.get_subscriptions_by_channel(channel_id)
+                  if sub['last_video_sync_at']}
+        assert list(synced) == ['UC_shared']
+        assert synced['UC_shared'] >= run['started_at']
+        
+        registry, api = make_registry(lambda channel_id, max_results: [])
+        sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                    adaptive_polling=False, resume=True)
+        
+        assert [call.args[0] for call in api.get_channel_videos.call_args_list] == ['UC_only_second']
+        assert db.get_resumable_sync_run('videos') is None
+        
+        # Без --resume запуск начинается заново
+        sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                    adaptive_polling=False)
+        
+        assert api.get_channel_videos.call_count == 3
+    
+    def test_resume_retries_failed_channels(self, shared_subscriptions_db):
+        """Тест: канал с ошибкой загрузки не отмечается обработанным и повторяется при --resume"""
+        db, channel_ids = shared_subscriptions_db
+        
+        def interrupted(channel_id, max_results):
+            if channel_id == 'UC_shared':
+                raise ConnectionError('network is unreachable')
+            raise KeyboardInterrupt
+        
+        registry, api = make_registry(interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                        adaptive_polling=False)
+        
+        assert all(sub['last_video_sync_at'] is None for channel_id in channel_ids
+                   for sub in db.get_subscriptions_by_channel(channel_id))
+        
+        registry, api = make_registry(lambda channel_id, max_results: [])
+        sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                    adaptive_polling=False, resume=True)
+        
+        assert sorted(call.args[0] for call in api.get_channel_videos.call_args_list) == [
+            'UC_only_second', 'UC_shared']
+    
+    def test_error_logged_for_every_subscription(self, shared_subscriptions_db):
+        """Тест: ошибка общего канала записывается для каждой подписки"""
+        db, channel_ids = shared_subscriptions_db
+        
+        def fetch(channel_id, max_results):
+            if channel_id == 'UC_shared':
+                raise ValueError('boom')
+            return []
+        
+        registry, _ = make_registry(fetch)
+        
+        sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry)
+        
+        errors = db.get_unresolved_errors()
+        assert sorted(e['personal_channel_id'] for e in errors) == sorted(channel_ids)
+    
+    def test_failing_channel_circuit(self, shared_subscriptions_db):
+        """Тест: постоянно падающий канал пропускается, после паузы проверяется снова"""
+        db, channel_ids = shared_subscriptions_db
+        failing = {'UC_shared'}
+        
+        def fetch(channel_id, max_results):
+            if channel_id in failing:
+                raise make_http_error(404, 'playlistNotFound')
+            return []
+        
+        registry, api = make_registry(fetch)
+        for _ in range(4):
+            sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                        adaptive_polling=False)
+        
+        fetched = [call.args[0] for call in api.get_channel_videos.call_args_list]
+        # После трёх ошибок подряд канал больше не запрашивается
+        assert fetched.count('UC_shared') == 3
+        assert fetched.count('UC_only_second') == 4
+        
+        tripped = db.get_tripped_subscriptions()
+        assert len(tripped) == 2
+        assert all(sub['failure_count'] == 3 and sub['last_failure_type'] == 'PLAYLIST_NOT_FOUND'
+                   for sub in tripped)
+        
+        # Пауза истекла: одна пробная загрузка, успех снимает блокировку
+        db.update_circuit_state([(sub['id'], 3, '2000-01-01T00:00:00', None) for sub in tripped])
+        failing.clear()
+        sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                    adaptive_polling=False)
+        
+        assert api.get_channel_videos.call_count == 9
+        assert db.get_tripped_subscriptions() == []
+        assert all(sub['failure_count'] == 0 for channel_id in channel_ids
+                   for sub in db.get_subscriptions_by_channel(channel_id))
+    
+    def test_network_outage_does_not_trip_circuit(self, shared_subscriptions_db):
+        """Тест: сбой сети или отозванный токен не блокирует подписки"""
+        db, channel_ids = shared_subscriptions_db
+        
+        errors = [ConnectionError('network is unreachable'), make_http_error(401, 'authError')]
+        for error in errors:
+            def fetch(channel_id, max_results):
+                raise error
+            
+            registry, api = make_registry(fetch)
+            for _ in range(4):
+                sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                            adaptive_polling=False)
+            
+            assert api.get_channel_videos.call_count == 8
+        
+        assert db.get_tripped_subscriptions() == []
+        assert all(sub['failure_count'] == 0 for channel_id in channel_ids
+                   for sub in db.get_subscriptions_by_channel(channel_id))
+    
+    def test_plan(self, shared_subscriptions_db):
+        """Тест: прогноз вызовов и квоты без обращения к API"""
+        db, channel_ids = shared_subscriptions_db
+        options = dict(ledger=QuotaLedger(db), workers=1, fetch_strategy='api',
+                       adaptive_polling=False)
+        
+        plan = plan_sync(db, **options)
+        
+        assert (plan['accounts'], plan['subscriptions'], plan['channels']) == (2, 3, 2)
+        # Страница подписок на аккаунт и три вызова на каждый канал
+        assert plan['api_calls'] == {'channels.list': 2, 'subscriptions.list': 2,
+                                     'playlistItems.list': 2, 'videos.list': 2}
+        assert plan['quota_units'] == 8
+        assert plan['history'] == {'subscriptions': 0, 'videos': 0}
+        
+        # В отдельных процессах общий канал загружается каждым аккаунтом
+        parallel = plan_sync(db, subscriptions=False, parallel_accounts=2, **options)
+        assert parallel['planned'] == 3
+        assert parallel['api_calls']['subscriptions.list'] == 0
+        assert parallel['wall_seconds'] == pytest.approx(max(parallel['account_seconds'].values()))
+        
+        # Заблокированные подписки не планируются
+        shared = [sub['id'] for channel_id in channel_ids
+                  for sub in db.get_subscriptions_by_channel(channel_id)
+                  if sub['youtube_channel_id'] == 'UC_shared']
+        db.update_circuit_state([(sub_id, 3, '2099-01-01T00:00:00', 'UNKNOWN') for sub_id in shared])
+        assert plan_sync(db, subscriptions=False, **options)['planned'] == 1
+    
+    def test_rss_strategy_hydrates_only_new_videos(self, shared_subscriptions_db):
+        """Тест: через RSS запрашиваются только неизвестные видео"""
+        db, channel_ids = shared_subscriptions_db
+        shared_id = db.get_subscriptions_by_channel(channel_ids[0])[0]['id']
+        db.add_video(shared_id, 'vid_old', 'Old', 'thumb.jpg', '2025-01-14T10:00:00Z', '1:00')
+        db.save_videos_batch([], feed_states=[('UC_shared', '"etag"', None)])
+        
+        feeds = {
+            'UC_shared': {'modified': True, 'etag': '"etag2"', 'last_modified': None,
+                          'entries': [{'video_id': 'vid_new'}, {'video_id': 'vid_old'}]},
+            'UC_only_second': {'modified': False, 'etag': None, 'last_modified': None,
+                               'entries': []},
+        }
+        registry, api = make_registry(lambda channel_id, max_results: [])
+        api.get_videos.side_effect = lambda video_ids: [
+            {'video_id': video_id, 'title': video_id, 'thumbnail': 'thumb.jpg',
+             'published_at': '2025-01-15T10:00:00Z', 'duration': '1:00'}
+            for video_id in video_ids
+        ]
+        
+        with patch('src.sync_subscriptions.FeedClient') as feed_client_cls:
+            feed_client = feed_client_cls.return_value
+            feed_client.fetch.side_effect = lambda channel_id, etag, last_modified: feeds[channel_id]
+            sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                        fetch_strategy='rss')
+        
+        # vid_old уже есть у первой подписки, но не у второй
+        api.get_videos.assert_called_once_with(['vid_new', 'vid_old'])
+        api.get_channel_videos.assert_not_called()
+        assert db.get_channel_cache(['UC_shared'])['UC_shared']['feed_etag'] == '"etag2"'
+        assert len(db.get_videos_by_personal_channel(channel_ids[0])) == 2
+    
+    def test_rss_failed_hydration_keeps_feed_state(self, shared_subscriptions_db):
+        """Тест: после ошибки videos.list следующая синхронизация снова получает ленту"""
+        db, channel_ids = shared_subscriptions_db
+        
+        def fetch_feed(channel_id, etag, last_modified):
+            if etag == '"etag2"':
+                return {'modified': False, 'etag': etag, 'last_modified': None, 'entries': []}
+            return {'modified': True, 'etag': '"etag2"', 'last_modified': None,
+                    'entries': [{'video_id': f'vid_{channel_id}'}]}
+        
+        registry, api = make_registry(lambda channel_id, max_results: [])
+        api.get_videos.side_effect = RuntimeError('hydration failed')
+        
+        with patch('src.sync_subscriptions.FeedClient') as feed_client_cls:
+            feed_client_cls.return_value.fetch.side_effect = fetch_feed
+            sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                        fetch_strategy='rss', adaptive_polling=False)
+            
+            assert db.get_channel_cache(['UC_shared']) == {}
+            
+            api.get_videos.side_effect = lambda video_ids: [
+                {'video_id': video_id, 'title': video_id, 'thumbnail': 'thumb.jpg',
+                 'published_at': '2025-01-15T10:00:00Z', 'duration': '1:00'}
+                for video_id in video_ids
+            ]
+            sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                        fetch_strategy='rss', adaptive_polling=False)
+        
+        # Вторая синхронизация снова запрашивает видео, которые не удалось получить
+        assert [call.args for call in api.get_videos.call_args_list[2:]] == [
+            (['vid_UC_shared'],), (['vid_UC_only_second'],)]
+        assert {video['youtube_video_id']
+                for video in db.get_videos_by_personal_channel(channel_ids[1])} == {
+            'vid_UC_shared', 'vid_UC_only_second'}
+        assert db.get_channel_cache(['UC_shared'])['UC_shared']['feed_etag'] == '"etag2"'
+    
+    def test_rss_budget(self, shared_subscriptions_db):
+        """Тест: бюджет для RSS считается по стоимости videos.list, а не Data API"""
+        db, _ = shared_subscriptions_db
+        registry, api = make_registry(lambda channel_id, max_results: [])
+        unchanged = {'modified': False, 'etag': None, 'last_modified': None, 'entries': []}
+        
+        with patch('src.sync_subscriptions.FeedClient') as feed_client_cls:
+            feed_client_cls.return_value.fetch.return_value = unchanged
+            sync_videos(db, ledger=QuotaLedger(db, daily_budget=2), workers=1,
+                        registry=registry, fetch_strategy='rss', adaptive_polling=False)
+        
+        assert feed_client_cls.return_value.fetch.call_count == 2
+    
+    def test_rss_strategy_falls_back_to_api(self, shared_subscriptions_db):
+        """Тест: при недоступной ленте используется Data API"""
+        db, _ = shared_subscriptions_db
+        registry, api = make_registry(lambda channel_id, max_results: [])
+        
+        with patch('src.sync_subscriptions.FeedClient') as feed_client_cls:
+            feed_client_cls.return_value.fetch.side_effect = requests.ConnectionError('down')
+            sync_videos(db, ledger=QuotaLedger(db), workers=1, registry=registry,
+                        fetch_strategy='rss')
+        
+        assert api.get_channel_videos.call_count == 2
+        assert db.get_unresolved_errors() == []
+
+
+@pytest.mark.unit
+class TestCommandLine:
+    """Тесты параметров командной строки"""
+    
+    @pytest.mark.parametrize('argv, subscriptions, videos, resume, parallel', [
+        (['--subscriptions'], True, False, False, None),
+        (['--videos'], False, True, False, None),
+        (['--full'], True, True, False, None),
+        (['--resume'], False, True, True, None),
+        (['--full', '--resume'], True, True, True, None),
+        (['--parallel-accounts', '4'], True, True, False, 4),
+    ])
+    def test_modes(self, argv, subscriptions, videos, resume, parallel, tmp_path):
+        """Тест: режим выбирается флагом, без интерактивного меню"""
+        with patch('src.sync_subscriptions.Database') as database_cls, \
+             patch('src.sync_subscriptions.run_sync') as run_sync, \
+             patch('builtins.input') as mock_input, \
+             patch('builtins.print'):
+            database_cls.return_value.db_path = str(tmp_path / 'videos.db')
+            main(argv + ['--max-videos', '3'])
+        
+        mock_input.assert_not_called()
+        run_sync.assert_called_once_with(database_cls.return_value, subscriptions=subscriptions,
+                                         videos=videos, max_videos=3, resume=resume,
+                                         parallel_accounts=parallel, timings_json=None)
+    
+    def test_locked_run_exits(self, tmp_path):
+        """Тест: при уже идущей синхронизации запуск завершается с ошибкой"""
+        from src.sync_daemon import RunLock
+        
+        other = RunLock(str(tmp_path / 'sync.lock'))
+        assert other.acquire()
+        try:
+            with patch('src.sync_subscriptions.Database') as database_cls, \
+                 patch('src.sync_subscriptions.run_sync') as run_sync, \
+                 patch('builtins.print'), pytest.raises(SystemExit):
+                database_cls.return_value.db_path = str(tmp_path / 'videos.db')
+                main(['--full'])
+        finally:
+            other.release()
+        
+        run_sync.assert_not_called()
+    
+    def test_plan_mode(self, tmp_path):
+        """Тест: --plan выводит прогноз и не запускает синхронизацию"""
+        with patch('src.sync_subscriptions.Database') as database_cls, \
+             patch('src.sync_subscriptions.plan_sync') as plan_sync, \
+             patch('src.sync_subscriptions.print_sync_plan') as print_sync_plan, \
+             patch('src.sync_subscriptions.run_sync') as run_sync, \
+             patch('builtins.print'):
+            main(['--plan', '--videos', '--parallel-accounts', '3'])
+        
+        run_sync.assert_not_called()
+        plan_sync.assert_called_once_with(database_cls.return_value, subscriptions=False,
+                                          videos=True, parallel_accounts=3)
+        print_sync_plan.assert_called_once_with(plan_sync.return_value)
+    
+    def test_daemon_mode(self, tmp_path):
+        """Тест: демон использует интервал из параметров"""
+        with patch('src.sync_subscriptions.Database') as database_cls, \
+             patch('src.sync_subscriptions.run_daemon') as run_daemon, \
+             patch('builtins.print'):
+            database_cls.return_value.db_path = str(tmp_path / 'videos.db')
+            main(['--daemon', '--videos', '--interval', '15'])
+        
+        _, _, subscriptions, videos, _, interval = run_daemon.call_args.args
+        assert (subscriptions, videos, interval) == (False, True, 15)
+    
+    def test_run_sync_output(self, db, capsys):
+        """Тест: прогресс синхронизации пишется в переданный вывод, а не в stdout"""
+        import src.sync_subscriptions as module
+        output = io.StringIO()
+        
+        with patch('src.sync_subscriptions.sync_subscriptions') as subscriptions, \
+             patch('src.sync_subscriptions.sync_videos') as videos:
+            subscriptions.side_effect = lambda *args, **kwargs: module.print('subscriptions done')
+            run_sync(db, ledger=Mock(), output=output)
+            
+            assert 'subscriptions done' in output.getvalue()
+            assert capsys.readouterr().out == ''
+            videos.assert_called_once()
+            
+            # После запуска вывод снова идёт в stdout
+            run_sync(db, videos=False, ledger=Mock())
+            assert capsys.readouterr().out == 'subscriptions done\n'
@@ -0,0 +1,117 @@
+"""
+Тесты замера времени по этапам синхронизации
+"""
+
+import json
+import threading
+import pytest
+from unittest.mock import Mock
+
+from src.timing import StageTimer, percentile, timer
+from src.youtube_api import YouTubeAPI
+
+
+class FakeClock:
+    """Часы, которые сдвигаются на заданный шаг при каждом чтении"""
+
+    def __init__(self, step):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+@pytest.fixture
+def enabled_timer():
+    """Включённый глобальный таймер, сбрасывается после теста"""
+    timer.enabled = True
+    timer.reset()
+    yield timer
+    timer.enabled = False
+    timer.reset()
+
+
+@pytest.mark.unit
+class TestStageTimer:
+    """Тесты StageTimer"""
+
+    def test_disabled_records_nothing(self):
+        """Тест: выключенный таймер не собирает замеры"""
+        stage_timer = StageTimer()
+
+        with stage_timer.span('api.videos.list'):
+            pass
+
+        assert stage_timer.summary() == {}
+        assert stage_timer.span('a') is stage_timer.span('b')
+
+    def test_span_histogram(self):
+        """Тест: count, p50, p95 и max по этапу"""
+        stage_timer = StageTimer(enabled=True, clock=FakeClock(0.5))
+
+        for _ in range(3):
+            with stage_timer.span('db.write_batch'):
+                pass
+        for seconds in range(1, 101):
+            stage_timer.record('api.videos.list', seconds / 1000)
+
+        summary = stage_timer.summary()
+        assert summary['db.write_batch'] == {'count': 3, 'total': 1.5, 'p50': 0.5,
+                                             'p95': 0.5, 'max': 0.5}
+        assert summary['api.videos.list']['p50'] == 0.05
+        assert summary['api.videos.list']['p95'] == 0.095
+        assert summary['api.videos.list']['max'] == 0.1
+
+    def test_percentile(self):
+        """Тест: перцентиль по ближайшему рангу"""
+        assert percentile([], 0.5) == 0.0
+        assert percentile([1.0], 0.95) == 1.0
+        assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0
+
+    def test_threads_and_merge(self):
+        """Тест: запись из нескольких потоков и объединение замеров процессов"""
+        stage_timer = StageTimer(enabled=True)
+
+        def work():
+            for _ in range(100):
+                stage_timer.record('sync.fetch_channel', 0.01)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        other = StageTimer(enabled=True)
+        other.merge(stage_timer.samples())
+        other.merge({'oauth.refresh': [0.2]})
+
+        summary = other.summary()
+        assert summary['sync.fetch_channel']['count'] == 400
+        assert summary['oauth.refresh']['count'] == 1
+
+    def test_export(self, tmp_path):
+        """Тест экспорта в JSON"""
+        stage_timer = StageTimer(enabled=True)
+        stage_timer.record('parse.duration', 0.001)
+
+        path = tmp_path / 'timings.json'
+        stage_timer.export(str(path))
+
+        assert json.loads(path.read_text())['parse.duration']['count'] == 1
+
+    def test_api_calls_are_timed(self, enabled_timer):
+        """Тест: YouTubeAPI замеряет каждый вызов API и разбор длительности"""
+        api = YouTubeAPI('fake_credentials.json')
+        api.executor = Mock()
+        api.executor.execute.return_value = {'items': []}
+
+        api._execute(Mock(), 'videos.list')
+        api._parse_video({'id': 'v1', 'contentDetails': {'duration': 'PT4M13S'},
+                          'snippet': {'title': 'Video', 'publishedAt': '2025-01-01T00:00:00Z'}})
+
+        summary = enabled_timer.summary()
+        assert summary['api.videos.list']['count'] == 1
+        assert summary['parse.duration']['count'] == 1
@@ -130,6 +130,53 @@ class TestViewErrors:
         
         assert len(errors_ch1) == 1
         assert errors_ch1[0]['error_type'] == 'ERROR1'
+    
+    def test_view_tripped_subscriptions(self, populated_db, capsys):
+        """Тест отчёта о пропускаемых подписках"""
+        from utils.view_errors import view_tripped_subscriptions
+        
+        db = populated_db['db']
+        assert view_tripped_subscriptions(db) == []
+        
+        db.update_circuit_state([(populated_db['subscription_id'], 3, '2099-01-01T00:00:00',
+                                  'PLAYLIST_NOT_FOUND')])
+        
+        assert len(view_tripped_subscriptions(db)) == 1
+        output = capsys.readouterr().out
+        assert 'PLAYLIST_NOT_FOUND' in output
+        assert '2099-01-01 00:00' in output
+
+
+@pytest.mark.unit
+class TestViewSyncRuns:
+    """Тесты для utils/view_sync_runs.py"""
+    
+    def test_view_runs(self, db, capsys):
+        """Тест вывода запусков, подробностей и итогов по дням"""
+        from utils.view_sync_runs import view_recent_runs, view_run_details, view_trends
+        
+        run_id = db.start_sync_run('videos', planned=2)
+        db.finish_sync_run(run_id, 'completed', {
+            'api_calls': {'playlistItems.list': 2, 'videos.list': 2}, 'quota_units': 4,
+            'new_videos': 7, 'accounts': {1: {'name': 'Main Channel', 'seconds': 3.2}}})
+        
+        view_recent_runs(db)
+        view_run_details(db, run_id)
+        view_trends(db)
+        
+        output = capsys.readouterr().out
+        assert f'#{run_id}' in output
+        assert 'videos.list: 2' in output
+        assert 'Main Channel' in output
+    
+    def test_view_runs_empty(self, db, capsys):
+        """Тест: пустой журнал"""
+        from utils.view_sync_runs import view_recent_runs, view_run_details
+        
+        view_recent_runs(db)
+        view_run_details(db, 42)
+        
+        assert '42' in capsys.readouterr().out
 
 
 @pytest.mark.integration
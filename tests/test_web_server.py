@@ -3,30 +3,84 @@ Unit tests for Web Server
 """
 
 import pytest
+import hashlib
+import hmac
+import io
 import json
 import tempfile
 import os
 import logging
+import threading
 from unittest.mock import Mock, patch, MagicMock
 from pathlib import Path
 
 
+@pytest.fixture
+def app(tmp_path):
+    """Application with its own database in a temporary directory"""
+    from src.db_manager import Database
+    from src.web_server import create_app
+
+    return create_app({'max_videos_per_channel': 5}, db=Database(str(tmp_path / 'videos.db')))
+
+
+@pytest.fixture
+def db(app):
+    """Database of the application"""
+    return app.extensions['dashboard'].db
+
+
+@pytest.mark.unit
+class TestAppFactory:
+    """Tests for create_app()"""
+
+    def test_apps_are_independent(self, tmp_path):
+        """Test that every application gets its own database and sync job runner"""
+        from src.web_server import create_app
+
+        first = create_app({'database_path': str(tmp_path / 'first' / 'videos.db')})
+        second = create_app({'database_path': str(tmp_path / 'second' / 'videos.db')})
+
+        first_state = first.extensions['dashboard']
+        second_state = second.extensions['dashboard']
+        assert first_state.db.db_path == str(tmp_path / 'first' / 'videos.db')
+        assert second_state.db.db_path == str(tmp_path / 'second' / 'videos.db')
+        assert first_state.sync_jobs is not second_state.sync_jobs
+
+        first_state.db.add_personal_channel('Main', 'UC_main', 'token.json')
+        with first.test_client() as client:
+            assert len(json.loads(client.get('/api/channels').data)['data']) == 1
+        with second.test_client() as client:
+            assert json.loads(client.get('/api/channels').data)['data'] == []
+
+    def test_default_config(self, tmp_path):
+        """Test that create_app() reads config/settings.json when no config is given"""
+        from src.web_server import create_app
+
+        config = {'database_path': str(tmp_path / 'videos.db')}
+        with patch('src.web_server.load_config', return_value=config):
+            app = create_app()
+
+        assert app.extensions['dashboard'].config is config
+        assert os.path.exists(config['database_path'])
+
+
 @pytest.mark.unit
 class TestStaticRoutes:
     """Tests for static file serving"""
 
     @patch('src.web_server.send_from_directory')
-    @patch('src.web_server.app')
-    def test_index_route_serves_frontend(self, mock_app, mock_send_from_directory):
+    def test_index_route_serves_frontend(self, mock_send_from_directory, app):
         """Test that index route serves frontend/index.html"""
         from src.web_server import index
 
         # Mock the static folder and send_from_directory
-        mock_app.static_folder = '/path/to/frontend'
+        app.static_folder = '/path/to/frontend'
         mock_send_from_directory.return_value = 'index.html content'
 
         # Call the function
-        result = index()
+        with app.test_request_context('/'):
+            result = index()
 
         # Verify send_from_directory was called with correct parameters
         mock_send_from_directory.assert_called_once_with('/path/to/frontend', 'index.html')
@@ -37,10 +91,8 @@ class TestStaticRoutes:
 class TestAPIEndpoints:
     """Tests for API endpoints"""
 
-    def test_get_channels_success(self):
+    def test_get_channels_success(self, app, db):
         """Test successful channels retrieval"""
-        from src.web_server import app, db
-
         # Mock database responses
         mock_channels = [
             {'id': 1, 'name': 'Channel 1'},
@@ -87,10 +139,8 @@ class TestAPIEndpoints:
                 assert data['data'][0]['stats']['unwatched_videos'] == 1
                 assert data['data'][0]['stats']['subscriptions'] == 1
 
-    def test_get_channels_database_error(self):
+    def test_get_channels_database_error(self, app, db):
         """Test channels endpoint handles database errors"""
-        from src.web_server import app, db
-
         with patch.object(db, 'get_all_personal_channels', side_effect=Exception('DB Error')):
             with app.test_client() as client:
                 response = client.get('/api/channels')
@@ -101,10 +151,8 @@ class TestAPIEndpoints:
                 assert data['success'] is False
                 assert data['error'] == 'Internal server error'
 
-    def test_get_channel_videos_success(self):
+    def test_get_channel_videos_success(self, app, db):
         """Test successful channel videos retrieval"""
-        from src.web_server import app, db
-
         mock_videos = [
             {'id': 1, 'title': 'Video 1', 'published_at': '2025-01-02T00:00:00Z'},
             {'id': 2, 'title': 'Video 2', 'published_at': '2025-01-01T00:00:00Z'}
@@ -124,10 +172,8 @@ class TestAPIEndpoints:
                 assert data['data'][0]['published_at'] == '2025-01-02T00:00:00Z'
                 assert data['data'][1]['published_at'] == '2025-01-01T00:00:00Z'
 
-    def test_get_channel_videos_include_watched_parameter(self):
+    def test_get_channel_videos_include_watched_parameter(self, app, db):
         """Test channel videos with include_watched parameter"""
-        from src.web_server import app, db
-
         mock_videos = [{'id': 1, 'title': 'Video 1'}]
 
         with patch.object(db, 'get_videos_by_personal_channel') as mock_get_videos:
@@ -146,10 +192,18 @@ class TestAPIEndpoints:
                 client.get('/api/channels/1/videos')
                 mock_get_videos.assert_called_with(1, include_watched=True)
 
-    def test_mark_video_watched_success(self):
-        """Test successful video marking as watched"""
-        from src.web_server import app, db
+    def test_get_channel_videos_duration_filter(self, app, db):
+        """Test channel videos with min_duration/max_duration parameters"""
+        with patch.object(db, 'get_videos_by_personal_channel', return_value=[]) as mock_get_videos:
+            with app.test_client() as client:
+                client.get('/api/channels/1/videos?max_duration=60')
+                mock_get_videos.assert_called_with(1, include_watched=True, max_duration=60)
 
+                client.get('/api/channels/1/videos?min_duration=1200&max_duration=x')
+                mock_get_videos.assert_called_with(1, include_watched=True, min_duration=1200)
+
+    def test_mark_video_watched_success(self, app, db):
+        """Test successful video marking as watched"""
         with patch.object(db, 'mark_video_watched') as mock_mark_watched:
             with app.test_client() as client:
                 response = client.post('/api/videos/1/watch')
@@ -163,10 +217,8 @@ class TestAPIEndpoints:
                 # Verify database was called
                 mock_mark_watched.assert_called_once_with(1)
 
-    def test_mark_video_watched_database_error(self):
+    def test_mark_video_watched_database_error(self, app, db):
         """Test video marking handles database errors"""
-        from src.web_server import app, db
-
         with patch.object(db, 'mark_video_watched', side_effect=Exception('DB Error')):
             with app.test_client() as client:
                 response = client.post('/api/videos/1/watch')
@@ -177,10 +229,8 @@ class TestAPIEndpoints:
                 assert data['success'] is False
                 assert data['error'] == 'Internal server error'
 
-    def test_get_video_success(self):
+    def test_get_video_success(self, app, db):
         """Test successful video retrieval"""
-        from src.web_server import app, db
-
         mock_video = {
             'id': 1,
             'title': 'Test Video',
@@ -197,10 +247,8 @@ class TestAPIEndpoints:
                 assert data['success'] is True
                 assert data['data']['title'] == 'Test Video'
 
-    def test_get_video_not_found(self):
+    def test_get_video_not_found(self, app, db):
         """Test video retrieval when video doesn't exist"""
-        from src.web_server import app, db
-
         with patch.object(db, 'get_video_by_id', return_value=None):
             with app.test_client() as client:
                 response = client.get('/api/videos/999')
@@ -211,10 +259,8 @@ class TestAPIEndpoints:
                 assert data['success'] is False
                 assert data['error'] == 'Video not found'
 
-    def test_clear_watched_videos_success(self):
+    def test_clear_watched_videos_success(self, app, db):
         """Test successful clearing of watched videos"""
-        from src.web_server import app, db
-
         with patch.object(db, 'clear_watched_videos') as mock_clear:
             with app.test_client() as client:
                 response = client.post('/api/channels/1/clear')
@@ -228,10 +274,8 @@ class TestAPIEndpoints:
                 # Verify database was called
                 mock_clear.assert_called_once_with(1)
 
-    def test_get_stats_success(self):
+    def test_get_stats_success(self, app, db):
         """Test successful statistics retrieval"""
-        from src.web_server import app, db
-
         mock_channels = [
             {'id': 1, 'name': 'Channel 1'},
             {'id': 2, 'name': 'Channel 2'}
@@ -277,10 +321,8 @@ class TestAPIEndpoints:
                 assert stats['unwatched_videos'] == 2  # 1 unwatched per channel
                 assert stats['total_subscriptions'] == 2  # 1 subscription per channel
 
-    def test_get_errors_success(self):
+    def test_get_errors_success(self, app, db):
         """Test successful errors retrieval"""
-        from src.web_server import app, db
-
         mock_errors = [
             {
                 'id': 1,
@@ -301,6 +343,278 @@ class TestAPIEndpoints:
                 assert len(data['data']) == 1
                 assert data['data'][0]['error_type'] == 'SYNC_ERROR'
 
+    def test_get_sync_runs(self, app, db):
+        """Test sync run ledger retrieval"""
+        mock_runs = [{'id': 3, 'kind': 'videos', 'status': 'completed', 'quota_units': 42}]
+
+        with patch.object(db, 'get_sync_runs', return_value=mock_runs) as get_runs:
+            with app.test_client() as client:
+                response = client.get('/api/sync/runs?limit=5000&kind=videos')
+
+                assert response.status_code == 200
+                data = json.loads(response.data)
+
+                assert data['success'] is True
+                assert data['data'][0]['quota_units'] == 42
+                get_runs.assert_called_once_with(limit=500, kind='videos')
+
+
+@pytest.mark.unit
+class TestResponseCache:
+    """Tests for the cache of /api/channels and /api/stats"""
+
+    def test_repeat_requests_hit(self, app, db):
+        """Test that unchanged data is served from the cache"""
+        db.add_personal_channel('Main', 'UC_main', 'token.json')
+
+        with patch.object(db, 'get_all_personal_channels',
+                          wraps=db.get_all_personal_channels) as get_channels, \
+             app.test_client() as client:
+            first = client.get('/api/channels')
+            second = client.get('/api/channels')
+            client.get('/api/stats')
+            other_query = client.get('/api/channels?include=all')
+            metrics = json.loads(client.get('/api/cache').data)['data']
+
+        assert first.headers['X-Cache'] == 'MISS'
+        assert second.headers['X-Cache'] == 'HIT'
+        assert second.data == first.data
+        assert other_query.headers['X-Cache'] == 'MISS'
+        assert get_channels.call_count == 3
+        assert metrics['hits'] == 1
+        assert metrics['misses'] == 3
+        assert metrics['entries'] == 3
+        assert metrics['hit_rate'] == 0.25
+
+    def test_write_invalidates(self, app, db):
+        """Test that a database write turns the next request into a miss"""
+        channel_id = db.add_personal_channel('Main', 'UC_main', 'token.json')
+        subscription_id = db.add_subscription(channel_id, 'UC_creator', 'Creator')
+        video_id = db.add_video(subscription_id, 'vid_1', 'Video', None, '2025-01-01T00:00:00Z')
+
+        with app.test_client() as client:
+            before = json.loads(client.get('/api/stats').data)['data']
+            client.post(f'/api/videos/{video_id}/watch')
+            after = client.get('/api/stats')
+
+        assert before['unwatched_videos'] == 1
+        assert after.headers['X-Cache'] == 'MISS'
+        assert json.loads(after.data)['data']['unwatched_videos'] == 0
+
+    def test_expiry_and_eviction(self):
+        """Test that entries of another data version, expired or evicted entries miss"""
+        from src.web_server import ResponseCache
+
+        now = [0.0]
+        cache = ResponseCache(max_age=10, max_entries=1, clock=lambda: now[0])
+        cache.put(('/api/stats', ()), 1, b'{}')
+
+        assert cache.get(('/api/stats', ()), 1) == b'{}'
+        assert cache.get(('/api/stats', ()), 2) is None
+        now[0] = 10
+        assert cache.get(('/api/stats', ()), 1) is None
+
+        cache.put(('/api/channels', ()), 1, b'[]')
+        assert cache.metrics()['evictions'] == 1
+
+    def test_server_error_not_cached(self, app, db):
+        """Test that a failed request is built again"""
+        with patch.object(db, 'get_all_personal_channels', side_effect=[Exception('DB Error'), []]), \
+             app.test_client() as client:
+            assert client.get('/api/stats').status_code == 500
+            assert client.get('/api/stats').status_code == 200
+
+
+@pytest.mark.unit
+class TestSyncJobEndpoints:
+    """Tests for background sync jobs"""
+
+    def make_runner(self, db):
+        from src.sync_jobs import SyncJobRunner
+
+        release = threading.Event()
+
+        def run(options, output):
+            print('Syncing videos...', file=output)
+            assert release.wait(5)
+
+        runner = SyncJobRunner(db, run, poll_interval=0.01)
+        runner.release = release
+        return runner
+
+    def test_start_sync_coalesces(self, app, db):
+        """Test that a duplicate request joins the running job"""
+        runner = self.make_runner(db)
+        with patch.object(app.extensions['dashboard'], 'sync_jobs', runner), app.test_client() as client:
+            first = client.post('/api/sync', json={'mode': 'videos', 'max_videos': 3})
+            second = client.post('/api/sync', json={'mode': 'videos', 'max_videos': 3})
+            active = json.loads(client.get('/api/sync').data)
+            runner.release.set()
+            runner.stop(timeout=5)
+
+        assert first.status_code == 202
+        first_data = json.loads(first.data)
+        second_data = json.loads(second.data)
+        assert first_data['created'] is True
+        assert second_data['created'] is False
+        assert second_data['data']['id'] == first_data['data']['id']
+        assert first_data['data']['options'] == {'subscriptions': False, 'videos': True,
+                                                 'max_videos': 3, 'resume': False}
+        assert len(active['data']) == 1
+        assert active['stats']['coalesced'] == 1
+
+    def test_start_sync_invalid_options(self, app):
+        """Test that invalid options are rejected"""
+        with app.test_client() as client:
+            assert client.post('/api/sync', json={'mode': 'everything'}).status_code == 400
+            assert client.post('/api/sync', json={'max_videos': 0}).status_code == 400
+
+    def test_job_status_and_events(self, app, db):
+        """Test job status, progress log and the SSE stream"""
+        runner = self.make_runner(db)
+        runner.release.set()
+        with patch.object(app.extensions['dashboard'], 'sync_jobs', runner), app.test_client() as client:
+            job_id = json.loads(client.post('/api/sync', json={}).data)['data']['id']
+            stream = client.get(f'/api/sync/{job_id}/events')
+            # The stream ends with the job
+            body = stream.get_data(as_text=True)
+            status = json.loads(client.get(f'/api/sync/{job_id}').data)
+            missing = client.get('/api/sync/0123abcd')
+            runner.stop(timeout=5)
+
+        assert stream.mimetype == 'text/event-stream'
+        assert 'event: progress' in body
+        assert 'Syncing videos...' in body
+        assert body.rstrip().split('\n')[-2] == 'event: status'
+        assert status['data']['status'] == 'completed'
+        assert status['data']['events'][0]['message'] == 'Syncing videos...'
+        assert missing.status_code == 404
+
+    def test_job_shared_between_workers(self, tmp_path):
+        """Test that a job started through one worker process is served by another"""
+        from src.web_server import create_app
+
+        config = {'database_path': str(tmp_path / 'videos.db')}
+        first, second = create_app(config), create_app(config)
+        runner = self.make_runner(first.extensions['dashboard'].db)
+        runner.release.set()
+
+        with patch.object(first.extensions['dashboard'], 'sync_jobs', runner):
+            with first.test_client() as client:
+                job_id = json.loads(client.post('/api/sync', json={}).data)['data']['id']
+            with second.test_client() as client:
+                stream = client.get(f'/api/sync/{job_id}/events').get_data(as_text=True)
+                status = client.get(f'/api/sync/{job_id}')
+            runner.stop(timeout=5)
+
+        assert 'Syncing videos...' in stream
+        assert status.status_code == 200
+        assert json.loads(status.data)['data']['status'] == 'completed'
+
+    def test_run_sync_job_respects_lock(self):
+        """Test that a job does not sync while another process holds the sync lock"""
+        from src.web_server import run_sync_job
+
+        lock = MagicMock()
+        lock.__enter__.return_value = False
+        options = {'subscriptions': True, 'videos': True, 'max_videos': 5, 'resume': False}
+        output = io.StringIO()
+
+        with patch('src.web_server.get_sync_lock', return_value=lock), \
+             patch('src.web_server.run_sync') as run_sync:
+            with pytest.raises(RuntimeError):
+                run_sync_job(Mock(), options, output)
+
+            lock.__enter__.return_value = True
+            run_sync_job(Mock(), options, output)
+
+        run_sync.assert_called_once()
+        assert run_sync.call_args.kwargs['max_videos'] == 5
+        assert run_sync.call_args.kwargs['output'] is output
+
+
+@pytest.mark.unit
+class TestWebSubEndpoints:
+    """Tests for the WebSub callback"""
+
+    def test_callback_disabled(self, app):
+        """Test that the callback is not found when WebSub is disabled"""
+        with patch.object(app.extensions['dashboard'], 'lease_manager', None), \
+             patch.object(app.extensions['dashboard'], 'push_ingestor', None):
+            with app.test_client() as client:
+                assert client.get('/websub/callback?hub.challenge=abc').status_code == 404
+                assert client.post('/websub/callback', data=b'<feed/>').status_code == 404
+
+    def test_verification_echoes_challenge(self, app):
+        """Test that a confirmed verification echoes hub.challenge"""
+        manager = Mock()
+        manager.verify.return_value = 'abc'
+
+        with patch.object(app.extensions['dashboard'], 'lease_manager', manager):
+            with app.test_client() as client:
+                response = client.get('/websub/callback', query_string={
+                    'hub.mode': 'subscribe',
+                    'hub.topic': 'https://www.youtube.com/feeds/videos.xml?channel_id=UC_1',
+                    'hub.challenge': 'abc',
+                    'hub.lease_seconds': '432000'
+                })
+
+        assert response.status_code == 200
+        assert response.data == b'abc'
+        manager.verify.assert_called_once_with(
+            'subscribe', 'https://www.youtube.com/feeds/videos.xml?channel_id=UC_1',
+            'abc', 432000)
+
+    def test_invalid_notification(self, app):
+        """Test that malformed XML is rejected"""
+        manager = Mock()
+        manager.secret = 's3cret'
+        ingestor = Mock()
+        signature = hmac.new(b's3cret', b'<feed', hashlib.sha1).hexdigest()
+
+        with patch.object(app.extensions['dashboard'], 'lease_manager', manager), \
+             patch.object(app.extensions['dashboard'], 'push_ingestor', ingestor):
+            with app.test_client() as client:
+                response = client.post('/websub/callback', data=b'<feed',
+                                       headers={'X-Hub-Signature': f'sha1={signature}'})
+
+        assert response.status_code == 400
+        ingestor.enqueue.assert_not_called()
+
+    def test_unsigned_notification_ignored(self, app):
+        """Test that a notification without a valid signature is not queued"""
+        manager = Mock()
+        manager.secret = 's3cret'
+        ingestor = Mock()
+        body = (b'<feed xmlns="http://www.w3.org/2005/Atom" '
+                b'xmlns:yt="http://www.youtube.com/xml/schemas/2015"><entry>'
+                b'<yt:videoId>vid_1</yt:videoId><yt:channelId>UC_1</yt:channelId></entry></feed>')
+
+        with patch.object(app.extensions['dashboard'], 'lease_manager', manager), \
+             patch.object(app.extensions['dashboard'], 'push_ingestor', ingestor):
+            with app.test_client() as client:
+                unsigned = client.post('/websub/callback', data=body)
+                forged = client.post('/websub/callback', data=body,
+                                     headers={'X-Hub-Signature': 'sha1=0'})
+
+        assert unsigned.status_code == 204
+        assert forged.status_code == 204
+        ingestor.enqueue.assert_not_called()
+
+    def test_websub_requires_secret(self, app):
+        """Test that WebSub is not started without websub_secret"""
+        from src.web_server import start_websub
+
+        state = app.extensions['dashboard']
+        state.config.update({'websub_callback_url': 'https://example.com/websub/callback',
+                             'websub_secret': ''})
+
+        with pytest.raises(ValueError):
+            start_websub(state)
+
+        assert state.lease_manager is None
+        assert state.push_ingestor is None
+
 
 @pytest.mark.unit
 class TestConfiguration:
@@ -342,10 +656,8 @@ class TestConfiguration:
 class TestErrorHandling:
     """Tests for error handling and logging"""
 
-    def test_database_error_logging(self):
+    def test_database_error_logging(self, app, db):
         """Test that database errors are properly logged"""
-        from src.web_server import app, db
-
         with patch.object(db, 'get_all_personal_channels', side_effect=Exception('Test DB Error')):
             with app.test_client() as client:
                 client.get('/api/channels')
@@ -353,10 +665,8 @@ class TestErrorHandling:
                 # In test environment, logging should work without file operations
                 # The test passes if no FileNotFoundError is raised
 
-    def test_all_endpoints_log_errors(self):
+    def test_all_endpoints_log_errors(self, app, db):
         """Test that all endpoints properly handle errors without file system issues"""
-        from src.web_server import app, db
-
         # Test each endpoint individually - just verify no FileNotFoundError is raised
         test_cases = [
             ('GET', '/api/channels', 'get_all_personal_channels'),
@@ -388,11 +698,13 @@ class TestMainFunction:
     """Tests for main server function"""
 
     @patch('src.web_server.webbrowser.open')
-    @patch('src.web_server.app.run')
+    @patch('src.web_server.create_app')
+    @patch('src.web_server.configure_logging')
     @patch('src.web_server.load_config')
     @patch('src.web_server.print')
     @patch('src.web_server.project_root', '/test/project')
-    def test_main_function_with_browser(self, mock_print, mock_load_config, mock_app_run, mock_webbrowser):
+    def test_main_function_with_browser(self, mock_print, mock_load_config, mock_configure_logging,
+                                        mock_create_app, mock_webbrowser):
         """Test main function opens browser when configured"""
         from src.web_server import main
 
@@ -408,8 +720,9 @@ class TestMainFunction:
             # Verify browser was opened
             mock_webbrowser.assert_called_once_with('http://localhost:9000')
 
-            # Verify app.run was called with correct parameters
-            mock_app_run.assert_called_once_with(
+            # Verify the app was created from the config and run with correct parameters
+            mock_create_app.assert_called_once_with(mock_load_config.return_value)
+            mock_create_app.return_value.run.assert_called_once_with(
                 host='0.0.0.0',
                 port=9000,
                 debug=False,
@@ -417,11 +730,14 @@ class TestMainFunction:
             )
 
     @patch('src.web_server.webbrowser.open')
-    @patch('src.web_server.app.run')
+    @patch('src.web_server.create_app')
+    @patch('src.web_server.configure_logging')
     @patch('src.web_server.load_config')
     @patch('src.web_server.print')
     @patch('src.web_server.project_root', '/test/project')
-    def test_main_function_without_browser(self, mock_print, mock_load_config, mock_app_run, mock_webbrowser):
+    def test_main_function_without_browser(self, mock_print, mock_load_config,
+                                           mock_configure_logging, mock_create_app,
+                                           mock_webbrowser):
         """Test main function doesn't open browser when disabled"""
         from src.web_server import main
 
@@ -437,8 +753,9 @@ class TestMainFunction:
             # Verify browser was NOT opened
             mock_webbrowser.assert_not_called()
 
-            # Verify app.run was called with correct parameters
-            mock_app_run.assert_called_once_with(
+            # Verify the app was created from the config and run with correct parameters
+            mock_create_app.assert_called_once_with(mock_load_config.return_value)
+            mock_create_app.return_value.run.assert_called_once_with(
                 host='0.0.0.0',
                 port=8080,
                 debug=False,
@@ -0,0 +1,310 @@
+"""
+Тесты для push-уведомлений WebSub
+"""
+
+import hashlib
+import hmac
+import threading
+import pytest
+import requests
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import Mock, patch
+from urllib.parse import parse_qs
+from werkzeug.serving import make_server
+
+from src.websub import (LeaseManager, PushIngestor, channel_id_from_topic, topic_url,
+                        verify_signature)
+
+
+def make_notification(video_id, channel_id='UC_creator'):
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015"
+      xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <id>yt:video:{video_id}</id>
+    <yt:videoId>{video_id}</yt:videoId>
+    <yt:channelId>{channel_id}</yt:channelId>
+    <title>New Video</title>
+    <published>2025-01-15T10:00:00+00:00</published>
+  </entry>
+</feed>""".encode('utf-8')
+
+
+def make_video(video_id, channel_id='UC_creator'):
+    return {'video_id': video_id, 'channel_id': channel_id, 'title': video_id,
+            'thumbnail': 'thumb.jpg', 'published_at': '2025-01-15T10:00:00Z', 'duration': '1:00'}
+
+
+@pytest.fixture
+def followed_db(db):
+    """Два личных канала, подписанных на UC_creator"""
+    subscription_ids = []
+    for i in (1, 2):
+        channel_id = db.add_personal_channel(
+            name=f'Personal {i}',
+            youtube_channel_id=f'UC_personal_{i}',
+            oauth_token_path=f'token{i}.pickle'
+        )
+        subscription_ids.append(db.add_subscription(channel_id, 'UC_creator', 'Creator'))
+    return db, subscription_ids
+
+
+@pytest.mark.unit
+class TestHelpers:
+    """Тесты вспомогательных функций"""
+
+    def test_topic_roundtrip(self):
+        """Тест: ID канала извлекается из topic URL"""
+        topic = topic_url('UC_creator')
+
+        assert topic == 'https://www.youtube.com/feeds/videos.xml?channel_id=UC_creator'
+        assert channel_id_from_topic(topic) == 'UC_creator'
+        assert channel_id_from_topic('https://example.com/feed') is None
+
+    def test_verify_signature(self):
+        """Тест проверки подписи X-Hub-Signature"""
+        body = b'<feed/>'
+        digest = hmac.new(b'secret', body, hashlib.sha1).hexdigest()
+
+        assert verify_signature('secret', body, f'sha1={digest}')
+        assert not verify_signature('other', body, f'sha1={digest}')
+        assert not verify_signature('secret', body, None)
+        assert not verify_signature('secret', body, 'md4=abc')
+        assert not verify_signature('', body, f'sha1={digest}')
+
+
+@pytest.mark.unit
+class TestLeaseManager:
+    """Тесты продления подписок на хабе"""
+
+    def test_renew_subscribes_active_channels(self, followed_db):
+        """Тест: один запрос на канал, повтор только после истечения ожидания"""
+        db, _ = followed_db
+        session = Mock()
+        manager = LeaseManager(db, 'https://example.com/websub/callback',
+                               hub_url='http://hub.local/', secret='s', session=session)
+
+        assert manager.renew() == {'subscribed': 1, 'unsubscribed': 0, 'failed': 0}
+        data = session.post.call_args.kwargs['data']
+        assert data['hub.topic'] == topic_url('UC_creator')
+        assert data['hub.mode'] == 'subscribe'
+        assert data['hub.secret'] == 's'
+
+        # Хаб ещё не подтвердил подписку
+        assert manager.renew()['subscribed'] == 0
+        assert manager.renew(now=datetime.now() + timedelta(hours=2))['subscribed'] == 1
+
+    def test_secret_required(self, followed_db):
+        """Тест: без секрета подписка на хабе не создаётся"""
+        db, _ = followed_db
+        session = Mock()
+
+        for secret in (None, ''):
+            with pytest.raises(ValueError):
+                LeaseManager(db, 'https://example.com/cb', secret=secret, session=session)
+
+        session.post.assert_not_called()
+
+    def test_renew_before_expiry(self, followed_db):
+        """Тест: подписка продлевается незадолго до окончания срока"""
+        db, _ = followed_db
+        manager = LeaseManager(db, 'https://example.com/cb', secret='s', session=Mock())
+
+        assert manager.verify('subscribe', topic_url('UC_creator'), 'abc', 3 * 24 * 3600) == 'abc'
+
+        assert manager.renew()['subscribed'] == 0
+        assert manager.renew(now=datetime.now() + timedelta(days=2, hours=1))['subscribed'] == 1
+
+    def test_renew_unsubscribes_inactive_channels(self, followed_db):
+        """Тест: отписка от каналов без активных подписок"""
+        db, _ = followed_db
+        db.update_websub_lease('UC_gone', (datetime.now() + timedelta(days=3)).isoformat())
+        db.update_websub_lease('UC_expired', (datetime.now() - timedelta(days=1)).isoformat())
+        session = Mock()
+        manager = LeaseManager(db, 'https://example.com/cb', secret='s', session=session)
+
+        stats = manager.renew()
+
+        assert stats == {'subscribed': 1, 'unsubscribed': 1, 'failed': 0}
+        assert 'UC_expired' not in db.get_websub_leases()
+
+    def test_renew_counts_failures(self, followed_db):
+        """Тест: ошибка хаба не прерывает продление, повтор через время ожидания"""
+        db, _ = followed_db
+        session = Mock()
+        session.post.side_effect = requests.ConnectionError('down')
+        manager = LeaseManager(db, 'https://example.com/cb', secret='s', session=session)
+
+        assert manager.renew()['failed'] == 1
+        assert manager.renew()['failed'] == 0
+        assert manager.renew(now=datetime.now() + timedelta(hours=2))['failed'] == 1
+
+    def test_verify_rejects_unknown_channels(self, followed_db):
+        """Тест: подписка на неотслеживаемый канал не подтверждается"""
+        db, _ = followed_db
+        manager = LeaseManager(db, 'https://example.com/cb', secret='s', session=Mock())
+
+        assert manager.verify('subscribe', topic_url('UC_unknown'), 'abc') is None
+        assert manager.verify('unsubscribe', topic_url('UC_creator'), 'abc') is None
+        assert manager.verify('unsubscribe', topic_url('UC_unknown'), 'abc') == 'abc'
+
+
+@pytest.mark.unit
+class TestPushIngestor:
+    """Тесты пакетной загрузки видео из уведомлений"""
+
+    def test_flush_hydrates_only_new_videos(self, followed_db):
+        """Тест: известные видео не запрашиваются, новые сохраняются для всех подписок"""
+        db, subscription_ids = followed_db
+        db.add_video(subscription_ids[0], 'vid_old', 'Old', 'thumb.jpg', '2025-01-14T10:00:00Z')
+        db.add_video(subscription_ids[1], 'vid_old', 'Old', 'thumb.jpg', '2025-01-14T10:00:00Z')
+        api = Mock()
+        api.get_videos.side_effect = lambda ids: [make_video(video_id) for video_id in ids]
+        ingestor = PushIngestor(db, lambda: api)
+
+        ingestor.enqueue([
+            {'video_id': 'vid_new', 'channel_id': 'UC_creator'},
+            {'video_id': 'vid_old', 'channel_id': 'UC_creator'},
+            {'video_id': 'vid_other', 'channel_id': 'UC_not_followed'},
+        ])
+
+        assert ingestor.flush() == 2
+        api.get_videos.assert_called_once_with(['vid_new'])
+        assert ingestor.pending() == 0
+        assert ingestor.flush() == 0
+
+    def test_flush_ignores_other_channels(self, followed_db):
+        """Тест: видео чужого канала не сохраняется в подписки из уведомления"""
+        db, subscription_ids = followed_db
+        api = Mock()
+        api.get_videos.return_value = [make_video('vid_foreign', channel_id='UC_spam')]
+        ingestor = PushIngestor(db, lambda: api)
+
+        ingestor.enqueue([{'video_id': 'vid_foreign', 'channel_id': 'UC_creator'}])
+
+        assert ingestor.flush() == 0
+        assert db.get_video_ids_by_subscription(subscription_ids) == {
+            subscription_id: set() for subscription_id in subscription_ids}
+
+    def test_flush_requeues_on_error(self, followed_db):
+        """Тест: при ошибке API видео остаются в очереди"""
+        db, _ = followed_db
+        api = Mock()
+        api.get_videos.side_effect = RuntimeError('quota')
+        ingestor = PushIngestor(db, lambda: api)
+        ingestor.enqueue([{'video_id': 'vid_new', 'channel_id': 'UC_creator'}])
+
+        with pytest.raises(RuntimeError):
+            ingestor.flush()
+
+        assert ingestor.pending() == 1
+
+    def test_background_flush_on_full_batch(self, followed_db):
+        """Тест: полный пакет обрабатывается не дожидаясь интервала"""
+        db, _ = followed_db
+        api = Mock()
+        api.get_videos.side_effect = lambda ids: [make_video(video_id) for video_id in ids]
+        ingestor = PushIngestor(db, lambda: api, batch_size=2, flush_interval=60)
+        ingestor.start()
+        try:
+            ingestor.enqueue([{'video_id': f'vid_{i}', 'channel_id': 'UC_creator'}
+                              for i in range(2)])
+            for _ in range(100):
+                if api.get_videos.called:
+                    break
+                threading.Event().wait(0.01)
+        finally:
+            ingestor.stop()
+
+        api.get_videos.assert_called_once()
+
+
+class StandInHub:
+    """Локальный хаб WebSub: подтверждает подписки и рассылает уведомления"""
+
+    def __init__(self):
+        self.subscriptions = {}
+        hub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers['Content-Length'])
+                form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode()).items()}
+                self.send_response(202)
+                self.end_headers()
+                hub.verify(form)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.server.server_port}/'
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def verify(self, form):
+        response = requests.get(form['hub.callback'], params={
+            'hub.mode': form['hub.mode'],
+            'hub.topic': form['hub.topic'],
+            'hub.challenge': 'challenge-123',
+            'hub.lease_seconds': form.get('hub.lease_seconds', '0'),
+        }, timeout=5)
+        if response.status_code == 200 and response.text == 'challenge-123':
+            self.subscriptions[form['hub.topic']] = form
+
+    def publish(self, topic, content):
+        form = self.subscriptions[topic]
+        signature = hmac.new(form['hub.secret'].encode(), content, hashlib.sha1).hexdigest()
+        return requests.post(form['hub.callback'], data=content, timeout=5,
+                             headers={'X-Hub-Signature': f'sha1={signature}'})
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.mark.integration
+class TestWebSubEndToEnd:
+    """Подписка и уведомление через локальный хаб"""
+
+    def test_subscribe_and_receive_notification(self, followed_db):
+        """Тест: хаб подтверждает подписку, уведомление сохраняет видео"""
+        from src import web_server
+
+        db, _ = followed_db
+        app = web_server.create_app({}, db=db)
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        hub = StandInHub()
+        callback_url = f'http://127.0.0.1:{server.server_port}/websub/callback'
+
+        api = Mock()
+        api.get_videos.side_effect = lambda ids: [make_video(video_id) for video_id in ids]
+        manager = LeaseManager(db, callback_url, hub_url=hub.url, secret='s3cret')
+        ingestor = PushIngestor(db, lambda: api)
+
+        try:
+            with patch.object(app.extensions['dashboard'], 'lease_manager', manager), \
+                 patch.object(app.extensions['dashboard'], 'push_ingestor', ingestor):
+                assert manager.renew()['subscribed'] == 1
+
+                topic = topic_url('UC_creator')
+                assert topic in hub.subscriptions
+                lease = db.get_websub_leases()['UC_creator']
+                assert lease['websub_lease_expires_at'] is not None
+                assert lease['websub_requested_at'] is None
+
+                assert hub.publish(topic, make_notification('vid_push')).status_code == 204
+
+                # Уведомление с неверной подписью игнорируется
+                forged = requests.post(callback_url, data=make_notification('vid_forged'),
+                                       headers={'X-Hub-Signature': 'sha1=0'}, timeout=5)
+                assert forged.status_code == 204
+
+                assert ingestor.pending() == 1
+                assert ingestor.flush() == 2
+        finally:
+            hub.close()
+            server.shutdown()
+
+        api.get_videos.assert_called_once_with(['vid_push'])
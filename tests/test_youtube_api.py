@@ -4,7 +4,9 @@
 
 import pytest
 from unittest.mock import Mock, patch, MagicMock
-from src.youtube_api import YouTubeAPI
+from googleapiclient.errors import HttpError
+from benchmarks.fake_youtube import apply_fields, parse_fields
+from src.youtube_api import YouTubeAPI, ClientRegistry, get_client_registry
 
 
 @pytest.fixture
@@ -47,6 +49,59 @@ class TestYouTubeAPIBasics:
         assert result is True
         mock_build.assert_called_once()
     
+    @patch('src.youtube_api.build')
+    @patch('src.youtube_api.pickle')
+    @patch('os.path.exists')
+    def test_authenticate_with_known_channel_id(self, mock_exists, mock_pickle, mock_build):
+        """Тест: известный channel ID не запрашивается через channels().list"""
+        mock_exists.return_value = True
+        mock_creds = Mock()
+        mock_creds.valid = True
+        mock_pickle.load.return_value = mock_creds
+        
+        api = YouTubeAPI('fake_credentials.json')
+        
+        with patch('builtins.open', create=True):
+            api.authenticate('fake_token.pickle', channel_id='UC_known')
+        
+        assert api.get_channel_id() == 'UC_known'
+        assert api.get_channel_title() is None
+        mock_build.return_value.channels.assert_not_called()
+    
+    @patch('src.youtube_api.build')
+    def test_create_worker_client(self, mock_build, youtube_api):
+        """Тест: клиент для другого потока получает свой service"""
+        youtube_api.credentials = Mock()
+        youtube_api.channel_info = {'id': 'UC_test_123'}
+        
+        client = youtube_api.create_worker_client()
+        
+        assert client is not youtube_api
+        assert client.service is mock_build.return_value
+        assert client.service is not youtube_api.service
+        assert client.get_channel_id() == 'UC_test_123'
+        mock_build.assert_called_once_with('youtube', 'v3', credentials=youtube_api.credentials,
+                                           static_discovery=True, cache_discovery=False)
+    
+    @patch('src.youtube_api.build')
+    def test_api_endpoint(self, mock_build):
+        """Тест: клиенты обращаются к указанному серверу API"""
+        api = YouTubeAPI('fake_credentials.json', api_endpoint='http://127.0.0.1:9999/')
+        api.credentials = Mock()
+        api.channel_info = {'id': 'UC_test_123'}
+        
+        client = api.create_worker_client()
+        
+        assert client.api_endpoint == 'http://127.0.0.1:9999/'
+        mock_build.assert_called_once_with(
+            'youtube', 'v3', credentials=api.credentials, static_discovery=True,
+            cache_discovery=False, client_options={'api_endpoint': 'http://127.0.0.1:9999/'})
+    
+    def test_create_worker_client_requires_auth(self, youtube_api):
+        """Тест: без авторизации клиент не создаётся"""
+        with pytest.raises(RuntimeError):
+            youtube_api.create_worker_client()
+    
     def test_get_channel_id(self, youtube_api):
         """Тест получения ID канала"""
         youtube_api.channel_info = {'id': 'UC_test_123'}
@@ -66,6 +121,44 @@ class TestYouTubeAPIBasics:
         assert title == 'Test Channel'
 
 
+@pytest.mark.api
+class TestClientRegistry:
+    """Тесты реестра авторизованных клиентов"""
+    
+    @patch.object(YouTubeAPI, 'authenticate')
+    def test_client_reused_across_phases(self, mock_authenticate):
+        """Тест: каждый аккаунт авторизуется один раз за процесс"""
+        registry = ClientRegistry('fake_credentials.json')
+        ledger = Mock()
+        
+        first = registry.get('token_a.pickle', channel_id='UC_a')
+        second = registry.get('token_a.pickle', channel_id='UC_a', quota_ledger=ledger)
+        other = registry.get('token_b.pickle', channel_id='UC_b')
+        
+        assert first is second
+        assert first is not other
+        assert second.quota_ledger is ledger
+        assert mock_authenticate.call_count == 2
+        mock_authenticate.assert_any_call('token_a.pickle', channel_id='UC_a')
+    
+    @patch.object(YouTubeAPI, 'authenticate')
+    def test_clear(self, mock_authenticate):
+        """Тест сброса реестра"""
+        registry = ClientRegistry('fake_credentials.json')
+        
+        first = registry.get('token_a.pickle')
+        registry.clear()
+        
+        assert registry.get('token_a.pickle') is not first
+    
+    def test_get_client_registry_is_shared(self):
+        """Тест: реестр один на процесс"""
+        assert get_client_registry('a.json') is get_client_registry('a.json')
+        assert get_client_registry('a.json') is not get_client_registry('b.json')
+        assert get_client_registry('a.json') is not get_client_registry(
+            'a.json', api_endpoint='http://127.0.0.1:9999/')
+
+
 @pytest.mark.api
 class TestGetSubscriptions:
     """Тесты получения подписок"""
@@ -149,6 +242,59 @@ class TestGetSubscriptions:
         subscriptions = youtube_api.get_subscriptions()
         
         assert len(subscriptions) == 2
+    
+    def test_iter_subscriptions_yields_pages_lazily(self, youtube_api):
+        """Тест: следующая страница запрашивается только когда нужна"""
+        def page(channel_id, next_page_token=None):
+            request = Mock()
+            request.execute.return_value = {
+                'items': [{'snippet': {
+                    'resourceId': {'channelId': channel_id},
+                    'title': channel_id,
+                    'thumbnails': {'default': {'url': 'thumb.jpg'}},
+                    'description': ''
+                }}],
+                'nextPageToken': next_page_token
+            }
+            return request
+        
+        youtube_api.service.subscriptions().list.side_effect = [
+            page('UC_sub1', 'token_page2'), page('UC_sub2')]
+        
+        pages = youtube_api.iter_subscriptions()
+        
+        assert [s['channel_id'] for s in next(pages)] == ['UC_sub1']
+        assert youtube_api.service.subscriptions().list.call_count == 1
+        assert [s['channel_id'] for s in next(pages)] == ['UC_sub2']
+        assert list(pages) == []
+    
+    def test_iter_subscription_pages_not_modified(self, youtube_api):
+        """Тест: страница с прежним ETag не загружается повторно"""
+        not_modified = Mock()
+        not_modified.headers = {}
+        resp = Mock()
+        resp.status = 304
+        not_modified.execute.side_effect = HttpError(resp, b'')
+        
+        second = Mock()
+        second.headers = {}
+        second.execute.return_value = {'etag': 'etag-2-new', 'items': []}
+        
+        youtube_api.service.subscriptions().list.side_effect = [not_modified, second]
+        cached = {
+            '': {'etag': 'etag-1', 'next_page_token': 'token_page2'},
+            'token_page2': {'etag': 'etag-2', 'next_page_token': None},
+        }
+        
+        pages = list(youtube_api.iter_subscription_pages(cached_pages=cached))
+        
+        assert not_modified.headers['If-None-Match'] == 'etag-1'
+        assert second.headers['If-None-Match'] == 'etag-2'
+        assert pages[0] == {'page_token': '', 'etag': 'etag-1',
+                            'next_page_token': 'token_page2', 'items': None}
+        assert pages[1]['etag'] == 'etag-2-new'
+        assert pages[1]['items'] == []
+        assert youtube_api.service.subscriptions().list.call_args.kwargs['pageToken'] == 'token_page2'
 
 
 @pytest.mark.api
@@ -212,6 +358,7 @@ class TestGetChannelVideos:
         assert videos[0]['video_id'] == 'video_123'
         assert videos[0]['title'] == 'Test Video'
         assert videos[0]['duration'] == '10:30'
+        assert videos[0]['duration_seconds'] == 630
         assert videos[0]['view_count'] == 1000
     
     def test_get_channel_videos_with_livestream(self, youtube_api):
@@ -261,6 +408,128 @@ class TestGetChannelVideos:
         
         assert len(videos) == 1
         assert videos[0]['duration'] == 'LIVE'
+        assert videos[0]['duration_seconds'] is None
+    
+    def test_get_videos_batches_ids(self, youtube_api):
+        """Тест: videos().list вызывается не более чем с 50 ID за раз"""
+        def videos_list(part, id, fields):
+            request = Mock()
+            request.execute.return_value = {'items': [
+                {'id': video_id,
+                 'snippet': {'title': video_id, 'thumbnails': {'medium': {'url': 'thumb.jpg'}},
+                             'publishedAt': '2025-01-15T10:00:00Z'},
+                 'contentDetails': {'duration': 'PT1M'}, 'statistics': {}}
+                for video_id in id.split(',')
+            ]}
+            return request
+        
+        youtube_api.service.videos().list.side_effect = videos_list
+        video_ids = [f'vid_{i}' for i in range(120)]
+        
+        videos = youtube_api.get_videos(video_ids)
+        
+        assert [v['video_id'] for v in videos] == video_ids
+        assert youtube_api.service.videos().list.call_count == 3
+
+
+THUMBNAILS = {size: {'url': f'{size}.jpg', 'width': 1, 'height': 1}
+              for size in ('default', 'medium', 'high', 'standard', 'maxres')}
+
+# Полные ответы API (part без fields=)
+FULL_RESPONSES = {
+    'channels.mine': {
+        'kind': 'youtube#channelListResponse', 'etag': 'e',
+        'items': [{'id': 'UC_me', 'etag': 'e',
+                   'snippet': {'title': 'Me', 'description': 'About', 'customUrl': '@me',
+                               'thumbnails': THUMBNAILS,
+                               'localized': {'title': 'Me', 'description': 'About'}},
+                   'contentDetails': {'relatedPlaylists': {'likes': 'LL', 'uploads': 'UU_me'}}}],
+    },
+    'channels.uploads': {
+        'kind': 'youtube#channelListResponse', 'etag': 'e',
+        'items': [{'id': 'UC_1', 'contentDetails': {'relatedPlaylists': {'likes': '',
+                                                                          'uploads': 'UU_1'}}}],
+    },
+    'subscriptions': {
+        'kind': 'youtube#subscriptionListResponse', 'etag': '"page-etag"',
+        'nextPageToken': None, 'pageInfo': {'totalResults': 1, 'resultsPerPage': 50},
+        'items': [{'id': 'sub_1', 'etag': 'e',
+                   'snippet': {'publishedAt': '2024-01-01T00:00:00Z', 'title': 'Creator',
+                               'description': 'Long channel description',
+                               'resourceId': {'kind': 'youtube#channel', 'channelId': 'UC_1'},
+                               'channelId': 'UC_me', 'thumbnails': THUMBNAILS}}],
+    },
+    'playlistItems': {
+        'kind': 'youtube#playlistItemListResponse', 'etag': 'e',
+        'items': [{'snippet': {'title': 'Video', 'description': 'Text', 'thumbnails': THUMBNAILS},
+                   'contentDetails': {'videoId': 'vid_1',
+                                      'videoPublishedAt': '2025-01-15T10:00:00Z'}}],
+    },
+    'videos': {
+        'kind': 'youtube#videoListResponse', 'etag': 'e',
+        'items': [{'id': 'vid_1', 'etag': 'e',
+                   'snippet': {'channelId': 'UC_1', 'title': 'Video', 'description': 'Text',
+                               'publishedAt': '2025-01-15T10:00:00Z', 'thumbnails': THUMBNAILS,
+                               'tags': ['a', 'b'], 'categoryId': '22',
+                               'localized': {'title': 'Video', 'description': 'Text'}},
+                   'contentDetails': {'duration': 'PT12M34S', 'definition': 'hd',
+                                      'caption': 'false'},
+                   'statistics': {'viewCount': '42', 'likeCount': '7', 'commentCount': '1'}}],
+    },
+}
+
+
+@pytest.mark.api
+class TestFieldMasks:
+    """Тесты частичных ответов (fields=)"""
+    
+    def parse_all(self, responses):
+        """Разбирает ответы всеми методами YouTubeAPI"""
+        api = YouTubeAPI('fake_credentials.json')
+        api.service = Mock()
+        requested = {}
+        
+        def respond(key, kwargs):
+            requested[key] = kwargs.get('fields')
+            request = Mock()
+            request.headers = {}
+            request.execute.return_value = responses[key]
+            return request
+        
+        service = api.service
+        service.channels().list.side_effect = lambda **kwargs: respond(
+            'channels.mine' if kwargs.get('mine') else 'channels.uploads', kwargs)
+        service.subscriptions().list.side_effect = lambda **kwargs: respond('subscriptions', kwargs)
+        service.playlistItems().list.side_effect = lambda **kwargs: respond('playlistItems', kwargs)
+        service.videos().list.side_effect = lambda **kwargs: respond('videos', kwargs)
+        
+        results = {
+            'channel': api._get_my_channel_info(),
+            'subscriptions': list(api.iter_subscription_pages()),
+            'videos': api.get_channel_videos('UC_1'),
+        }
+        return results, requested
+    
+    def test_every_request_sends_a_mask(self):
+        """Тест: каждый запрос отправляет свою маску"""
+        _, requested = self.parse_all(FULL_RESPONSES)
+        
+        assert requested == YouTubeAPI.FIELDS
+    
+    def test_masks_cover_parsed_fields(self):
+        """Тест: результат разбора с масками совпадает с разбором полных ответов"""
+        masked = {key: apply_fields(response, parse_fields(YouTubeAPI.FIELDS[key]))
+                  for key, response in FULL_RESPONSES.items()}
+        
+        full_results, _ = self.parse_all(FULL_RESPONSES)
+        masked_results, _ = self.parse_all(masked)
+        
+        # Из информации о канале используются только id и название
+        assert masked_results['channel'] == {'id': 'UC_me', 'snippet': {'title': 'Me'}}
+        assert masked_results['subscriptions'] == full_results['subscriptions']
+        assert masked_results['videos'] == full_results['videos']
+        assert masked_results['videos'][0]['view_count'] == 42
+        assert 'tags' not in masked['videos']['items'][0]['snippet']
 
 
 @pytest.mark.api
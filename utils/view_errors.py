@@ -13,6 +13,7 @@ project_root = os.path.dirname(current_dir)  # корень проекта
 sys.path.insert(0, project_root)
 
 from src.db_manager import Database
+from src.circuit_breaker import circuit_state, OPEN
 from locales import t, load_locale_from_config
 
 # Загружаем локаль из настроек
@@ -100,6 +101,53 @@ def view_errors_by_channel():
         print('=' * 80)
 
 
+def view_tripped_subscriptions(db=None):
+    """Показать подписки, которые пропускаются из-за постоянных ошибок"""
+    db = db or Database()
+
+    subscriptions = db.get_tripped_subscriptions()
+
+    if not subscriptions:
+        print(t('errors.tripped_none'))
+        return []
+
+    print(f"\n{'=' * 80}")
+    print(t('errors.tripped_title', count=len(subscriptions)))
+    print('=' * 80)
+
+    for sub in subscriptions:
+        if circuit_state(sub) == OPEN:
+            state = t('errors.tripped_open', until=sub['circuit_open_until'][:16].replace('T', ' '))
+        else:
+            state = t('errors.tripped_half_open')
+        failed_at = (sub['last_failure_at'] or '-')[:16].replace('T', ' ')
+        line = t('errors.tripped_line', name=sub['channel_name'],
+                 account=sub['personal_channel_name'], failures=sub['failure_count'],
+                 error=sub['last_failure_type'], failed_at=failed_at, state=state)
+        print(f"\n[{sub['id']}] {line}")
+
+    print(f"\n{'=' * 80}")
+    return subscriptions
+
+
+def reset_tripped_subscriptions():
+    """Снять блокировку с подписки (или со всех)"""
+    db = Database()
+
+    if not view_tripped_subscriptions(db):
+        return
+
+    answer = input(f"\n{t('errors.tripped_reset_prompt')}").strip().lower()
+    if answer == 'all':
+        count = db.reset_circuit()
+    elif answer.isdigit():
+        count = db.reset_circuit(int(answer))
+    else:
+        return
+
+    print(t('errors.tripped_reset_done', count=count))
+
+
 def explain_errors():
     """Объяснение типов ошибок"""
     print(f"\n{'=' * 80}")
@@ -109,6 +157,8 @@ def explain_errors():
     print(f"\n{t('errors.playlist_not_found')}")
     print(f"\n{t('errors.duration_parse_error')}")
     print(f"\n{t('errors.quota_exceeded')}")
+    print(f"\n{t('errors.rate_limited')}")
+    print(f"\n{t('errors.server_error')}")
     print(f"\n{t('errors.unknown')}")
 
     print(f"\n{'=' * 80}")
@@ -123,9 +173,10 @@ def main():
     print(f"1. {t('menu_errors.show_all')}")
     print(f"2. {t('menu_errors.by_channel')}")
     print(f"3. {t('menu_errors.explanations')}")
-    print(f"4. {t('menu.exit')}")
+    print(f"4. {t('menu_errors.tripped')}")
+    print(f"5. {t('menu.exit')}")
 
-    choice = input(f"\n{t('menu.your_choice', min=1, max=4)} ").strip()
+    choice = input(f"\n{t('menu.your_choice', min=1, max=5)} ").strip()
 
     if choice == '1':
         view_errors()
@@ -134,6 +185,8 @@ def main():
     elif choice == '3':
         explain_errors()
     elif choice == '4':
+        reset_tripped_subscriptions()
+    elif choice == '5':
         pass
     else:
         print(t('menu.invalid_choice'))
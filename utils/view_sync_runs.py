@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Просмотр журнала запусков синхронизации: длительность, вызовы API, квота
+"""
+
+import sys
+import os
+
+# Добавляем корневую папку проекта в путь
+current_dir = os.path.dirname(os.path.abspath(__file__))  # utils/
+project_root = os.path.dirname(current_dir)  # корень проекта
+sys.path.insert(0, project_root)
+
+from src.db_manager import Database
+from src.sync_plan import format_duration
+from locales import t, load_locale_from_config
+
+# Загружаем локаль из настроек
+load_locale_from_config()
+
+
+def run_duration(seconds):
+    """Длительность запуска; None у незавершённого запуска"""
+    if seconds is None:
+        return t('sync_runs.running')
+    return format_duration(seconds)
+
+
+def view_recent_runs(db, limit=20):
+    """Показать последние запуски"""
+    runs = db.get_sync_runs(limit=limit)
+
+    if not runs:
+        print(t('sync_runs.no_runs'))
+        return
+
+    print(f"\n{'=' * 100}")
+    print(t('sync_runs.recent_title', count=len(runs)))
+    print('=' * 100)
+
+    for run in runs:
+        print(t('sync_runs.run_line', id=run['id'], started=run['started_at'][:16].replace('T', ' '),
+                kind=run['kind'], status=run['status'],
+                duration=run_duration(run['duration_seconds']),
+                calls=sum(run['api_calls'].values()), units=run['quota_units'],
+                new_videos=run['new_videos'], errors=run['errors']))
+
+    print('=' * 100)
+
+
+def view_run_details(db, run_id=None):
+    """Показать подробности запуска (по умолчанию последнего)"""
+    runs = db.get_sync_runs(limit=500)
+    if run_id is not None:
+        runs = [run for run in runs if run['id'] == run_id]
+
+    if not runs:
+        print(t('sync_runs.not_found', id=run_id) if run_id is not None else t('sync_runs.no_runs'))
+        return
+
+    run = runs[0]
+    print(f"\n{'=' * 80}")
+    print(t('sync_runs.details_title', id=run['id'], kind=run['kind'], status=run['status']))
+    print('=' * 80)
+    print(t('sync_runs.details_time', started=run['started_at'], finished=run['finished_at'] or '-',
+            duration=run_duration(run['duration_seconds'])))
+    print(t('sync_runs.details_progress', processed=run['processed'], planned=run['planned'],
+            resumed=run['resumed_count']))
+    print(t('sync_runs.details_results', new_videos=run['new_videos'],
+            added=run['subscriptions_added'], activated=run['subscriptions_activated'],
+            deactivated=run['subscriptions_deactivated'], errors=run['errors']))
+
+    print(f"\n{t('sync_runs.details_calls', units=run['quota_units'])}")
+    for endpoint, calls in sorted(run['api_calls'].items()):
+        print(f"  {endpoint}: {calls}")
+
+    if run['accounts']:
+        print(f"\n{t('sync_runs.details_accounts')}")
+        # Самые долгие аккаунты первыми
+        for account in sorted(run['accounts'].values(), key=lambda a: -a.get('seconds', 0)):
+            print(t('sync_runs.account_line', name=account.get('name', '?'),
+                    duration=format_duration(account.get('seconds', 0)),
+                    channels=account.get('channels', '-'),
+                    new_videos=account.get('new_videos', '-')))
+
+    print('=' * 80)
+
+
+def view_trends(db, days=14):
+    """Показать итоги по дням: число запусков, средняя длительность, квота"""
+    runs = db.get_sync_runs(limit=5000)
+
+    if not runs:
+        print(t('sync_runs.no_runs'))
+        return
+
+    # Группируем по типу запуска ('videos:1,2' -> 'videos') и дню
+    totals = {}
+    for run in runs:
+        kind = run['kind'].split(':')[0]
+        day = run['started_at'][:10]
+        entry = totals.setdefault(kind, {}).setdefault(
+            day, {'runs': 0, 'seconds': 0.0, 'finished': 0, 'units': 0, 'new_videos': 0, 'errors': 0})
+        entry['runs'] += 1
+        entry['units'] += run['quota_units']
+        entry['new_videos'] += run['new_videos']
+        entry['errors'] += run['errors']
+        if run['duration_seconds'] is not None:
+            entry['seconds'] += run['duration_seconds']
+            entry['finished'] += 1
+
+    for kind, by_day in sorted(totals.items()):
+        print(f"\n{'=' * 100}")
+        print(t('sync_runs.trends_title', kind=kind))
+        print('=' * 100)
+
+        for day in sorted(by_day, reverse=True)[:days]:
+            entry = by_day[day]
+            mean = entry['seconds'] / entry['finished'] if entry['finished'] else None
+            print(t('sync_runs.trend_line', day=day, runs=entry['runs'],
+                    duration=run_duration(mean), units=entry['units'],
+                    new_videos=entry['new_videos'], errors=entry['errors']))
+
+    print('=' * 100)
+
+
+def main():
+    print("=" * 80)
+    print(t('sync_runs.title'))
+    print("=" * 80)
+
+    db = Database()
+
+    print(f"\n{t('menu.choose_action')}")
+    print(f"1. {t('sync_runs.menu_recent')}")
+    print(f"2. {t('sync_runs.menu_details')}")
+    print(f"3. {t('sync_runs.menu_trends')}")
+    print(f"4. {t('menu.exit')}")
+
+    choice = input(f"\n{t('menu.your_choice', min=1, max=4)} ").strip()
+
+    if choice == '1':
+        view_recent_runs(db)
+    elif choice == '2':
+        run_id = input(t('sync_runs.ask_run_id')).strip()
+        view_run_details(db, int(run_id) if run_id.isdigit() else None)
+    elif choice == '3':
+        view_trends(db)
+    elif choice == '4':
+        pass
+    else:
+        print(t('menu.invalid_choice'))
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n\n⚠️  Прервано пользователем")
+        sys.exit(0)
+    except Exception as e:
+        print(f"\n❌ Ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)